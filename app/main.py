@@ -1,15 +1,127 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import importlib
+import logging
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 import uvicorn
 import os
 
+from churn_model.controller.churn_model_controller import churnModelRouter
+from churn_model.repository.churn_model_repository_impl import ChurnModelRepositoryImpl
+from churn_model.service.model_search import ModelSearch
+from churn_model.service.online_learning import OnlineChurnLearner
 from customer_analysis.controller.customer_analysis_controller import customerRouter
+from customer_analysis.repository.trends_cube import MaterializedTrendsCube
+from customer_analysis.visualization.chart_renderer import ChartRenderer
+from dataset_store.controller.dataset_store_controller import datasetStoreRouter
+from dataset_store.dataset_store import DatasetStore
+from dataset_store.result_cache import ResultCache
+from dataset_store.sharded_aggregation import ShardedAggregator
+from instrumentation.controller.metrics_controller import metricsRouter
+from instrumentation.controller.profiling_controller import profilingRouter
+from instrumentation.controller.readiness_controller import readinessRouter
+from instrumentation.metrics import MetricsRegistry, rss_bytes
+from instrumentation.profiling import Profiler
+from instrumentation.readiness import WARMUP_MODULES, Readiness
+from instrumentation.structured_log import configure_logging
+from task_executor.bounded_executor import BoundedExecutor, ExecutorSaturatedError
+from task_executor.controller.job_controller import jobRouter
+from task_executor.job_queue import JobQueue
 
 load_dotenv()
+configure_logging()
+
+logger = logging.getLogger(__name__)
+
+
+def warm_imports():
+    for module in WARMUP_MODULES:
+        importlib.import_module(module)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 이전 실행의 학습 작업 기록 복원
+    JobQueue.getInstance().load()
+    # 데이터 로드와 파생 테이블 생성은 백그라운드에서 하고 포트는 바로 연다 (준비 상태는 GET /ready)
+    readiness = Readiness.getInstance()
+    readiness.start(
+        phases=[
+            # 요청마다 CSV를 읽지 않도록 데이터셋을 한 번 로드
+            ("dataset", DatasetStore.getInstance().load),
+            # 데이터가 다시 로드되면 결과 캐시를 비우고, 다른 데이터 버전의 디스크 항목은 정리
+            ("result_cache", ResultCache.getInstance().load),
+            # 구매 동향 조회가 바로 응답하도록 집계 큐브를 미리 만든다
+            ("trends_cube", MaterializedTrendsCube.getInstance().refresh),
+            # ONLINE_LEARNING=1이면 로드된 데이터로 온라인 이탈 모델을 학습하고 이후 추가되는 구매로 갱신
+            *([("online_learning", OnlineChurnLearner.getInstance().start)] if OnlineChurnLearner.enabled() else []),
+        ],
+        # STARTUP_WARMUP=1이면 준비 후 저장된 최신 이탈 모델과 sklearn을 미리 로드 (기본은 처음 쓸 때)
+        warmup=[
+            ("churn_model", ChurnModelRepositoryImpl.getInstance().current),
+            ("imports", warm_imports),
+        ],
+    )
+    yield
+    readiness.join()
+    JobQueue.getInstance().shutdown()
+    BoundedExecutor.getInstance().shutdown()
+    ShardedAggregator.getInstance().shutdown()
+    ChartRenderer.getInstance().shutdown()
+    ModelSearch.getInstance().shutdown()
+    OnlineChurnLearner.getInstance().shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturatedError):
+    return JSONResponse(
+        status_code=429,
+        content={"error": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    # 라우트 템플릿(/jobs/{job_id} 등)별 지연 시간과 RSS 증가량을 기록
+    # 프로파일링이 무장되었거나 X-Profile 헤더가 있으면 이 요청의 프로파일도 남긴다
+    profile = Profiler.getInstance().begin(request.method, request.url.path, request.headers.get("x-profile"))
+    started = time.perf_counter()
+    rss = rss_bytes()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        if profile is not None:
+            response.headers["X-Profile-Id"] = profile.profile_id
+        return response
+    finally:
+        if profile is not None:
+            Profiler.getInstance().end(profile, status)
+        seconds = time.perf_counter() - started
+        memory_growth = max(rss_bytes() - rss, 0)
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        MetricsRegistry.getInstance().observe_request(request.method, path, status, seconds, memory_growth)
+        logger.info("request", extra={
+            "method": request.method, "route": path, "status": status,
+            "duration_ms": round(seconds * 1000, 3), "memory_growth_bytes": memory_growth,
+        })
 
-app = FastAPI()
 
 app.include_router(customerRouter)
+app.include_router(datasetStoreRouter)
+app.include_router(churnModelRouter)
+app.include_router(jobRouter)
+app.include_router(metricsRouter)
+app.include_router(profilingRouter)
+app.include_router(readinessRouter)
 
 if __name__ == "__main__":
     uvicorn.run(app, host=os.getenv('HOST'), port=int(os.getenv('FASTAPI_PORT')))
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+CSV 로드와 컬럼 형식(dataset_store.columnar) 로드의 메모리/조인 시간 비교.
+
+    python -m benchmark.columnar_benchmark --purchases 10000000 --workdir /tmp/columnar-bench
+"""
+import argparse
+import gc
+import os
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from dataset_store.columnar import convert_to_columnar, load_columnar
+
+
+def write_synthetic_dataset(data_dir: str, purchases: int, customers: int, seed: int = 42):
+    """
+    원본 CSV와 같은 스키마의 합성 데이터를 청크 단위로 기록.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(data_dir, exist_ok=True)
+
+    customer_ids = np.char.add(np.char.add("user", np.arange(customers).astype(str)), "@naver.com")
+    pd.DataFrame({
+        "CustomerID": customer_ids,
+        "Name": np.char.add("고객", np.arange(customers).astype(str)),
+        "Age": rng.integers(18, 71, customers),
+        "Gender": rng.choice(["M", "F"], customers),
+        "Location": rng.choice(["서울", "부산", "대구", "인천", "광주"], customers),
+        "SignupDate": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 730, customers), unit="D"),
+    }).to_csv(os.path.join(data_dir, "customers.csv"), index=False)
+
+    product_ids = np.array([str(uuid.UUID(int=int(rng.integers(0, 2**63)))) for _ in range(30)])
+    prices = rng.choice([1400, 3000, 39000, 65000, 85000, 177000, 1250000], 30)
+    pd.DataFrame({
+        "ProductID": product_ids,
+        "ProductName": [f"Product {i}" for i in range(30)],
+        "Category": np.repeat(["Beer", "Wine", "Whiskey"], 10),
+        "Price (KRW)": prices,
+    }).to_csv(os.path.join(data_dir, "products.csv"), index=False)
+
+    path = os.path.join(data_dir, "purchases.csv")
+    chunk_rows = 1_000_000
+    for start in range(0, purchases, chunk_rows):
+        n = min(chunk_rows, purchases - start)
+        product = rng.integers(0, 30, n)
+        quantity = rng.integers(1, 6, n)
+        pd.DataFrame({
+            "purchaseID": np.char.zfill(np.char.mod("%x", np.arange(start, start + n)), 32),
+            "CustomerID": customer_ids[rng.integers(0, customers, n)],
+            "ProductID": product_ids[product],
+            "Quantity": quantity,
+            "Price (KRW)": prices[product],
+            "TotalAmount": quantity * prices[product],
+            "purchaseDate": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D"),
+            "Satisfaction": rng.integers(1, 11, n),
+        }).to_csv(path, index=False, header=start == 0, mode="w" if start == 0 else "a")
+
+
+def _memory(tables: dict) -> int:
+    return sum(int(table.memory_usage(deep=True).sum()) for table in tables.values())
+
+
+def _join_seconds(tables: dict) -> float:
+    started = time.perf_counter()
+    tables["purchases"].merge(tables["products"], on="ProductID").merge(tables["customers"], on="CustomerID")
+    return time.perf_counter() - started
+
+
+def main(args):
+    data_dir = os.path.join(args.workdir, "data")
+    if not os.path.exists(os.path.join(data_dir, "purchases.csv")):
+        started = time.perf_counter()
+        write_synthetic_dataset(data_dir, args.purchases, args.customers)
+        print(f"합성 데이터 생성: {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    tables = {name: pd.read_csv(os.path.join(data_dir, f"{name}.csv")) for name in ("products", "purchases", "customers")}
+    csv_load = time.perf_counter() - started
+    csv_memory = _memory(tables)
+    csv_join = _join_seconds(tables)
+    del tables
+    gc.collect()
+
+    started = time.perf_counter()
+    convert_to_columnar(data_dir, os.path.join(args.workdir, "columnar"))
+    convert = time.perf_counter() - started
+
+    started = time.perf_counter()
+    tables = load_columnar(os.path.join(args.workdir, "columnar"))
+    columnar_load = time.perf_counter() - started
+    columnar_memory = _memory(tables)
+    columnar_join = _join_seconds(tables)
+
+    print(f"purchases={args.purchases:,} customers={args.customers:,} (변환 {convert:.1f}s)")
+    print(f"{'':<10}{'load(s)':>10}{'memory(MB)':>12}{'join(s)':>10}")
+    print(f"{'csv':<10}{csv_load:>10.2f}{csv_memory / 2**20:>12.1f}{csv_join:>10.2f}")
+    print(f"{'columnar':<10}{columnar_load:>10.2f}{columnar_memory / 2**20:>12.1f}{columnar_join:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--purchases", type=int, default=10_000_000)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--workdir", default="/tmp/columnar-bench")
+    main(parser.parse_args())
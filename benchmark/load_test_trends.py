@@ -0,0 +1,133 @@
+"""
+/customer-analysis/trends 지연 시간 부하 테스트.
+
+trends 요청만 보낼 때와 학습(POST /churn-model/train) 요청을 동시에 보낼 때의 p50/p99를 비교해
+블로킹 작업이 이벤트 루프를 막지 않는지 확인한다.
+학습 중 p99가 --max-ratio(기본 1.25, benchmark.suite의 --time-tolerance 0.25와 같은 기준)배를 넘거나
+--max-p99-ms를 지정했을 때 그 절대 예산을 넘으면 실패(종료 코드 1)한다.
+결과 캐시/작업 기록/모델 레지스트리는 실행마다 새 임시 디렉터리를 쓰고, 측정 중 학습이 한 번도 끝나지
+않았으면 아무것도 검증하지 않은 것이므로 실패한다. 학습 프로세스와 이벤트 루프가 CPU 하나를 나눠 쓰면
+p99 비율은 학습 자체의 CPU 사용량을 재므로, CPU가 2개 미만이면 비율 기준은 건너뛰고 결과만 보고한다.
+
+    python -m benchmark.load_test_trends --requests 200 --concurrency 8 --training 4
+"""
+import argparse
+import asyncio
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+
+async def _timed_trends(client: httpx.AsyncClient, latencies: list, statuses: dict):
+    started = time.perf_counter()
+    response = await client.post("/customer-analysis/trends")
+    latencies.append(time.perf_counter() - started)
+    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def _trends_load(client: httpx.AsyncClient, total: int, concurrency: int) -> dict:
+    latencies, statuses = [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await _timed_trends(client, latencies, statuses)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    latencies = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "statuses": statuses,
+    }
+
+
+async def _training_load(client: httpx.AsyncClient, training: int, stop: asyncio.Event) -> tuple:
+    statuses, versions = {}, set()
+
+    async def loop():
+        while not stop.is_set():
+            # 학습 엔드포인트는 결과 캐시 없이 매번 새로 학습해 새 버전을 등록한다
+            response = await client.post("/churn-model/train")
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                versions.add(response.json()["version"])
+            else:
+                # 동시 학습 한도로 거절(429)된 경우 잠시 쉬어 이벤트 루프를 독점하지 않게 한다
+                await asyncio.sleep(0.1)
+
+    await asyncio.gather(*(loop() for _ in range(training)))
+    return statuses, versions
+
+
+async def main(args) -> int:
+    from app.main import app
+    from instrumentation.readiness import Readiness
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        # 준비 전의 데이터 요청은 503으로 거절되므로 시작 단계가 끝날 때까지 기다린다
+        if not await asyncio.to_thread(Readiness.getInstance().wait):
+            raise RuntimeError(f"server failed to start: {Readiness.getInstance().status()['error']}")
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            # 워밍업
+            await _trends_load(client, args.concurrency, args.concurrency)
+            # 로드된 데이터셋 같은 장수 객체를 GC 대상에서 빼 전체 수집 멈춤이 p99를 흔들지 않게 한다
+            gc.collect()
+            gc.freeze()
+
+            baseline = await _trends_load(client, args.requests, args.concurrency)
+
+            stop = asyncio.Event()
+            training_task = asyncio.create_task(_training_load(client, args.training, stop))
+            await asyncio.sleep(0.2)
+            under_training = await _trends_load(client, args.requests, args.concurrency)
+            stop.set()
+            training_statuses, trained_versions = await training_task
+
+    ratio = under_training["p99_ms"] / baseline["p99_ms"]
+    print(f"{'':<18}{'p50(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}  statuses")
+    for name, result in (("trends only", baseline), ("trends + training", under_training)):
+        print(f"{name:<18}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}  {result['statuses']}")
+    print(f"training statuses: {training_statuses}, trained versions: {len(trained_versions)}")
+    if not trained_versions:
+        print("FAIL no training run finished during the measurement; nothing was tested")
+        return 1
+    cpus = os.cpu_count() or 1
+    if cpus < 2:
+        print(f"p99 ratio: {ratio:.2f} (limit {args.max_ratio} skipped: {cpus} CPU shared by training and the event loop)")
+        passed = True
+    else:
+        print(f"p99 ratio: {ratio:.2f} (limit {args.max_ratio})")
+        passed = ratio <= args.max_ratio
+    if args.max_p99_ms is not None:
+        print(f"p99 under training: {under_training['p99_ms']:.1f}ms (budget {args.max_p99_ms}ms)")
+        passed = passed and under_training["p99_ms"] <= args.max_p99_ms
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--training", type=int, default=4, help="동시에 학습 요청을 보내는 클라이언트 수")
+    parser.add_argument("--max-ratio", type=float, default=1.25, help="허용하는 p99 증가 배수")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="학습 중 trends p99의 절대 예산(ms)")
+    args = parser.parse_args()
+    os.environ.setdefault("RFM_AS_OF_DATE", "latest")
+    # 이전 실행의 디스크 결과 캐시/작업 기록을 재사용하지 않고 학습한 모델도 남기지 않도록 실행마다 새 디렉터리
+    run_dir = tempfile.mkdtemp(prefix="load-test-trends-")
+    for name, sub in (("RESULT_CACHE_DIR", "results"), ("JOB_DIR", "jobs"), ("MODEL_REGISTRY_DIR", "models")):
+        os.environ[name] = os.path.join(run_dir, sub)
+    try:
+        code = asyncio.run(main(args))
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    sys.exit(code)
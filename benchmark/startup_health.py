@@ -0,0 +1,76 @@
+"""
+느린 시작(큰 데이터 로드) 중에도 이벤트 루프가 막히지 않는지 확인하는 점검.
+
+서버를 시작하자마자 분석 요청(/customer-analysis/trends)을 하나 보내 둔 채, 준비될 때까지 GET /health의
+지연 시간을 잰다. 준비 전의 분석 요청은 데이터 로드를 기다리지 않고 바로 503으로 거절되어야 하고,
+/health는 --max-health-ms 안에 응답해야 한다. 하나라도 어기면 종료 코드 1로 끝난다.
+
+    python -m benchmark.startup_health --size 1m
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmark.suite import SIZES, prepare_dataset
+
+
+async def _timed(client: httpx.AsyncClient, method: str, path: str) -> tuple:
+    started = time.perf_counter()
+    response = await client.request(method, path)
+    return response.status_code, (time.perf_counter() - started) * 1000
+
+
+async def main(args) -> int:
+    from app.main import app
+    from instrumentation.readiness import Readiness
+
+    readiness = Readiness.getInstance()
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    health_ms = []
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup", timeout=None) as client:
+            analysis = asyncio.create_task(_timed(client, "POST", "/customer-analysis/trends"))
+            while not readiness.is_ready() and readiness.status()["error"] is None:
+                status, elapsed = await _timed(client, "GET", "/health")
+                health_ms.append(elapsed)
+                await asyncio.sleep(args.interval)
+            analysis_status, analysis_ms = await analysis
+        await asyncio.to_thread(readiness.join)
+    ready_seconds = readiness.status()["boot"].get("ready_seconds")
+
+    worst = max(health_ms, default=0.0)
+    print(f"ready after {ready_seconds}s, /health probes: {len(health_ms)}, max {worst:.1f}ms (budget {args.max_health_ms}ms)")
+    print(f"analysis request during startup: {analysis_status} in {analysis_ms:.1f}ms")
+    failures = []
+    if not health_ms:
+        failures.append("server became ready before any /health probe; use a larger --size")
+    if worst > args.max_health_ms:
+        failures.append(f"/health took {worst:.1f}ms during startup")
+    if health_ms and analysis_status != 503:
+        failures.append(f"analysis request during startup returned {analysis_status}, expected 503")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=SIZES, default="1m")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default="/tmp/royal-bitters-bench")
+    parser.add_argument("--interval", type=float, default=0.05, help="/health 요청 간격(초)")
+    parser.add_argument("--max-health-ms", type=float, default=250, help="시작 중 /health 지연 시간 상한(ms)")
+    args = parser.parse_args()
+    os.environ["DATA_DIR"] = prepare_dataset(args.size, os.path.abspath(args.workdir), args.seed)
+    os.environ.setdefault("RFM_AS_OF_DATE", "latest")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # 이전 실행의 결과 캐시/작업 기록을 쓰지 않도록 실행마다 새 디렉터리
+    run_dir = tempfile.mkdtemp(prefix="startup-health-")
+    os.environ.setdefault("RESULT_CACHE_DIR", os.path.join(run_dir, "results"))
+    os.environ.setdefault("JOB_DIR", os.path.join(run_dir, "jobs"))
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,365 @@
+"""
+CustomerRepositoryImpl 단계별/FastAPI 라우트별 벤치마크와 기준선 비교.
+
+크기별(10k/1m/10m) 합성 데이터를 같은 seed로 만들고, 각 단계의 실행 시간, 최대 RSS,
+tracemalloc 할당량(최대 바이트, 블록 수)을 기록한다. 새 프로세스에서 서버가 준비될 때까지의 시간과 RSS도 잰다. 기준선 JSON이 있으면 비교해
+허용 범위를 넘는 항목이 하나라도 있으면 종료 코드 1로 끝난다.
+
+    python -m benchmark.suite --size 10k --save-baseline
+    python -m benchmark.suite --size 10k               # benchmark/baselines/10k.json과 비교
+    python -m benchmark.suite --size 1m --skip-routes --repeat 3
+
+기준선은 기계마다 다르므로 같은 기계에서 --save-baseline으로 만든 뒤 비교한다.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from data.generate_data import write_dataset
+
+
+# 크기 이름: (구매 행 수, 고객 수)
+SIZES = {
+    "10k": (10_000, 1_000),
+    "1m": (1_000_000, 50_000),
+    "10m": (10_000_000, 100_000),
+}
+# 날짜에 따라 데이터가 바뀌지 않도록 구매 기간 종료일을 고정
+DATASET_END_DATE = "2024-12-31"
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        # /proc이 없으면 프로세스 최대 RSS로 대신한다 (macOS는 바이트, Linux는 KB)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+class ResourceMonitor:
+    """
+    with 블록 동안 RSS를 주기적으로 표본 추출해 최댓값을 기록하고,
+    trace_allocations이면 tracemalloc으로 최대 할당 바이트와 블록 수를 잰다.
+    """
+
+    def __init__(self, trace_allocations: bool = False, interval: float = 0.005):
+        self.trace_allocations = trace_allocations
+        self.interval = interval
+        self.result = {}
+
+    def __sample(self):
+        while not self.__stop.wait(self.interval):
+            self.__peak = max(self.__peak, current_rss())
+
+    def __enter__(self):
+        gc.collect()
+        if self.trace_allocations:
+            tracemalloc.start()
+        self.__start_rss = self.__peak = current_rss()
+        self.__stop = threading.Event()
+        self.__sampler = threading.Thread(target=self.__sample, daemon=True)
+        self.__sampler.start()
+        self.__started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.__started
+        self.__stop.set()
+        self.__sampler.join()
+        end_rss = current_rss()
+        self.result = {
+            "wall_s": wall,
+            "peak_rss_mb": max(self.__peak, end_rss) / 2**20,
+            "rss_delta_mb": (end_rss - self.__start_rss) / 2**20,
+        }
+        if self.trace_allocations:
+            _, peak = tracemalloc.get_traced_memory()
+            blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+            tracemalloc.stop()
+            self.result.update({"alloc_peak_mb": peak / 2**20, "alloc_live_blocks": blocks})
+        return False
+
+
+def measure(func, repeat: int, trace_allocations: bool, setup=None) -> tuple:
+    """
+    func를 repeat번 실행해 가장 빠른 실행의 시간/RSS를 쓰고, 할당량은 별도 1회 추적 실행에서 잰다.
+    (tracemalloc은 실행 시간을 크게 늘리므로 시간 측정과 분리)
+    setup은 매 실행 전에 측정 밖에서 호출된다.
+    """
+    best, value = None, None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with ResourceMonitor() as monitor:
+            value = func()
+        if best is None or monitor.result["wall_s"] < best["wall_s"]:
+            best = monitor.result
+    if trace_allocations:
+        if setup is not None:
+            setup()
+        with ResourceMonitor(trace_allocations=True) as monitor:
+            value = func()
+        best = {**best, "alloc_peak_mb": monitor.result["alloc_peak_mb"],
+                "alloc_live_blocks": monitor.result["alloc_live_blocks"]}
+    return best, value
+
+
+def prepare_dataset(size: str, workdir: str, seed: int) -> str:
+    purchases, customers = SIZES[size]
+    data_dir = os.path.join(workdir, size, "data")
+    marker = os.path.join(data_dir, ".complete")
+    expected = f"{purchases} {customers} {seed} {DATASET_END_DATE}\n"
+    if not os.path.exists(marker) or open(marker).read() != expected:
+        started = time.perf_counter()
+        write_dataset(data_dir, customers, purchases, seed, DATASET_END_DATE)
+        with open(marker, "w") as f:
+            f.write(expected)
+        print(f"[{size}] 합성 데이터 생성 {time.perf_counter() - started:.1f}s ({data_dir})")
+    return data_dir
+
+
+def run_repository_stages(repeat: int, trace_allocations: bool) -> dict:
+    from customer_analysis.repository.customer_analysis_repository_impl import CustomerRepositoryImpl
+    from dataset_store.dataset_store import DatasetStore
+
+    results = {}
+    state = {}
+
+    def stage(name, func, setup=None):
+        results[name], value = measure(func, repeat, trace_allocations, setup)
+        print(f"  {name:<24}{results[name]['wall_s']:>10.3f}s{results[name]['peak_rss_mb']:>10.1f}MB")
+        return value
+
+    # load는 새 세대를 만들어 파생 캐시(사실 테이블, RFM, 큐브)를 무효화하므로,
+    # cold 단계는 측정 전에 load해 캐시를 처음부터 만드는 시간을 잰다
+    def cold():
+        DatasetStore.getInstance().load()
+
+    stage("load", lambda: DatasetStore.getInstance().load())
+    repository = CustomerRepositoryImpl()
+
+    state["rfm"] = stage("prepare_data", repository.prepare_data, setup=cold)
+    state["split"] = stage("split_data", lambda: repository.split_data(state["rfm"].copy()))
+    X_train, X_test, y_train, y_test = state["split"]
+    state["model"] = stage("train_model", lambda: repository.train_model(X_train, y_train))
+    stage("evaluate_model", lambda: repository.evaluate_model(state["model"], X_test, y_test))
+
+    stage("analyze_trends", repository.analyze_trends, setup=cold)
+    stage("analyze_trends_cached", repository.analyze_trends)
+    stage("perform_pca_and_split", lambda: repository.perform_pca_and_split(2), setup=cold)
+    return results
+
+
+# 새 프로세스에서 서버를 시작해 준비(예열 포함)될 때까지 기다린 뒤 시작 상태를 출력
+STARTUP_SCRIPT = """
+import asyncio, json
+from app.main import app
+from instrumentation.readiness import Readiness
+
+async def boot():
+    readiness = Readiness.getInstance()
+    async with app.router.lifespan_context(app):
+        await asyncio.to_thread(readiness.wait)
+        await asyncio.to_thread(readiness.join)
+        print(json.dumps(readiness.status()))
+
+asyncio.run(boot())
+"""
+
+
+def run_startup(repeat: int) -> dict:
+    """
+    프로세스 시작부터 준비(GET /ready 200)까지의 시간과 그때의 RSS. 기본 설정과 STARTUP_WARMUP=1(예열 완료까지)을 잰다.
+    """
+    results = {}
+    for name, warmup in (("ready", "0"), ("ready_with_warmup", "1")):
+        best = None
+        for _ in range(repeat):
+            env = {**os.environ, "STARTUP_WARMUP": warmup,
+                   "PYTHONPATH": os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")]))}
+            output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], env=env, check=True,
+                                    capture_output=True, text=True).stdout
+            status = json.loads(output.strip().splitlines()[-1])
+            stage = "warm" if warmup == "1" else "ready"
+            result = {
+                "wall_s": status["boot"][f"{stage}_seconds"],
+                "rss_mb": status["boot"][f"{stage}_rss_bytes"] / 2**20,
+                "phases": {phase["name"]: phase["seconds"] for phase in status["phases"]},
+            }
+            if best is None or result["wall_s"] < best["wall_s"]:
+                best = result
+        results[name] = best
+        print(f"  {name:<24}{best['wall_s']:>10.3f}s{best['rss_mb']:>10.1f}MB")
+    return results
+
+
+SAMPLE_CUSTOMERS = "$sample_customers"
+ROUTES = [
+    ("GET", "/dataset-store/status", None),
+    ("POST", "/dataset-store/reload", None),
+    ("POST", "/customer-analysis/trends", None),
+    ("POST", "/customer-analysis/trends", {"top_k": 10, "window_days": 30}),
+    ("POST", "/customer-analysis/churn?wait=true", None),
+    ("POST", "/customer-analysis/pca?wait=true", {"n_components": 2}),
+    ("GET", "/customer-analysis/visualize", None),
+    ("GET", "/customer-analysis/charts/product_sales?top_n=20", None),
+    ("GET", "/customer-analysis/charts/monthly_sales_trend?format=svg", None),
+    ("POST", "/churn-model/train", None),
+    ("GET", "/churn-model", None),
+    # 고객 ID는 데이터마다 다르므로 실행 시 customers.csv 앞쪽 고객으로 채운다
+    ("POST", "/churn-model/score", {"customer_ids": SAMPLE_CUSTOMERS}),
+    ("GET", "/churn-model/score/batch?format=ndjson", None),
+    ("POST", "/churn-model/score/batch/file?format=csv", None),
+]
+
+
+async def _run_routes(repeat: int, trace_allocations: bool) -> dict:
+    import httpx
+    from app.main import app
+    from instrumentation.readiness import Readiness
+
+    import pandas as pd
+
+    sample_customers = pd.read_csv(os.path.join(os.environ["DATA_DIR"], "customers.csv"), nrows=2)["CustomerID"].tolist()
+    results = {}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        # 시작 단계는 백그라운드에서 실행되므로 준비될 때까지 기다린 뒤 잰다
+        if not await asyncio.to_thread(Readiness.getInstance().wait):
+            raise RuntimeError(f"server failed to start: {Readiness.getInstance().status()['error']}")
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for method, path, body in ROUTES:
+                name = f"{method} {path}" + (f" {json.dumps(body, sort_keys=True)}" if body else "")
+                if body:
+                    body = {key: sample_customers if value == SAMPLE_CUSTOMERS else value for key, value in body.items()}
+                best = None
+                for attempt in range(repeat + (1 if trace_allocations else 0)):
+                    traced = trace_allocations and attempt == repeat
+                    with ResourceMonitor(trace_allocations=traced) as monitor:
+                        response = await client.request(method, path, json=body)
+                        await response.aread()
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"{name} -> {response.status_code}: {response.text[:200]}")
+                    if traced:
+                        best.update({key: monitor.result[key] for key in ("alloc_peak_mb", "alloc_live_blocks")})
+                    elif best is None or monitor.result["wall_s"] < best["wall_s"]:
+                        best = {**monitor.result, "status": response.status_code, "bytes": len(response.content)}
+                results[name] = best
+                print(f"  {name[:60]:<62}{best['wall_s']:>9.3f}s{best['peak_rss_mb']:>10.1f}MB")
+    return results
+
+
+def run_routes(repeat: int, trace_allocations: bool) -> dict:
+    return asyncio.run(_run_routes(repeat, trace_allocations))
+
+
+def compare(results: dict, baseline: dict, time_tolerance: float, memory_tolerance: float,
+            min_seconds: float, min_megabytes: float) -> list:
+    """
+    기준선보다 느려지거나 메모리를 더 쓴 항목 목록.
+    작은 단계의 측정 잡음을 거르기 위해 min_seconds, min_megabytes 이하의 증가는 무시한다.
+    """
+    regressions = []
+    for group in ("startup", "stages", "routes"):
+        for name, current in results.get(group, {}).items():
+            reference = baseline.get(group, {}).get(name)
+            if reference is None:
+                continue
+            limit = max(reference["wall_s"] * (1 + time_tolerance), reference["wall_s"] + min_seconds)
+            if current["wall_s"] > limit:
+                regressions.append(f"{group}/{name}: wall {reference['wall_s']:.3f}s -> {current['wall_s']:.3f}s")
+            for key in ("peak_rss_mb", "rss_mb", "alloc_peak_mb"):
+                if key in current and key in reference and current[key] > max(reference[key] * (1 + memory_tolerance), reference[key] + min_megabytes):
+                    regressions.append(f"{group}/{name}: {key} {reference[key]:.1f} -> {current[key]:.1f}")
+    return regressions
+
+
+def main(args) -> int:
+    workdir = os.path.abspath(args.workdir)
+    data_dir = prepare_dataset(args.size, workdir, args.seed)
+    # 단계들이 ./data, ./graphs, ./models 등 상대 경로에 쓰므로 작업 디렉터리 안에서 실행
+    os.chdir(os.path.join(workdir, args.size))
+    os.environ["DATA_DIR"] = data_dir
+    os.environ.setdefault("RFM_AS_OF_DATE", "latest")
+    os.environ.setdefault("MODEL_REGISTRY_DIR", "./models/churn")
+    os.environ.setdefault("BATCH_SCORE_DIR", "./scores")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    results = {
+        "size": args.size,
+        "purchases": SIZES[args.size][0],
+        "customers": SIZES[args.size][1],
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "numpy": np.__version__,
+    }
+    print(f"[{args.size}] startup")
+    results["startup"] = run_startup(args.repeat)
+    print(f"[{args.size}] repository stages")
+    results["stages"] = run_repository_stages(args.repeat, not args.no_allocations)
+    if not args.skip_routes:
+        print(f"[{args.size}] routes")
+        results["routes"] = run_routes(args.repeat, not args.no_allocations)
+
+    output = args.output or os.path.join(workdir, f"results-{args.size}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"결과: {output}")
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{args.size}.json")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"기준선 저장: {baseline_path}")
+        return 0
+    if not os.path.exists(baseline_path):
+        print(f"기준선 없음: {baseline_path} (--save-baseline으로 저장)")
+        return 0
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance,
+                          args.min_seconds, args.min_megabytes)
+    if regressions:
+        print(f"성능 회귀 {len(regressions)}건 (기준선 {baseline_path}):")
+        for regression in regressions:
+            print(f"  REGRESSION {regression}")
+        return 1
+    print(f"기준선 대비 회귀 없음 ({baseline_path})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=1, help="단계마다 반복 실행해 가장 빠른 값을 기록")
+    parser.add_argument("--workdir", default="/tmp/royal-bitters-bench")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None, help="기본값: benchmark/baselines/<size>.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--skip-routes", action="store_true")
+    parser.add_argument("--no-allocations", action="store_true", help="tracemalloc 추적 실행 생략")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="허용하는 실행 시간 증가 비율")
+    parser.add_argument("--memory-tolerance", type=float, default=0.20, help="허용하는 메모리 증가 비율")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="이보다 작은 시간 증가는 무시")
+    parser.add_argument("--min-megabytes", type=float, default=16, help="이보다 작은 메모리 증가는 무시")
+    sys.exit(main(parser.parse_args()))
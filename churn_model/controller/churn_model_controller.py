@@ -0,0 +1,194 @@
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import AfterValidator, BaseModel, Field
+
+from churn_model.repository.churn_model_repository_impl import ChurnModelRepositoryImpl
+from churn_model.service.churn_model_service_impl import ChurnModelServiceImpl, BATCH_MEDIA_TYPES
+from churn_model.service.online_learning import OnlineChurnLearner
+from customer_analysis.repository.customer_analysis_repository_impl import FEATURE_COLUMNS
+from instrumentation.controller.readiness_controller import requireReady
+from task_executor.bounded_executor import BoundedExecutor
+from task_executor.controller.job_controller import job_response
+
+churnModelRouter = APIRouter(dependencies=[Depends(requireReady)])
+
+async def injectChurnModelService() -> ChurnModelServiceImpl:
+    return ChurnModelServiceImpl()
+
+def check_as_of_date(value: Optional[str]) -> Optional[str]:
+    # 'now', 'latest' 또는 ISO 날짜(시각)만 허용 (그 외는 422)
+    if value is None or value in ("now", "latest"):
+        return value
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError("as_of_date must be 'now', 'latest' or an ISO date (YYYY-MM-DD).")
+    return value
+
+AsOfDate = Annotated[Optional[str], AfterValidator(check_as_of_date)]
+
+class ChurnTrainRequest(BaseModel):
+    as_of_date: AsOfDate = None
+
+class ModelSearchRequest(BaseModel):
+    estimators: List[Literal["logistic_regression", "random_forest", "hist_gradient_boosting"]] = Field(
+        ["logistic_regression", "random_forest", "hist_gradient_boosting"], min_length=1,
+    )
+    # None은 PCA 없이 원래 특성을 그대로 사용
+    pca_components: List[Optional[Annotated[int, Field(ge=1, le=len(FEATURE_COLUMNS))]]] = Field(
+        [None, 2, 4], min_length=1,
+    )
+    search: Literal["grid", "random"] = "random"
+    n_iter: int = Field(24, ge=1, le=500)
+    cv: int = Field(5, ge=2, le=10)
+    scoring: Literal["f1", "roc_auc", "balanced_accuracy", "accuracy"] = "f1"
+    early_stopping: bool = True
+    promote: bool = True
+    seed: int = 42
+    as_of_date: AsOfDate = None
+
+class ChurnFeatureRow(BaseModel):
+    Recency: float
+    Frequency: float
+    Monetary: float
+    Satisfaction: float
+    Age: float
+    Gender: Literal["M", "F"]
+
+class ChurnScoreRequest(BaseModel):
+    customer_ids: List[str] = []
+    rows: List[ChurnFeatureRow] = []
+    as_of_date: AsOfDate = None
+
+@churnModelRouter.post("/churn-model/train")
+async def train_churn_model(
+    request: Optional[ChurnTrainRequest] = None,
+    churnModelService: ChurnModelServiceImpl = Depends(injectChurnModelService)
+):
+    """
+    Train the churn pipeline, register it as a new version and start serving it.
+    """
+    request = request or ChurnTrainRequest()
+    return await churnModelService.train(request.as_of_date)
+
+@churnModelRouter.post("/churn-model/search")
+async def search_churn_models(
+    request: Optional[ModelSearchRequest] = None,
+    wait: bool = False,
+    churnModelService: ChurnModelServiceImpl = Depends(injectChurnModelService)
+):
+    """
+    Cross-validated search over estimators, regularization, class weights and PCA components.
+    Unpromising configurations are dropped after the first folds (successive halving); the result is a ranked leaderboard.
+    With promote=true the winner is retrained on the training split, registered as a new version and served.
+    Returns 202 with the job to poll at /jobs/{job_id}, or the result with wait=true.
+    """
+    request = request or ModelSearchRequest()
+    job, deduplicated = churnModelService.submit_search(request.model_dump())
+    return await job_response(job, deduplicated, wait)
+
+@churnModelRouter.get("/churn-model/online")
+async def online_churn_model_status(churnModelService: ChurnModelServiceImpl = Depends(injectChurnModelService)):
+    """
+    Show the incrementally updated churn model: applied purchase batches, full retrains and
+    the latest drift check against the serving (batch-trained) model.
+    """
+    return churnModelService.online_status()
+
+@churnModelRouter.post("/churn-model/online/retrain")
+async def retrain_online_churn_model(churnModelService: ChurnModelServiceImpl = Depends(injectChurnModelService)):
+    """
+    Retrain the online model from scratch on the training split in the background.
+    """
+    if not OnlineChurnLearner.getInstance().running():
+        raise HTTPException(status_code=409, detail="Online learning is disabled. Set ONLINE_LEARNING=1.")
+    return churnModelService.retrain_online()
+
+@churnModelRouter.post("/churn-model/online/promote")
+async def promote_online_churn_model(churnModelService: ChurnModelServiceImpl = Depends(injectChurnModelService)):
+    """
+    Register the current online model as a new version and start serving it.
+    """
+    metadata = await churnModelService.promote_online()
+    if metadata is None:
+        raise HTTPException(status_code=404, detail="No online churn model. Set ONLINE_LEARNING=1 and wait for it to train.")
+    return metadata
+
+@churnModelRouter.post("/churn-model/score")
+async def score_churn(
+    request: ChurnScoreRequest,
+    churnModelService: ChurnModelServiceImpl = Depends(injectChurnModelService)
+):
+    """
+    Score CustomerIDs and/or raw feature rows with the serving model, without retraining.
+    """
+    rows = [row.model_dump() for row in request.rows]
+    # 특성 조회와 예측은 이벤트 루프 밖의 스레드에서 수행
+    response = await BoundedExecutor.getInstance().run_local(
+        "churn", churnModelService.score, request.customer_ids, rows, request.as_of_date,
+    )
+    if response is None:
+        raise HTTPException(status_code=404, detail="No trained churn model. POST /churn-model/train first.")
+    return response
+
+@churnModelRouter.get("/churn-model")
+async def churn_model_info(churnModelService: ChurnModelServiceImpl = Depends(injectChurnModelService)):
+    """
+    Show the serving model and the registered versions.
+    """
+    # 처음 조회하면 저장된 모델을 로드하므로 이벤트 루프 밖의 스레드에서 수행
+    return await BoundedExecutor.getInstance().run_local("churn", churnModelService.model_info)
+
+@churnModelRouter.post("/churn-model/versions/{version}/activate")
+async def activate_churn_model(
+    version: str,
+    churnModelService: ChurnModelServiceImpl = Depends(injectChurnModelService)
+):
+    """
+    Serve a previously registered model version.
+    """
+    try:
+        # 모델 파일 로드는 이벤트 루프 밖의 스레드에서 수행
+        return await BoundedExecutor.getInstance().run_local("churn", churnModelService.activate, version)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {version}")
+
+@churnModelRouter.get("/churn-model/score/batch")
+async def score_all_customers(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    chunk_size: int = Query(50000, gt=0),
+    as_of_date: AsOfDate = None,
+    churnModelService: ChurnModelServiceImpl = Depends(injectChurnModelService)
+):
+    """
+    Stream churn probabilities for every customer as NDJSON or chunked CSV.
+    """
+    # 응답 헤더를 보내기 전에 모델과 특성 테이블을 한 번만 조회한다
+    # (조회 오류는 스트리밍 전에 드러나고, 버전 헤더와 점수가 같은 모델에서 나온다)
+    inputs = await BoundedExecutor.getInstance().run_local("churn", churnModelService.batch_score_inputs, as_of_date)
+    if inputs is None:
+        raise HTTPException(status_code=404, detail="No trained churn model. POST /churn-model/train first.")
+    pipeline, metadata, features = inputs
+    return StreamingResponse(
+        churnModelService.iter_batch_scores(pipeline, features, format, chunk_size),
+        media_type=BATCH_MEDIA_TYPES[format],
+        headers={"X-Model-Version": metadata["version"]},
+    )
+
+@churnModelRouter.post("/churn-model/score/batch/file")
+async def score_all_customers_to_file(
+    format: Literal["ndjson", "csv"] = "csv",
+    chunk_size: int = Query(50000, gt=0),
+    as_of_date: AsOfDate = None,
+    churnModelService: ChurnModelServiceImpl = Depends(injectChurnModelService)
+):
+    """
+    Write churn probabilities for every customer to a file under BATCH_SCORE_DIR.
+    """
+    pipeline, _ = await BoundedExecutor.getInstance().run_local("churn", ChurnModelRepositoryImpl.getInstance().current)
+    if pipeline is None:
+        raise HTTPException(status_code=404, detail="No trained churn model. POST /churn-model/train first.")
+    return await churnModelService.write_batch_scores(format, chunk_size, as_of_date)
@@ -0,0 +1,38 @@
+from abc import ABC, abstractmethod
+
+
+class ChurnModelRepository(ABC):
+    @abstractmethod
+    def save(self, pipeline, metadata: dict) -> dict:
+        """
+        학습된 파이프라인(스케일러 + 모델)을 새 버전으로 저장하고 메타데이터를 반환.
+        """
+        pass
+
+    @abstractmethod
+    def load(self, version: str = None) -> dict:
+        """
+        지정 버전(기본: 최신)을 서빙 모델로 로드하고 메타데이터를 반환.
+        """
+        pass
+
+    @abstractmethod
+    def current(self):
+        """
+        현재 서빙 중인 (파이프라인, 메타데이터). 없으면 (None, None).
+        """
+        pass
+
+    @abstractmethod
+    def list_versions(self) -> list:
+        """
+        저장된 모델 버전의 메타데이터 목록.
+        """
+        pass
+
+    @abstractmethod
+    def has_version(self, version: str) -> bool:
+        """
+        저장이 끝난 모델 버전인지 여부 (레지스트리 밖을 가리키는 이름은 False).
+        """
+        pass
@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import uuid
+
+import pandas as pd
+
+from churn_model.repository.churn_model_repository import ChurnModelRepository
+
+
+class ChurnModelRepositoryImpl(ChurnModelRepository):
+    """
+    버전별 디렉터리(<MODEL_REGISTRY_DIR>/<version>/model.joblib, metadata.json)에 모델을 보관하고
+    LATEST 파일로 최신 버전을 가리키는 모델 레지스트리. 서빙 모델은 프로세스 전역으로 유지한다.
+    모델 역직렬화는 sklearn을 로드하므로 시작 시가 아니라 서빙 모델을 처음 조회할 때(또는 예열 단계에서) 한다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__pipeline = None
+            cls.__instance.__metadata = None
+            cls.__instance.__load_lock = threading.Lock()
+            cls.__instance.__loaded = False
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def registry_dir() -> str:
+        return os.getenv("MODEL_REGISTRY_DIR", "./models/churn")
+
+    def __version_dir(self, version: str) -> str:
+        return os.path.join(self.registry_dir(), version)
+
+    def __write_atomic(self, path: str, text: str):
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+    def save(self, pipeline, metadata: dict) -> dict:
+        version = f"{pd.Timestamp.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+        metadata = {**metadata, "version": version}
+
+        # 임시 디렉터리에 기록한 뒤 이름을 바꿔 반쯤 저장된 버전이 보이지 않게 한다
+        os.makedirs(self.registry_dir(), exist_ok=True)
+        temp_dir = self.__version_dir(f".{version}.tmp")
+        os.makedirs(temp_dir)
+        import joblib
+        joblib.dump(pipeline, os.path.join(temp_dir, "model.joblib"))
+        with open(os.path.join(temp_dir, "metadata.json"), "w") as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        os.replace(temp_dir, self.__version_dir(version))
+
+        self.__write_atomic(os.path.join(self.registry_dir(), "LATEST"), version)
+        return metadata
+
+    def __latest_version(self):
+        try:
+            with open(os.path.join(self.registry_dir(), "LATEST")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def load(self, version: str = None) -> dict:
+        version = version or self.__latest_version()
+        if version is None:
+            return None
+
+        import joblib
+        version_dir = self.__version_dir(version)
+        pipeline = joblib.load(os.path.join(version_dir, "model.joblib"))
+        with open(os.path.join(version_dir, "metadata.json")) as f:
+            metadata = json.load(f)
+
+        with self.__lock:
+            self.__pipeline = pipeline
+            self.__metadata = metadata
+            self.__loaded = True
+        return metadata
+
+    def current(self):
+        # 아직 한 번도 로드하지 않았으면 최신 버전을 로드 (저장된 모델이 없으면 (None, None))
+        if not self.__loaded:
+            with self.__load_lock:
+                if not self.__loaded:
+                    self.load()
+                    self.__loaded = True
+        with self.__lock:
+            return self.__pipeline, self.__metadata
+
+    def list_versions(self) -> list:
+        if not os.path.isdir(self.registry_dir()):
+            return []
+
+        versions = []
+        for name in sorted(os.listdir(self.registry_dir()), reverse=True):
+            metadata_path = os.path.join(self.__version_dir(name), "metadata.json")
+            if name.startswith(".") or not os.path.isfile(metadata_path):
+                continue
+            with open(metadata_path) as f:
+                versions.append(json.load(f))
+        return versions
+
+    def has_version(self, version: str) -> bool:
+        # 레지스트리 디렉터리의 항목 이름과 정확히 같은 저장 완료 버전만 인정한다
+        if not os.path.isdir(self.registry_dir()) or version.startswith("."):
+            return False
+        return version in os.listdir(self.registry_dir()) and \
+            os.path.isfile(os.path.join(self.__version_dir(version), "metadata.json"))
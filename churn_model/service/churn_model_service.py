@@ -0,0 +1,82 @@
+from abc import ABC, abstractmethod
+
+
+class ChurnModelService(ABC):
+    @abstractmethod
+    async def train(self, as_of_date: str = None) -> dict:
+        """
+        이탈 예측 파이프라인을 학습해 레지스트리에 새 버전으로 등록하고 서빙 모델로 교체.
+        """
+        pass
+
+    @abstractmethod
+    def submit_search(self, params: dict):
+        """
+        추정기/하이퍼파라미터/PCA 성분 수 교차 검증 탐색 작업을 등록하고 (작업, 중복 여부)를 반환.
+        promote이면 1위 설정을 새 버전으로 등록해 서빙 모델로 교체.
+        """
+        pass
+
+    @abstractmethod
+    def online_status(self) -> dict:
+        """
+        구매 추가 시 증분 갱신되는 온라인 모델의 상태와 배치 모델 대비 드리프트 확인 결과.
+        """
+        pass
+
+    @abstractmethod
+    def retrain_online(self) -> dict:
+        """
+        온라인 모델을 학습 분할 전체로 처음부터 다시 학습하도록 요청.
+        """
+        pass
+
+    @abstractmethod
+    async def promote_online(self) -> dict:
+        """
+        현재 온라인 모델을 레지스트리에 새 버전으로 등록하고 서빙 모델로 교체.
+        """
+        pass
+
+    @abstractmethod
+    def score(self, customer_ids: list, rows: list, as_of_date: str = None) -> dict:
+        """
+        재학습 없이 서빙 모델로 고객 ID 또는 특성 행의 이탈 확률 계산.
+        """
+        pass
+
+    @abstractmethod
+    def batch_score_inputs(self, as_of_date: str = None):
+        """
+        배치 점수화에 쓸 (서빙 파이프라인, 모델 메타데이터, 고객 특성 테이블). 서빙 모델이 없으면 None.
+        """
+        pass
+
+    @abstractmethod
+    def iter_batch_scores(self, pipeline, features, output_format: str, chunk_size: int):
+        """
+        batch_score_inputs로 조회한 파이프라인과 특성 테이블로 전체 고객을 청크 단위로 점수화해
+        NDJSON/CSV 바이트 청크를 생성.
+        """
+        pass
+
+    @abstractmethod
+    async def write_batch_scores(self, output_format: str, chunk_size: int, as_of_date: str = None) -> dict:
+        """
+        전체 고객 점수를 파일로 기록하고 경로와 행 수를 반환.
+        """
+        pass
+
+    @abstractmethod
+    def model_info(self) -> dict:
+        """
+        서빙 중인 모델과 저장된 버전 목록.
+        """
+        pass
+
+    @abstractmethod
+    def activate(self, version: str) -> dict:
+        """
+        저장된 버전을 서빙 모델로 교체.
+        """
+        pass
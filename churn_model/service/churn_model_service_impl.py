@@ -0,0 +1,267 @@
+import multiprocessing
+import os
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from churn_model.repository.churn_model_repository_impl import ChurnModelRepositoryImpl
+from churn_model.service.churn_model_service import ChurnModelService
+from churn_model.service.model_search import ModelSearch, build_pipeline, search_configurations
+from churn_model.service.online_learning import OnlineChurnLearner
+from customer_analysis.repository.customer_analysis_repository_impl import (
+    CustomerRepositoryImpl, FEATURE_COLUMNS, FEATURE_DTYPE, GENDER_CODES,
+)
+from dataset_store.dataset_store import DatasetStore
+from task_executor.bounded_executor import BoundedExecutor
+from task_executor.job_queue import JobQueue
+
+
+def run_train_churn_model(as_of_date=None):
+    # 프로세스 풀 워커에서도 실행할 수 있는 학습 작업
+    if multiprocessing.parent_process() is not None:
+        DatasetStore.getInstance().reload()
+    return ChurnModelServiceImpl().train_sync(as_of_date)
+
+
+def run_write_batch_scores(version, output_format, chunk_size, as_of_date=None):
+    if multiprocessing.parent_process() is not None:
+        DatasetStore.getInstance().reload()
+        ChurnModelRepositoryImpl.getInstance().load(version)
+    return ChurnModelServiceImpl().write_batch_scores_sync(output_format, chunk_size, as_of_date)
+
+
+def run_model_search(params):
+    if multiprocessing.parent_process() is not None:
+        DatasetStore.getInstance().reload()
+    return ChurnModelServiceImpl().search_sync(params)
+
+
+BATCH_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def format_score_chunk(customer_ids, probabilities, output_format: str, header: bool) -> bytes:
+    chunk = pd.DataFrame({"CustomerID": customer_ids, "churn_probability": probabilities})
+    if output_format == "csv":
+        return chunk.to_csv(index=False, header=header).encode()
+    return chunk.to_json(orient="records", lines=True).encode()
+
+
+def churn_probability(pipeline, X) -> np.ndarray:
+    # 이탈(1) 클래스의 확률 열
+    column = list(pipeline.classes_).index(1)
+    return pipeline.predict_proba(X)[:, column]
+
+
+class ChurnModelServiceImpl(ChurnModelService):
+    # 고객 ID 조회용 특성 테이블 (특성 행렬 키) -> DataFrame
+    __features_lock = threading.Lock()
+    __features_key = None
+    __features = None
+
+    def __init__(self):
+        self.__customerRepository = CustomerRepositoryImpl()
+        self.__churnModelRepository = ChurnModelRepositoryImpl.getInstance()
+
+    async def train(self, as_of_date=None):
+        executor = BoundedExecutor.getInstance()
+        metadata = await executor.run("train", run_train_churn_model, as_of_date)
+        # 다른 프로세스에서 학습했더라도 레지스트리에서 다시 읽어 서빙 모델로 교체 (모델 파일 로드는 스레드에서)
+        await executor.run_local("churn", self.__churnModelRepository.load, metadata["version"])
+        return metadata
+
+    def train_sync(self, as_of_date=None):
+        # sklearn은 학습할 때 처음 로드한다 (저장된 모델은 joblib이 로드할 때 가져온다)
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        features = self.__customerRepository.customer_features(as_of_date)
+        X_train, X_test, y_train, y_test = features.split()
+
+        pipeline = Pipeline([
+            ("scaler", StandardScaler()),
+            ("model", LogisticRegression(random_state=42, max_iter=500, class_weight='balanced')),
+        ])
+        pipeline.fit(X_train, y_train)
+        return self.__register(pipeline, features, X_train, X_test, y_test)
+
+    def __register(self, pipeline, features, X_train, X_test, y_test, **extra) -> dict:
+        # 학습 데이터로 맞춘 스케일러를 그대로 사용해 평가하고 레지스트리에 새 버전으로 저장
+        import sklearn
+        from sklearn.metrics import accuracy_score, classification_report
+
+        y_pred = pipeline.predict(X_test)
+        metadata = {
+            "trained_at": pd.Timestamp.now().isoformat(),
+            "data_version": features.attrs["data_version"],
+            "as_of_date": features.attrs["as_of_date"],
+            "feature_columns": FEATURE_COLUMNS,
+            "estimator": type(pipeline.named_steps["model"]).__name__,
+            "params": pipeline.named_steps["model"].get_params(),
+            "sklearn_version": sklearn.__version__,
+            "n_train": int(len(X_train)),
+            "n_test": int(len(X_test)),
+            "accuracy": accuracy_score(y_test, y_pred),
+            "classification_report": classification_report(y_test, y_pred, output_dict=True),
+            **extra,
+        }
+        return self.__churnModelRepository.save(pipeline, metadata)
+
+    def submit_search(self, params: dict):
+        data_version = DatasetStore.getInstance().get_snapshot().version
+        return JobQueue.getInstance().submit(
+            "model_search", run_model_search, params, params=params, data_version=data_version,
+            on_success=self.__serve_search_winner,
+        )
+
+    async def __serve_search_winner(self, result: dict):
+        # 작업이 다른 프로세스에서 실행되었더라도 레지스트리에서 다시 읽어 서빙 모델로 교체 (모델 파일 로드는 스레드에서)
+        if result.get("model") is not None:
+            await BoundedExecutor.getInstance().run_local(
+                "churn", self.__churnModelRepository.load, result["model"]["version"],
+            )
+
+    def search_sync(self, params: dict) -> dict:
+        features = self.__customerRepository.customer_features(params.get("as_of_date"))
+        X_train, X_test, y_train, y_test = features.split()
+
+        # 교차 검증은 학습 분할 안에서만 하고, 1위 설정은 학습 분할 전체로 다시 학습해 테스트 분할로 평가
+        configurations = search_configurations(
+            params["estimators"], params["pca_components"], params["search"], params["n_iter"], params["seed"],
+        )
+        result = ModelSearch.getInstance().search(
+            X_train.to_numpy(), y_train.to_numpy(), configurations,
+            params["cv"], params["scoring"], params["early_stopping"], params["seed"],
+        )
+        winner = result["leaderboard"][0]
+        result["model"] = None
+        if params["promote"]:
+            pipeline = build_pipeline(winner)
+            pipeline.fit(X_train, y_train)
+            summary = {key: value for key, value in result.items() if key != "leaderboard"}
+            result["model"] = self.__register(
+                pipeline, features, X_train, X_test, y_test,
+                search={**summary, "winner": winner, "leaderboard": result["leaderboard"][:10]},
+            )
+        return result
+
+    def online_status(self):
+        return OnlineChurnLearner.getInstance().status()
+
+    def retrain_online(self):
+        learner = OnlineChurnLearner.getInstance()
+        learner.request_full_retrain("manual")
+        return learner.status()
+
+    async def promote_online(self):
+        return await BoundedExecutor.getInstance().run_local("train", self.promote_online_sync)
+
+    def promote_online_sync(self):
+        # 온라인 모델은 이 프로세스의 메모리에만 있으므로 현재 프로세스에서 등록하고 서빙 모델로 교체한다
+        learner = OnlineChurnLearner.getInstance()
+        pipeline = learner.pipeline()
+        if pipeline is None:
+            return None
+        status = learner.status()
+        features = self.__customerRepository.customer_features()
+        X_train, X_test, _, y_test = features.split()
+        metadata = self.__register(
+            pipeline, features, X_train, X_test, y_test,
+            mode="online",
+            online={key: status[key] for key in ("generation", "batches_applied", "rows_applied", "full_retrains",
+                                                 "last_full_retrain", "last_drift_check")},
+        )
+        self.__churnModelRepository.load(metadata["version"])
+        return metadata
+
+    def __customer_features(self, as_of_date=None) -> pd.DataFrame:
+        # 특성 저장소의 메모리 매핑 행렬을 복사 없이 감싼 DataFrame을 행렬이 바뀔 때까지 재사용
+        cls = ChurnModelServiceImpl
+        matrix = self.__customerRepository.customer_features(as_of_date)
+        with cls.__features_lock:
+            if cls.__features_key != matrix.key:
+                cls.__features = matrix.frame()
+                cls.__features_key = matrix.key
+            return cls.__features
+
+    def score(self, customer_ids, rows, as_of_date=None):
+        pipeline, metadata = self.__churnModelRepository.current()
+        if pipeline is None:
+            return None
+
+        response = {"model_version": metadata["version"], "scores": [], "missing_customer_ids": []}
+
+        if customer_ids:
+            features = self.__customer_features(as_of_date).reindex(customer_ids)
+            found = features.notna().all(axis=1)
+            X = features[found]
+            probabilities = churn_probability(pipeline, X) if len(X) else []
+            response["scores"] = [
+                {"CustomerID": customer_id, "churn_probability": float(probability)}
+                for customer_id, probability in zip(X.index, probabilities)
+            ]
+            response["missing_customer_ids"] = features.index[~found].tolist()
+
+        if rows:
+            X = pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+            X["Gender"] = X["Gender"].map(GENDER_CODES)
+            X = X.astype(FEATURE_DTYPE)
+            response["row_scores"] = [float(p) for p in churn_probability(pipeline, X)]
+
+        return response
+
+    def batch_score_inputs(self, as_of_date=None):
+        """
+        서빙 모델과 특성 테이블을 한 번에 조회해 점수와 모델 버전이 같은 모델에서 나오게 한다.
+        스트리밍 응답을 시작하기 전에 호출하므로 특성 조회 오류는 응답 헤더를 보내기 전에 드러난다.
+        """
+        pipeline, metadata = self.__churnModelRepository.current()
+        if pipeline is None:
+            return None
+        return pipeline, metadata, self.__customer_features(as_of_date)
+
+    def iter_batch_scores(self, pipeline, features, output_format, chunk_size):
+        """
+        특성 테이블을 chunk_size 행씩 잘라 predict_proba를 벡터 연산으로 수행하고 바로 직렬화한다.
+        결과 전체를 메모리에 모으지 않는다.
+        """
+        for start in range(0, len(features), chunk_size):
+            X = features.iloc[start:start + chunk_size]
+            yield format_score_chunk(X.index, churn_probability(pipeline, X), output_format, header=start == 0)
+
+    async def write_batch_scores(self, output_format, chunk_size, as_of_date=None):
+        _, metadata = self.__churnModelRepository.current()
+        return await BoundedExecutor.getInstance().run(
+            "batch_score", run_write_batch_scores, metadata["version"], output_format, chunk_size, as_of_date
+        )
+
+    def write_batch_scores_sync(self, output_format, chunk_size, as_of_date=None):
+        pipeline, metadata, features = self.batch_score_inputs(as_of_date)
+        output_dir = os.getenv("BATCH_SCORE_DIR", "./scores")
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"churn-scores-{metadata['version']}-{uuid.uuid4().hex[:6]}.{output_format}")
+
+        # 다 쓴 뒤 이름을 바꿔 읽는 쪽이 쓰는 중인 파일을 보지 않게 한다
+        with open(f"{path}.tmp", "wb") as f:
+            for chunk in self.iter_batch_scores(pipeline, features, output_format, chunk_size):
+                f.write(chunk)
+        os.replace(f"{path}.tmp", path)
+        return {"model_version": metadata["version"], "path": path, "rows": len(features)}
+
+    def model_info(self):
+        _, metadata = self.__churnModelRepository.current()
+        return {
+            "current": metadata,
+            "versions": [
+                {key: version.get(key) for key in ("version", "trained_at", "data_version", "accuracy")}
+                for version in self.__churnModelRepository.list_versions()
+            ],
+        }
+
+    def activate(self, version):
+        # 경로 조작(.. 등)을 막기 위해 레지스트리에 있는 버전만 로드한다
+        if not self.__churnModelRepository.has_version(version):
+            raise FileNotFoundError(version)
+        return self.__churnModelRepository.load(version)
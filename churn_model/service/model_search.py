@@ -0,0 +1,258 @@
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dataset_store.sharded_aggregation import read_shared, share_arrays
+
+
+logger = logging.getLogger(__name__)
+
+# 추정기별 탐색 공간 (하이퍼파라미터 이름: 후보 값)
+SEARCH_SPACE = {
+    "logistic_regression": {
+        "C": [0.01, 0.1, 1.0, 10.0],
+        "class_weight": [None, "balanced"],
+    },
+    "random_forest": {
+        "n_estimators": [100, 300],
+        "max_depth": [None, 8],
+        "min_samples_leaf": [1, 5],
+        "class_weight": [None, "balanced"],
+    },
+    "hist_gradient_boosting": {
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [None, 4],
+        "class_weight": [None, "balanced"],
+    },
+}
+SCORINGS = ("f1", "roc_auc", "balanced_accuracy", "accuracy")
+# 단계(rung)마다 남기는 설정 비율의 역수 (successive halving)
+SEARCH_ETA = 3
+
+
+def build_pipeline(config: dict):
+    """
+    설정 {"estimator", "params", "pca_components"}의 파이프라인 (스케일링 → [PCA] → 추정기).
+    """
+    from sklearn.decomposition import PCA
+    from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    estimators = {
+        "logistic_regression": lambda params: LogisticRegression(random_state=42, max_iter=500, **params),
+        "random_forest": lambda params: RandomForestClassifier(random_state=42, n_jobs=1, **params),
+        "hist_gradient_boosting": lambda params: HistGradientBoostingClassifier(random_state=42, **params),
+    }
+    steps = [("scaler", StandardScaler())]
+    if config["pca_components"]:
+        steps.append(("pca", PCA(n_components=config["pca_components"], random_state=42)))
+    steps.append(("model", estimators[config["estimator"]](config["params"])))
+    return Pipeline(steps)
+
+
+def search_configurations(estimators: list, pca_components: list, search: str = "grid",
+                          n_iter: int = 24, seed: int = 42) -> list:
+    """
+    탐색할 설정 목록. grid는 전체 조합, random은 전체 조합에서 중복 없이 n_iter개를 뽑는다.
+    """
+    configurations = []
+    for estimator in estimators:
+        space = SEARCH_SPACE[estimator]
+        for values in itertools.product(*space.values()):
+            for components in pca_components:
+                configurations.append({
+                    "estimator": estimator,
+                    "params": dict(zip(space, values)),
+                    "pca_components": components,
+                })
+    if search == "random" and n_iter < len(configurations):
+        chosen = np.random.default_rng(seed).choice(len(configurations), size=n_iter, replace=False)
+        configurations = [configurations[index] for index in sorted(chosen)]
+    return configurations
+
+
+def fold_budgets(cv: int, eta: int = SEARCH_ETA) -> list:
+    """
+    단계별 누적 fold 수. 예: cv=5 → [1, 5], cv=10 → [1, 3, 10].
+    """
+    budgets = [cv]
+    while budgets[0] > 1:
+        budgets.insert(0, max(budgets[0] // eta, 1))
+    return budgets
+
+
+def _score_fold(config: dict, fold: int, scoring: str, X: np.ndarray, y: np.ndarray, folds: np.ndarray) -> float:
+    from sklearn.metrics import get_scorer
+
+    train, test = folds != fold, folds == fold
+    pipeline = build_pipeline(config)
+    pipeline.fit(X[train], y[train])
+    return float(get_scorer(scoring)(pipeline, X[test], y[test]))
+
+
+def _score_fold_shared(specs: dict, n_features: int, config: dict, fold: int, scoring: str) -> float:
+    """
+    프로세스 풀 워커: 공유 메모리의 특성 행렬을 복사 없이 읽어 fold 하나를 학습/평가한다.
+    """
+    blocks, arrays = read_shared(specs, copy=False)
+    try:
+        return _score_fold(config, fold, scoring, arrays["X"].reshape(-1, n_features), arrays["y"], arrays["fold"])
+    except Exception as e:
+        # 트레이스백의 프레임이 공유 메모리 뷰를 잡고 있으면 블록을 닫을 수 없으므로 메시지만 넘긴다
+        message = f"{type(e).__name__}: {e}"
+        e.__traceback__ = None
+        raise RuntimeError(message) from None
+    finally:
+        del arrays
+        for block in blocks.values():
+            block.close()
+
+
+def _mean(scores: list) -> float:
+    # 정렬용 평균: NaN/inf 점수(한 클래스만 있는 폴드의 roc_auc 등)가 섞이면 -inf로 가장 뒤에 둔다
+    mean = float(np.mean(scores)) if scores else float("nan")
+    return mean if math.isfinite(mean) else float("-inf")
+
+
+def _finite(value: float):
+    # JSON 응답에 넣을 수 없는 NaN/inf는 None
+    return round(float(value), 6) if math.isfinite(value) else None
+
+
+class ModelSearch:
+    """
+    하이퍼파라미터/추정기/PCA 성분 수 조합을 k-fold 교차 검증으로 평가하는 탐색기.
+    (설정, fold) 단위 학습을 spawn 프로세스 풀에 나눠 실행하고, 특성 행렬은 공유 메모리로 한 번만 넘긴다.
+    successive halving으로 적은 fold에서 점수가 낮은 설정은 나머지 fold를 학습하지 않고 중단한다.
+
+    SEARCH_WORKERS(기본: CPU 수) 환경 변수로 설정.
+    워커가 1개이거나 이미 풀 워커 안에서 호출되면 현재 프로세스에서 차례로 평가한다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__workers = max(int(os.getenv("SEARCH_WORKERS", os.cpu_count() or 1)), 1)
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__pool = None
+            cls.__instance.__fits = 0
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    def __get_pool(self):
+        with self.__lock:
+            if self.__pool is None:
+                self.__pool = ProcessPoolExecutor(
+                    max_workers=self.__workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self.__pool
+
+    def __evaluate(self, tasks: list, scoring: str, X: np.ndarray, y: np.ndarray, folds: np.ndarray) -> list:
+        with self.__lock:
+            self.__fits += len(tasks)
+        if self.__workers < 2 or multiprocessing.parent_process() is not None:
+            return [_score_fold(config, fold, scoring, X, y, folds) for config, fold in tasks]
+
+        blocks, specs = share_arrays({"X": X.ravel(), "y": y, "fold": folds})
+        try:
+            pool = self.__get_pool()
+            futures = [
+                pool.submit(_score_fold_shared, specs, X.shape[1], config, fold, scoring)
+                for config, fold in tasks
+            ]
+            return [future.result() for future in futures]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    def search(self, X, y, configurations: list, cv: int = 5, scoring: str = "f1",
+               early_stopping: bool = True, seed: int = 42) -> dict:
+        """
+        설정마다 교차 검증 평균 점수를 구해 높은 순으로 정렬한 순위표를 반환.
+        중단된 설정은 평가한 fold까지의 평균으로 끝까지 평가한 설정 뒤에 놓인다.
+        """
+        from sklearn.model_selection import StratifiedKFold
+
+        started = time.perf_counter()
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        y = np.ascontiguousarray(y, dtype=np.int64)
+        folds = np.empty(len(y), dtype=np.int64)
+        for fold, (_, test) in enumerate(StratifiedKFold(cv, shuffle=True, random_state=seed).split(X, y)):
+            folds[test] = fold
+
+        candidates = [{"config": config, "scores": [], "pruned_at_rung": None} for config in configurations]
+        alive = candidates
+        budgets = fold_budgets(cv) if early_stopping else [cv]
+        for rung, budget in enumerate(budgets):
+            tasks = [(candidate, fold) for candidate in alive for fold in range(len(candidate["scores"]), budget)]
+            scores = self.__evaluate([(candidate["config"], fold) for candidate, fold in tasks], scoring, X, y, folds)
+            for (candidate, _), score in zip(tasks, scores):
+                candidate["scores"].append(score)
+
+            alive.sort(key=lambda candidate: _mean(candidate["scores"]), reverse=True)
+            if rung < len(budgets) - 1:
+                keep = max(math.ceil(len(alive) / SEARCH_ETA), 1)
+                for candidate in alive[keep:]:
+                    candidate["pruned_at_rung"] = rung
+                alive = alive[:keep]
+            logger.info("model search rung", extra={
+                "rung": rung, "folds": budget, "fits": len(tasks), "remaining": len(alive),
+                "best_score": _finite(_mean(alive[0]["scores"])),
+            })
+
+        ranked = sorted(
+            candidates,
+            key=lambda candidate: (
+                math.isfinite(_mean(candidate["scores"])), candidate["pruned_at_rung"] is None, _mean(candidate["scores"]),
+            ),
+            reverse=True,
+        )
+        leaderboard = [
+            {
+                "rank": rank,
+                **candidate["config"],
+                "mean_score": _finite(np.mean(candidate["scores"])),
+                "std_score": _finite(np.std(candidate["scores"])),
+                "folds": len(candidate["scores"]),
+                "status": "complete" if candidate["pruned_at_rung"] is None else "pruned",
+                "pruned_at_rung": candidate["pruned_at_rung"],
+            }
+            for rank, candidate in enumerate(ranked, start=1)
+        ]
+        return {
+            "scoring": scoring,
+            "cv": cv,
+            "configurations": len(configurations),
+            "fits": sum(len(candidate["scores"]) for candidate in candidates),
+            "full_fits": len(configurations) * cv,
+            "pruned": sum(candidate["pruned_at_rung"] is not None for candidate in candidates),
+            "seconds": round(time.perf_counter() - started, 3),
+            "leaderboard": leaderboard,
+        }
+
+    def status(self) -> dict:
+        with self.__lock:
+            return {"workers": self.__workers, "fits": self.__fits, "started": self.__pool is not None}
+
+    def shutdown(self):
+        with self.__lock:
+            if self.__pool is not None:
+                self.__pool.shutdown(wait=True, cancel_futures=True)
+                self.__pool = None
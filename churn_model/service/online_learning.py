@@ -0,0 +1,253 @@
+import copy
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from churn_model.repository.churn_model_repository_impl import ChurnModelRepositoryImpl
+from customer_analysis.repository.customer_analysis_repository_impl import CustomerRepositoryImpl
+from dataset_store.dataset_store import DatasetSnapshot, DatasetStore
+
+
+logger = logging.getLogger(__name__)
+
+# 이만큼 증분 배치를 반영하면 처음부터 다시 학습
+ONLINE_FULL_RETRAIN_BATCHES = 24
+# 서빙(배치 학습) 모델보다 F1/정확도가 이만큼 낮아지면 드리프트로 보고 다시 학습
+ONLINE_DRIFT_TOLERANCE = 0.05
+# 전체 재학습 시 학습 분할을 반복하는 횟수
+ONLINE_EPOCHS = 5
+
+
+def _scores(y_true, y_pred) -> dict:
+    from sklearn.metrics import accuracy_score, f1_score
+    return {"accuracy": float(accuracy_score(y_true, y_pred)), "f1": float(f1_score(y_true, y_pred, zero_division=0))}
+
+
+class OnlineChurnLearner:
+    """
+    구매 행이 추가될 때마다 이탈 모델을 전체 재학습 없이 갱신하는 증분 학습기.
+    DatasetStore에 purchases.csv 뒤에 행만 추가된 스냅샷이 들어오면 (RFM 테이블은 새 행만 더해 갱신된다)
+    그 구매의 고객 특성 행만 SGD 로지스틱 회귀 파이프라인에 partial_fit으로 반영한다.
+
+    정확도 보호:
+    - 갱신마다 특성 행렬의 테스트 분할에서 서빙 중인 배치 학습 모델과 F1/정확도/예측 일치율을 비교하고,
+      ONLINE_DRIFT_TOLERANCE보다 뒤처지면 학습 분할 전체로 처음부터 다시 학습한다.
+    - ONLINE_FULL_RETRAIN_BATCHES개 배치마다, 그리고 데이터가 통째로 바뀌면(차원 변경, 재로드) 다시 학습한다.
+
+    갱신은 백그라운드 스레드에서 하고, 학습 중인 모델의 복사본을 갱신한 뒤 교체한다.
+    서빙 모델은 바꾸지 않으며 POST /churn-model/online/promote로 새 버전으로 등록해 서빙한다.
+    ONLINE_LEARNING=1이면 서버 시작 시 켜진다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__condition = threading.Condition()
+            cls.__instance.__pending = []
+            cls.__instance.__full_reason = None
+            cls.__instance.__stopping = False
+            cls.__instance.__thread = None
+            cls.__instance.__pipeline = None
+            cls.__instance.__generation = None
+            cls.__instance.__stats = {
+                "batches_applied": 0,
+                "rows_applied": 0,
+                "batches_since_full_retrain": 0,
+                "full_retrains": 0,
+                "last_full_retrain": None,
+                "last_update": None,
+                "last_drift_check": None,
+                "last_error": None,
+            }
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.getenv("ONLINE_LEARNING", "0") == "1"
+
+    @staticmethod
+    def __settings() -> dict:
+        return {
+            "full_retrain_batches": int(os.getenv("ONLINE_FULL_RETRAIN_BATCHES", ONLINE_FULL_RETRAIN_BATCHES)),
+            "drift_tolerance": float(os.getenv("ONLINE_DRIFT_TOLERANCE", ONLINE_DRIFT_TOLERANCE)),
+            "epochs": int(os.getenv("ONLINE_EPOCHS", ONLINE_EPOCHS)),
+        }
+
+    def start(self):
+        """
+        스냅샷 교체 알림을 등록하고 갱신 스레드를 시작한 뒤 첫 학습을 요청.
+        """
+        with self.__condition:
+            if self.__thread is not None:
+                return
+            DatasetStore.getInstance().add_listener(self.__on_snapshot)
+            self.__stopping = False
+            self.__thread = threading.Thread(target=self.__loop, name="online-churn", daemon=True)
+            self.__thread.start()
+        self.request_full_retrain("bootstrap")
+
+    def running(self) -> bool:
+        return self.__thread is not None
+
+    def request_full_retrain(self, reason: str = "manual"):
+        with self.__condition:
+            self.__full_reason = self.__full_reason or reason
+            self.__condition.notify()
+
+    def __on_snapshot(self, snapshot: DatasetSnapshot):
+        # DatasetStore 잠금 안에서 호출되므로 기록만 하고 갱신 스레드가 처리한다
+        with self.__condition:
+            self.__pending.append(snapshot)
+            self.__condition.notify()
+
+    def __loop(self):
+        while True:
+            with self.__condition:
+                while not self.__pending and self.__full_reason is None and not self.__stopping:
+                    self.__condition.wait()
+                if self.__stopping:
+                    return
+                snapshots, self.__pending = self.__pending, []
+                full_reason, self.__full_reason = self.__full_reason, None
+            try:
+                self.__process(snapshots, full_reason)
+                self.__stats["last_error"] = None
+            except Exception as e:
+                self.__stats["last_error"] = f"{type(e).__name__}: {e}"
+                logger.exception("online churn update failed")
+
+    def __process(self, snapshots: list, full_reason: Optional[str]):
+        appended = []
+        if full_reason is None:
+            if self.__pipeline is None:
+                full_reason = "bootstrap"
+            for snapshot in snapshots:
+                # 직전에 반영한 세대에 구매 행만 추가된 경우만 증분으로 반영할 수 있다
+                if snapshot.appended_purchases is None or snapshot.parent_generation != self.__generation:
+                    full_reason = full_reason or "reload"
+                    break
+                appended.append(snapshot.appended_purchases["CustomerID"].astype(str).to_numpy())
+                self.__generation = snapshot.generation
+
+        repository = CustomerRepositoryImpl()
+        if full_reason is not None:
+            self.__full_retrain(repository, full_reason)
+            return
+
+        started = time.perf_counter()
+        features = repository.customer_features()
+        rows = features.rows_of(np.unique(np.concatenate(appended)))
+        # 드리프트 확인에 쓰는 테스트 분할의 고객은 학습에 넣지 않는다
+        _, test = features.split_rows()
+        rows = np.setdiff1d(rows[rows >= 0], test)
+        pipeline = copy.deepcopy(self.__pipeline)
+        if len(rows):
+            pipeline = repository.train_model_incremental(features.frame().iloc[rows], features.labels[rows], pipeline)
+        self.__pipeline = pipeline
+
+        stats = self.__stats
+        stats["batches_applied"] += len(snapshots)
+        stats["rows_applied"] += int(len(rows))
+        stats["batches_since_full_retrain"] += len(snapshots)
+        stats["last_update"] = {
+            "at": pd.Timestamp.now().isoformat(),
+            "generation": self.__generation,
+            "purchases": int(sum(len(ids) for ids in appended)),
+            "customers": int(len(rows)),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        check = self.__check_drift(features, pipeline)
+        settings = self.__settings()
+        if check["drifted"]:
+            self.__full_retrain(repository, "drift")
+        elif stats["batches_since_full_retrain"] >= settings["full_retrain_batches"]:
+            self.__full_retrain(repository, "scheduled")
+
+    def __full_retrain(self, repository: CustomerRepositoryImpl, reason: str):
+        started = time.perf_counter()
+        generation = DatasetStore.getInstance().get_snapshot().generation
+        features = repository.customer_features()
+        train, _ = features.split_rows()
+        pipeline = repository.train_model_incremental(
+            features.frame().iloc[train], features.labels[train], None, epochs=self.__settings()["epochs"],
+        )
+        self.__pipeline = pipeline
+        self.__generation = generation
+        self.__stats.update(
+            batches_since_full_retrain=0,
+            full_retrains=self.__stats["full_retrains"] + 1,
+            last_full_retrain={
+                "at": pd.Timestamp.now().isoformat(),
+                "reason": reason,
+                "generation": generation,
+                "rows": int(len(train)),
+                "seconds": round(time.perf_counter() - started, 3),
+            },
+        )
+        logger.info("online churn model retrained", extra={"reason": reason, "rows": int(len(train))})
+        self.__check_drift(features, pipeline)
+
+    def __check_drift(self, features, pipeline) -> dict:
+        """
+        테스트 분할에서 증분 모델과 서빙 중인 배치 학습 모델을 비교.
+        """
+        _, X_test, _, y_test = features.split()
+        online_pred = pipeline.predict(X_test)
+        check = {
+            "at": pd.Timestamp.now().isoformat(),
+            "data_version": features.attrs["data_version"],
+            "rows": int(len(y_test)),
+            "online": _scores(y_test, online_pred),
+            "batch": None,
+            "agreement": None,
+            "drifted": False,
+        }
+        batch_pipeline, metadata = ChurnModelRepositoryImpl.getInstance().current()
+        if batch_pipeline is not None and metadata.get("feature_columns") == list(X_test.columns):
+            batch_pred = batch_pipeline.predict(X_test)
+            tolerance = self.__settings()["drift_tolerance"]
+            check["batch"] = {"version": metadata["version"], **_scores(y_test, batch_pred)}
+            check["agreement"] = float(np.mean(online_pred == batch_pred))
+            check["drifted"] = any(
+                check["online"][metric] < check["batch"][metric] - tolerance for metric in ("accuracy", "f1")
+            )
+        self.__stats["last_drift_check"] = check
+        if check["drifted"]:
+            logger.warning("online churn model drifted from batch model", extra={
+                "online": check["online"], "batch": check["batch"],
+            })
+        return check
+
+    def pipeline(self):
+        return self.__pipeline
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled(),
+            "running": self.running(),
+            "trained": self.__pipeline is not None,
+            "generation": self.__generation,
+            "pending_batches": len(self.__pending),
+            **self.__settings(),
+            **copy.deepcopy(self.__stats),
+        }
+
+    def shutdown(self):
+        with self.__condition:
+            self.__stopping = True
+            self.__condition.notify()
+            thread, self.__thread = self.__thread, None
+        if thread is not None:
+            thread.join()
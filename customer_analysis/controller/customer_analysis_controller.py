@@ -2,77 +2,207 @@ import os
 import sys
 import json
 
-from fastapi import APIRouter, Depends, status, BackgroundTasks
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+import asyncio
 
+from fastapi import APIRouter, Depends, status, BackgroundTasks, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+
+from customer_analysis.repository.pca_projection import PCA_COLUMNS
+from customer_analysis.repository.top_k import MAX_TOP_K
+from customer_analysis.repository.trends_cube import TrendsFilter
 from customer_analysis.service.customer_analysis_service_impl import CustomerServiceImpl
+from customer_analysis.visualization.chart_store import MODEL_CHARTS, ChartStore
+from dataset_store.result_cache import CachedResult
+from instrumentation.controller.readiness_controller import requireReady
+from task_executor.bounded_executor import BoundedExecutor
+from task_executor.controller.job_controller import job_response
+
+customerRouter = APIRouter(dependencies=[Depends(requireReady)])
 
-customerRouter = APIRouter()
+CHART_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
 
 async def injectCustomerService() -> CustomerServiceImpl:
     return CustomerServiceImpl()
 
 class PCARequest(BaseModel):
-    n_components: int
+    n_components: int = Field(2, ge=1, le=len(PCA_COLUMNS))
+    solver: Literal["auto", "full", "randomized", "incremental"] = "auto"
+
+class PCAPurchaseRow(BaseModel):
+    Quantity: float
+    Price_KRW: float
+    TotalAmount: float
+    Satisfaction: float
+    Age: float
+    Gender: Literal["M", "F"]
+
+class PCATransformRequest(PCARequest):
+    rows: List[PCAPurchaseRow] = Field(..., min_length=1)
+
+class TrendsRequest(BaseModel):
+    start_month: Optional[str] = Field(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$")
+    end_month: Optional[str] = Field(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$")
+    categories: List[str] = []
+    locations: List[str] = []
+    # 스트리밍 순위표 조회 (기간은 마지막 구매일 기준 최근 N일)
+    top_k: Optional[int] = Field(None, ge=1, le=MAX_TOP_K)
+    window_days: Optional[int] = Field(None, ge=1)
+
+    @model_validator(mode="after")
+    def check_leaderboard_filters(self):
+        if (self.top_k or self.window_days) and (self.start_month or self.end_month or self.categories or self.locations):
+            raise ValueError("top_k/window_days cannot be combined with month, category or location filters.")
+        return self
+
+
+def cached_response(request: Request, cached: CachedResult, media_type: str = "application/json") -> Response:
+    # 클라이언트가 가진 본문과 같으면(If-None-Match) 본문 없이 304
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or cached.etag in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type=media_type, headers=headers)
+
+
+async def training_response(request: Request, cached_result, submit, wait: bool) -> Response:
+    # 현재 데이터 버전의 결과가 캐시에 있으면 학습 작업 없이 바로 반환
+    cached = cached_result()
+    if cached is None:
+        job, deduplicated = submit()
+        response = await job_response(job, deduplicated, wait)
+        cached = cached_result() if response.status_code == 200 else None
+        if cached is None:
+            return response
+    return cached_response(request, cached)
     
 @customerRouter.post("/customer-analysis/churn")
 async def predict_churn(
-    background_tasks: BackgroundTasks,
+    request: Request,
+    wait: bool = False,
     customerService: CustomerServiceImpl = Depends(injectCustomerService)
 ):
     """
-    Perform standard Logistic Regression for churn prediction.
+    Standard Logistic Regression churn prediction.
+    If the current data version was already trained, the cached metrics are returned (with ETag / If-None-Match support).
+    Otherwise a training job is submitted and 202 is returned with the job to poll at /jobs/{job_id};
+    an identical job already in flight is reused. With wait=true the request blocks until the job finishes.
     """
-    churn_response = await customerService.predict_churn()
-
-    # Save metrics to JSON
-    os.makedirs('./graphs', exist_ok=True)
-    with open('./graphs/logistic_regression_metrics.json', 'w') as f:
-        json.dump(churn_response, f)
-
-    # Schedule visualization task
-    background_tasks.add_task(generate_visualizations)
-
-    return JSONResponse(content=churn_response)
+    return await training_response(request, customerService.cached_churn, customerService.submit_churn_job, wait)
 
 @customerRouter.post("/customer-analysis/trends")
-async def analyze_trends(customerService: CustomerServiceImpl = Depends(injectCustomerService)):
-    trend_response = await customerService.analyze_trends()
-    return trend_response
+async def analyze_trends(
+    request: Request,
+    trendsRequest: Optional[TrendsRequest] = None,
+    customerService: CustomerServiceImpl = Depends(injectCustomerService)
+):
+    """
+    Purchase trends answered from the precomputed trends cube.
+    Optional body filters by month range (YYYY-MM, inclusive), categories and customer locations,
+    or asks the streaming leaderboards for the top_k products/customers of the last window_days days.
+    Results are cached per data version and filter, and carry an ETag for If-None-Match.
+    """
+    trendsRequest = trendsRequest or TrendsRequest()
+    if trendsRequest.top_k or trendsRequest.window_days:
+        try:
+            cached = await customerService.top_trends(trendsRequest.top_k or 10, trendsRequest.window_days)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return cached_response(request, cached)
+
+    trends_filter = TrendsFilter(
+        start_month=trendsRequest.start_month,
+        end_month=trendsRequest.end_month,
+        categories=tuple(sorted(set(trendsRequest.categories))),
+        locations=tuple(sorted(set(trendsRequest.locations))),
+    )
+    trend_response = await customerService.analyze_trends(trends_filter)
+    return cached_response(request, trend_response)
 
 @customerRouter.post("/customer-analysis/pca")
 async def predict_churn_with_pca(
-    background_tasks: BackgroundTasks,
+    request: Request,
+    pcaRequest: Optional[PCARequest] = None,
+    wait: bool = False,
     customerService: CustomerServiceImpl = Depends(injectCustomerService)
 ):
     """
-    Perform PCA + Logistic Regression for churn prediction.
+    PCA + Logistic Regression churn prediction with n_components principal components of the purchase rows.
+    solver: full (exact), randomized (randomized SVD), incremental (IncrementalPCA over chunks),
+    or auto (chosen by the number of purchase rows). The fitted projection is stored per data version and reused.
+    Cached metrics for the current data version are returned directly; otherwise a training job is submitted
+    (202 with the job to poll at /jobs/{job_id}, or the metrics once it finishes with wait=true).
     """
-    pca_churn_response = await customerService.predict_churn_with_pca()
+    pcaRequest = pcaRequest or PCARequest()
+    return await training_response(
+        request,
+        lambda: customerService.cached_pca(pcaRequest.n_components, pcaRequest.solver),
+        lambda: customerService.submit_pca_job(pcaRequest.n_components, pcaRequest.solver),
+        wait,
+    )
 
-    # Save metrics to JSON
-    os.makedirs('./graphs', exist_ok=True)
-    with open('./graphs/pca_logistic_regression_metrics.json', 'w') as f:
-        json.dump(pca_churn_response, f)
+@customerRouter.post("/customer-analysis/pca/transform")
+async def transform_with_pca(
+    pcaRequest: PCATransformRequest,
+    customerService: CustomerServiceImpl = Depends(injectCustomerService)
+):
+    """
+    Project purchase rows onto the stored PCA projection of the current data version, without refitting.
+    """
+    rows = [row.model_dump() for row in pcaRequest.rows]
+    # 투영 로드와 transform은 이벤트 루프 밖의 스레드에서 수행
+    response = await BoundedExecutor.getInstance().run_local(
+        "pca", customerService.transform_pca, rows, pcaRequest.n_components, pcaRequest.solver,
+    )
+    if response is None:
+        raise HTTPException(status_code=404, detail="No PCA projection for these settings. POST /customer-analysis/pca first.")
+    return response
 
-    # Schedule visualization task
-    background_tasks.add_task(generate_visualizations)
+@customerRouter.get("/customer-analysis/charts")
+async def list_charts():
+    """
+    List the charts served by /customer-analysis/charts/{chart} and the in-memory chart store usage.
+    """
+    store = ChartStore.getInstance()
+    return {"charts": store.names(), "store": store.status()}
 
-    return JSONResponse(content=pca_churn_response)
+@customerRouter.get("/customer-analysis/charts/{chart}")
+async def get_chart(
+    request: Request,
+    chart: str,
+    format: Literal["png", "svg"] = "png",
+    width: Optional[int] = Query(None, ge=200, le=4000),
+    height: Optional[int] = Query(None, ge=200, le=4000),
+    top_n: int = Query(10, ge=1, le=50),
+    customerService: CustomerServiceImpl = Depends(injectCustomerService)
+):
+    """
+    Render a chart on demand and return the image bytes.
+    width/height are in pixels, top_n applies to the product charts.
+    Images are kept in memory per data/metrics version, so repeated requests are served without re-rendering;
+    concurrent requests for the same chart share one render. The ETag supports If-None-Match.
+    """
+    try:
+        image = await customerService.render_chart(chart, format, width, height, top_n)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown chart: {chart}")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return cached_response(request, image, media_type=CHART_MEDIA_TYPES[format])
 
 @customerRouter.get("/customer-analysis/visualize")
-async def visualize_results():
+async def visualize_results(customerService: CustomerServiceImpl = Depends(injectCustomerService)):
     """
-    Trigger visualization generation manually.
+    Render the model comparison charts for the latest metrics and return where to fetch them.
     """
-    try:
-        generate_visualizations()
-        return {"message": "Visualizations generated successfully."}
-    except Exception as e:
-        return {"error": str(e)}
-
-# Helper function for visualization
-def generate_visualizations():
-    from customer_analysis.visualization.visualization import visualize_results
-    visualize_results()
\ No newline at end of file
+    results = await asyncio.gather(
+        *(customerService.render_chart(chart) for chart in MODEL_CHARTS), return_exceptions=True,
+    )
+    charts = [f"/customer-analysis/charts/{chart}" for chart, result in zip(MODEL_CHARTS, results)
+              if not isinstance(result, Exception)]
+    if not charts:
+        return {"error": str(results[0])}
+    return {"message": "Visualizations generated successfully.", "charts": charts}
@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
 import pandas as pd
-from sklearn.base import BaseEstimator
+
+if TYPE_CHECKING:
+    from sklearn.base import BaseEstimator
 
 
 class CustomerRepository(ABC):
@@ -11,6 +14,13 @@ class CustomerRepository(ABC):
         """
         pass
 
+    @abstractmethod
+    def customer_features(self, as_of_date=None):
+        """
+        고객 단위 특성 행렬(float64)과 이탈 레이블. 데이터 버전마다 한 번 만들어 프로세스 간에 메모리 매핑으로 공유.
+        """
+        pass
+
     @abstractmethod
     def split_data(self, rfm: pd.DataFrame):
         """
@@ -19,29 +29,57 @@ class CustomerRepository(ABC):
         pass
 
     @abstractmethod
-    def train_model(self, X_train: pd.DataFrame, y_train: pd.Series) -> BaseEstimator:
+    def train_model(self, X_train: pd.DataFrame, y_train: pd.Series) -> "BaseEstimator":
         """
         학습 데이터를 기반으로 모델을 학습.
         """
         pass
 
     @abstractmethod
-    def evaluate_model(self, model: BaseEstimator, X_test: pd.DataFrame, y_test: pd.Series):
+    def train_model_incremental(self, X_batch: pd.DataFrame, y_batch, pipeline=None, epochs: int = 1):
+        """
+        새 배치로 SGD 로지스틱 회귀 파이프라인을 전체 재학습 없이 갱신.
+        """
+        pass
+
+    @abstractmethod
+    def evaluate_model(self, model: "BaseEstimator", X_test: pd.DataFrame, y_test: pd.Series):
         """
         테스트 데이터를 사용하여 모델 평가.
         """
         pass
 
     @abstractmethod
-    def analyze_trends(self) -> dict:
+    def analyze_trends(self, trends_filter) -> dict:
+        """
+        기간/카테고리/지역 조건에 맞는 구매 동향을 분석하고 결과를 반환.
+        """
+        pass
+
+    @abstractmethod
+    def top_trends(self, k: int, window_days: int = None) -> dict:
         """
-        구매 동향을 분석하고 결과를 반환.
+        스트리밍 순위표에서 기간 내 상위 K개 상품/고객을 반환.
         """
         pass
 
     @abstractmethod
-    def perform_pca_and_split(self, n_components: int):
+    def pca_projection(self, n_components: int, solver: str = "auto", fit: bool = True):
+        """
+        현재 데이터 버전의 구매 행 PCA 투영을 반환 (저장된 것이 없으면 학습).
+        """
+        pass
+
+    @abstractmethod
+    def perform_pca_and_split(self, n_components: int, solver: str = "auto"):
         """
         PCA 처리와 데이터를 학습 및 테스트 세트로 분리.
         """
+        pass
+
+    @abstractmethod
+    def transform_pca(self, rows: list, n_components: int, solver: str = "auto"):
+        """
+        저장된 PCA 투영으로 구매 행을 주성분으로 변환.
+        """
         pass
\ No newline at end of file
@@ -1,59 +1,56 @@
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, accuracy_score
 from customer_analysis.repository.customer_analysis_repository import CustomerRepository
-from sklearn.decomposition import PCA
-from sklearn.preprocessing import StandardScaler
+from customer_analysis.repository.feature_store import FEATURE_COLUMNS, FEATURE_DTYPE, GENDER_CODES, FeatureStore
+from customer_analysis.repository.pca_projection import PcaProjectionStore, rows_frame
+from customer_analysis.repository.rfm_table import MaterializedRfmTable
+from customer_analysis.repository.trends_cube import MaterializedTrendsCube, TrendsFilter
+from dataset_store.dataset_store import DatasetStore
+from dataset_store.fact_table import PurchaseFactTable
+from instrumentation.metrics import instrumented, record_rows
 
 
-import os
+import logging
 
 
+logger = logging.getLogger(__name__)
+
+
+# sklearn은 무거우므로(약 1초, 수십 MB) 학습/PCA 메서드가 처음 호출될 때 import한다.
+# 동향 조회만 하는 워커는 sklearn을 로드하지 않는다.
+
+# 증분 학습 partial_fit 한 번에 넣는 행 수
+INCREMENTAL_BATCH_ROWS = 1024
+
+
+@instrumented
 class CustomerRepositoryImpl(CustomerRepository):
     def __init__(self):
-        # CSV 파일 로드
-        self.products = pd.read_csv("./data/products.csv")
-        self.purchases = pd.read_csv("./data/purchases.csv")
-        self.customers = pd.read_csv("./data/customers.csv")
-
-    def prepare_data(self):
-        # 데이터 결합
-        purchases_products = self.purchases.merge(self.products, on="ProductID")
-        full_data = purchases_products.merge(self.customers, on="CustomerID")
-        full_data["purchaseDate"] = pd.to_datetime(full_data["purchaseDate"])
-
-        # RFM 데이터 생성 및 만족도 평균 추가
-        rfm = full_data.groupby("CustomerID").agg({
-            "purchaseDate": lambda x: (pd.Timestamp.now() - x.max()).days,  # Recency
-            "purchaseID": "count",  # Frequency
-            "TotalAmount": "sum",  # Monetary
-            "Satisfaction": "mean"  # 평균 만족도
-        }).rename(columns={
-            "purchaseDate": "Recency",
-            "purchaseID": "Frequency",
-            "TotalAmount": "Monetary"
-        })
-
-        customer_info = self.customers[["CustomerID", "Gender", "Age"]].set_index("CustomerID")
-        rfm = rfm.join(customer_info)
-        # 이탈 여부 생성
-        rfm["Churn"] = (rfm["Recency"] > 90).astype(int)
-
-        os.makedirs("./data", exist_ok=True)
-        rfm.to_csv("./data/rfm.csv", index = True)
-        print("csv file made")
-
-        return rfm
+        # 프로세스 전역 저장소의 스냅샷을 공유 (제자리 수정 금지)
+        snapshot = DatasetStore.getInstance().get_snapshot()
+        self.products = snapshot.products
+        self.purchases = snapshot.purchases
+        self.customers = snapshot.customers
+
+    def prepare_data(self, as_of_date=None):
+        # 증분 유지되는 RFM 집계 테이블에서 기준일(as_of_date 또는 RFM_AS_OF_DATE) 기준 RFM 생성
+        return MaterializedRfmTable.getInstance().to_frame(as_of_date)
+
+    def customer_features(self, as_of_date=None):
+        # 데이터 버전/기준일마다 한 번 만들어 메모리 매핑으로 공유하는 고객 단위 특성 행렬
+        return FeatureStore.getInstance().get(as_of_date)
 
     def split_data(self, rfm):
-        # 학습 및 테스트 데이터 분리
-        rfm["Gender"] = rfm["Gender"].map({"M":0, "F": 1})
-        X = rfm[["Recency", "Frequency", "Monetary", "Satisfaction", "Age", "Gender"]]
+        # 학습 및 테스트 데이터 분리 (입력 DataFrame은 수정하지 않는다)
+        X = rfm[FEATURE_COLUMNS].assign(Gender=rfm["Gender"].map(GENDER_CODES))
         y = rfm["Churn"]
+        from sklearn.model_selection import train_test_split
         return train_test_split(X, y, test_size=0.3, random_state=42)
 
     def train_model(self, X_train, y_train):
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import StandardScaler
+
         # Logistic Regression 모델 학습
         scaler = StandardScaler()
         X_train = scaler.fit_transform(X_train)
@@ -63,7 +60,42 @@ class CustomerRepositoryImpl(CustomerRepository):
         model.fit(X_train, y_train)
         return model
 
+    def train_model_incremental(self, X_batch, y_batch, pipeline=None, epochs: int = 1):
+        """
+        SGD 로지스틱 회귀 파이프라인을 partial_fit으로 갱신 (전체 재학습 없음).
+        스케일러도 partial_fit으로 평균/분산을 누적하므로 지금까지 본 모든 행의 통계로 표준화한다.
+        pipeline이 None이면 새로 만들고, class_weight='balanced'와 같은 식으로 이 데이터의 클래스 가중치를 고정한다.
+        X_batch는 FEATURE_COLUMNS 열의 DataFrame.
+        """
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        y_batch = np.asarray(y_batch)
+        if pipeline is None:
+            counts = np.bincount(y_batch, minlength=2)
+            class_weight = {label: len(y_batch) / (2 * count) if count else 1.0 for label, count in enumerate(counts)}
+            pipeline = Pipeline([
+                ("scaler", StandardScaler()),
+                ("model", SGDClassifier(loss="log_loss", class_weight=class_weight, random_state=42)),
+            ])
+        scaler = pipeline.named_steps["scaler"]
+        model = pipeline.named_steps["model"]
+        scaler.partial_fit(X_batch)
+
+        # 미니배치 단위로 섞어 가며 학습 (전체 재학습 시에는 epochs번 반복)
+        rng = np.random.default_rng(42)
+        for _ in range(epochs):
+            order = rng.permutation(len(y_batch))
+            for start in range(0, len(order), INCREMENTAL_BATCH_ROWS):
+                rows = order[start:start + INCREMENTAL_BATCH_ROWS]
+                model.partial_fit(scaler.transform(X_batch.iloc[rows]), y_batch[rows], classes=[0, 1])
+        return pipeline
+
     def evaluate_model(self, model, X_test, y_test):
+        from sklearn.metrics import accuracy_score, classification_report
+        from sklearn.preprocessing import StandardScaler
+
         # 데이터 스케일링
         scaler = StandardScaler()
         X_test = scaler.fit_transform(X_test)
@@ -74,118 +106,59 @@ class CustomerRepositoryImpl(CustomerRepository):
         report = classification_report(y_test, y_pred, output_dict=True)
         return accuracy, report
 
-    def analyze_trends(self):
-        # 구매 데이터 분석
-        purchases_products = self.purchases.merge(self.products, on="ProductID")
-        full_data = purchases_products.merge(self.customers, on="CustomerID")
-        
-        # 카테고리별 총 구매량
-        category_sales = purchases_products.groupby("Category")["Quantity"].sum().to_dict()
-
-        # 제품별 총 구매량과 평균 만족도
-        product_stats = purchases_products.groupby("ProductName").agg({
-            "Quantity": "sum",
-            "Satisfaction": "mean"
-        })
-
-        # 만족도 평균 기준 상위 10개
-        top_products_by_satisfaction = product_stats.sort_values(
-            by="Satisfaction", ascending=False
-        ).head(10)
-
-        top_products_satisfaction = {
-            product: f"{int(row['Quantity'])} [{row['Satisfaction']:.2f}]"
-            for product, row in top_products_by_satisfaction.iterrows()
-        }
-
-        # 총 주문 수량 기준 상위 10개
-        top_products_by_quantity = product_stats.sort_values(
-            by="Quantity", ascending=False
-        ).head(10)
-
-        top_products_quantity = {
-            product: f"{int(row['Quantity'])} [{row['Satisfaction']:.2f}]"
-            for product, row in top_products_by_quantity.iterrows()
-        }
-
-        # 고객별 총 구매량 및 금액
-        top_customer = full_data.groupby("CustomerID").agg({
-            "Quantity": "sum",
-            "TotalAmount": "sum"
-        }).sort_values(by="Quantity", ascending=False).head(1).reset_index()
-
-        # 고객 정보 병합
-        top_customer_info = top_customer.merge(self.customers, on="CustomerID").iloc[0]
-
-        # 상위 고객 정보 포맷팅
-        most_frequent_customer = {
-            "CustomerID": str(top_customer_info["CustomerID"]),
-            "Name": top_customer_info["Name"],
-            "Total Purchases": int(top_customer_info["Quantity"]),
-            "Total Spent": float(top_customer_info["TotalAmount"]),
-            "SignupDate": str(top_customer_info["SignupDate"]),
-            "Location": top_customer_info["Location"]
-        }
-
-        return {
-            "category_sales": category_sales,
-            "top_products_by_satisfaction": top_products_satisfaction,
-            "top_products_by_quantity": top_products_quantity,
-            "most_frequent_customer": most_frequent_customer
-        }
-
-    def perform_pca_and_split(self, n_components: int):
+    def analyze_trends(self, trends_filter: TrendsFilter = TrendsFilter()):
+        # 증분 유지되는 월 × 상품 × 지역 집계 큐브에서 조건에 맞는 셀만 합산
+        return MaterializedTrendsCube.getInstance().query(trends_filter)
+
+    def top_trends(self, k: int, window_days: int = None):
+        # 구매 행이 들어올 때 갱신되는 순위표에서 앞의 K개만 잘라 반환
+        return MaterializedTrendsCube.getInstance().top(k, window_days)
+
+    def pca_projection(self, n_components: int, solver: str = "auto", fit: bool = True):
+        # 데이터 버전마다 한 번 학습해 저장한 구매 행 PCA 투영 (없고 fit=False이면 None)
+        return PcaProjectionStore.getInstance().get(n_components, solver, fit)
+
+    def perform_pca_and_split(self, n_components: int, solver: str = "auto"):
         """
         PCA 처리 및 학습/테스트 데이터 분리.
+        투영은 데이터 버전마다 한 번만 학습하고, 구매 행은 청크 단위로 transform한다.
         """
-        purchases_products = self.purchases.merge(self.products, on="ProductID")
-        
-        #print(f"purchase_products :" ,purchases_products)
-
-        full_data = purchases_products.merge(self.customers, on="CustomerID")
-        
-        #print(f"full_data :" ,full_data.columns)
-
-        if "Price_KRW" not in full_data.columns:
-            # 중복된 열이 있을 경우 하나를 선택 (Price_KRW_x 또는 Price_KRW_y)
-            if "Price_KRW_x" in full_data.columns:
-                full_data.rename(columns={"Price_KRW_x": "Price_KRW"}, inplace=True)
-            elif "Price_KRW_y" in full_data.columns:
-                full_data.rename(columns={"Price_KRW_y": "Price_KRW"}, inplace=True)
-            else:
-                raise KeyError("Price_KRW 열을 찾을 수 없습니다.")
-            
-
-        full_data["Gender"] = full_data["Gender"].map({"M" : 0, "F": 1})
-        numerical_data = full_data[["Quantity", "Price_KRW", "TotalAmount", "Satisfaction", "Age", "Gender"]]
-
-        pca = PCA(n_components=n_components)
-        principal_components = pca.fit_transform(numerical_data)
+        from sklearn.model_selection import train_test_split
+
+        projection = self.pca_projection(n_components, solver)
+        principal_components, customer_codes = projection.transform_purchases()
+        record_rows(len(customer_codes))
         reduced_data = pd.DataFrame(
             principal_components, 
             columns=[f"PC{i+1}" for i in range(n_components)]
         )
 
-        reduced_data["CustomerID"] = full_data["CustomerID"]
-
-        # RFM 데이터 생성
-        rfm = self.prepare_data()
-
-        # CustomerID를 인덱스에서 열로 리셋
-        rfm = rfm.reset_index()
-
-        # PCA 결과와 RFM 데이터를 CustomerID로 병합
-        merged_data = reduced_data.merge(rfm[["CustomerID", "Churn"]], on="CustomerID")
-        X = merged_data.drop(["CustomerID", "Churn"], axis=1)
-        y = merged_data["Churn"]
+        # 고객 단위 이탈 레이블을 고객 코드 순서로 맞춰 구매 행에 펼친다
+        customers, _ = PurchaseFactTable.current_dimensions()
+        features = self.customer_features()
+        churn = features.labels[features.rows_of(customers["CustomerID"])]
+        X = reduced_data
+        y = pd.Series(churn[customer_codes].astype(int), name="Churn")
 
         # 데이터 분리
         return train_test_split(X, y, test_size=0.3, random_state=42)
+
+    def transform_pca(self, rows: list, n_components: int, solver: str = "auto"):
+        """
+        저장된 PCA 투영으로 구매 행(PCA_COLUMNS)을 주성분으로 변환 (학습하지 않음). 투영이 없으면 None.
+        """
+        projection = self.pca_projection(n_components, solver, fit=False)
+        if projection is None:
+            return None
+        return projection, projection.transform(rows_frame(rows))
  
     def train_model_with_pca(self, X_train, y_train):
         """
         PCA 데이터를 사용한 모델 학습.
         """
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import StandardScaler
+
         scaler = StandardScaler()
         X_train = scaler.fit_transform(X_train)
 
@@ -195,6 +168,9 @@ class CustomerRepositoryImpl(CustomerRepository):
         return model
 
     def evaluate_model_with_pca(self, model, X_test, y_test):
+        from sklearn.metrics import accuracy_score, classification_report
+        from sklearn.preprocessing import StandardScaler
+
         # 데이터 스케일링
         scaler = StandardScaler()
         X_test = scaler.fit_transform(X_test)
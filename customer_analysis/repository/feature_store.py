@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from customer_analysis.repository.rfm_table import MaterializedRfmTable
+from dataset_store.dataset_store import DatasetSnapshot, DatasetStore
+
+
+# 이탈 예측에 사용하는 고객 단위 특성과 성별 인코딩
+FEATURE_COLUMNS = ["Recency", "Frequency", "Monetary", "Satisfaction", "Age", "Gender"]
+GENDER_CODES = {"M": 0, "F": 1}
+# Monetary(원 단위 합계)가 2^24를 넘어도 정확하도록 float64로 저장
+FEATURE_DTYPE = "float64"
+# 프로세스마다 열어 두는 특성 행렬 수 (기준일별)
+FEATURE_STORE_CACHE_SIZE = 4
+
+
+def as_of_date_setting(as_of_date=None) -> str:
+    """
+    특성 행렬을 구분하는 기준일 설정. 'now'(기본)는 오늘 날짜로 고정해 하루 동안 같은 행렬을 쓴다.
+    """
+    value = as_of_date if as_of_date is not None else os.getenv("RFM_AS_OF_DATE")
+    if value is None or value == "now":
+        return pd.Timestamp.now().normalize().isoformat()
+    return value
+
+
+@dataclass(frozen=True, eq=False)
+class FeatureMatrix:
+    """
+    고객 단위 특성 행렬(float64, 행 = customer_ids 순서, 열 = FEATURE_COLUMNS)과 이탈 레이블(int8).
+    배열은 읽기 전용 메모리 매핑이므로 같은 파일을 연 프로세스들이 페이지 캐시를 공유한다 (수정 금지).
+    """
+    key: str
+    customer_ids: np.ndarray
+    features: np.ndarray
+    labels: np.ndarray
+    attrs: dict
+
+    def __len__(self) -> int:
+        return len(self.customer_ids)
+
+    def frame(self) -> pd.DataFrame:
+        # 2차원 float64 배열 하나를 블록으로 감싸므로 복사하지 않는다
+        return pd.DataFrame(self.features, columns=FEATURE_COLUMNS,
+                            index=pd.Index(self.customer_ids, name="CustomerID"), copy=False)
+
+    def rows_of(self, customer_ids) -> np.ndarray:
+        """
+        고객 ID별 행 위치 (특성 행렬에 없는 고객은 -1).
+        """
+        return pd.Index(self.customer_ids).get_indexer(np.asarray(customer_ids).astype(str))
+
+    def split_rows(self, test_size: float = 0.3, random_state: int = 42):
+        """
+        split과 같은 학습/테스트 분할의 행 위치 (train, test).
+        """
+        from sklearn.model_selection import train_test_split
+
+        return train_test_split(np.arange(len(self)), test_size=test_size, random_state=random_state)
+
+    def split(self, test_size: float = 0.3, random_state: int = 42):
+        """
+        (X_train, X_test, y_train, y_test). 행 순서와 random_state가 같으면 RFM DataFrame을 나눈 것과 같은 분할이다.
+        """
+        train, test = self.split_rows(test_size, random_state)
+        X = self.frame()
+        y = pd.Series(self.labels, index=X.index, name="Churn")
+        return X.iloc[train], X.iloc[test], y.iloc[train], y.iloc[test]
+
+
+def build_features(rfm: pd.DataFrame) -> dict:
+    """
+    RFM DataFrame을 특성 행렬 배열들로 변환 (입력은 수정하지 않는다).
+    """
+    features = rfm[FEATURE_COLUMNS].assign(Gender=rfm["Gender"].map(GENDER_CODES))
+    return {
+        "customer_ids": rfm.index.to_numpy().astype(str),
+        "features": np.ascontiguousarray(features.to_numpy(dtype=FEATURE_DTYPE)),
+        "labels": rfm["Churn"].to_numpy(dtype=np.int8),
+    }
+
+
+class FeatureStore:
+    """
+    데이터 버전과 기준일마다 고객 단위 특성 행렬을 한 번만 만들어 FEATURE_STORE_DIR/<데이터 버전>-<키>/에
+    features.npy, labels.npy, customer_ids.npy, meta.json으로 저장하고 메모리 매핑으로 연다.
+    이미 저장된 행렬은 다른 프로세스(풀 워커, 다른 서버 워커)가 다시 만들지 않고 그대로 매핑한다.
+    임시 디렉터리에 쓴 뒤 이름을 바꾸므로 반쯤 쓴 행렬은 보이지 않는다.
+    데이터가 다시 로드되면 열어 둔 행렬을 닫고, 이 프로세스가 이전 세대에서 쓴 데이터 버전의 디렉터리만 지운다
+    (아직 모르는 버전은 다른 프로세스가 새로 만든 것일 수 있으므로 남긴다). 다른 프로세스가 지운 행렬은 다시 만든다.
+    생성과 매핑은 락 밖에서 하고(같은 키를 만드는 중이면 그 결과를 기다린다) 락은 결과를 넣을 때만 잡는다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__matrices = OrderedDict()
+            cls.__instance.__building = {}
+            # 이 프로세스가 본 데이터 버전 -> 세대
+            cls.__instance.__generations = {}
+            cls.__instance.__listening = False
+            cls.__instance.__built = 0
+            cls.__instance.__mapped = 0
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def store_dir() -> str:
+        return os.getenv("FEATURE_STORE_DIR", "./cache/features")
+
+    @staticmethod
+    def key(data_version: str, as_of: str) -> str:
+        payload = json.dumps({"as_of_date": as_of, "columns": FEATURE_COLUMNS, "dtype": FEATURE_DTYPE}, sort_keys=True)
+        return f"{data_version}-{hashlib.sha1(payload.encode()).hexdigest()[:12]}"
+
+    def get(self, as_of_date=None) -> FeatureMatrix:
+        """
+        현재 데이터 버전의 특성 행렬. 메모리 → 디스크 → RFM 테이블에서 생성 순으로 찾는다.
+        """
+        store = DatasetStore.getInstance()
+        with self.__lock:
+            if not self.__listening:
+                store.add_listener(self.invalidate)
+                self.__listening = True
+        snapshot = store.get_snapshot()
+        as_of = as_of_date_setting(as_of_date)
+        key = self.key(snapshot.version, as_of)
+
+        with self.__lock:
+            self.__generations.setdefault(snapshot.version, snapshot.generation)
+            matrix = self.__matrices.get(key)
+            if matrix is not None:
+                self.__matrices.move_to_end(key)
+                return matrix
+            future = self.__building.get(key)
+            owner = future is None
+            if owner:
+                future = self.__building[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            path = os.path.join(self.store_dir(), key)
+            matrix, built = None, False
+            if os.path.isdir(path):
+                try:
+                    matrix = self.__open(key, path)
+                except FileNotFoundError:
+                    # 다른 프로세스가 새 세대로 넘어가며 지운 경우 다시 만든다
+                    matrix = None
+            if matrix is None:
+                self.__build(path, snapshot, as_of)
+                built = True
+                matrix = self.__open(key, path)
+        except BaseException as e:
+            with self.__lock:
+                self.__building.pop(key, None)
+            future.set_exception(e)
+            raise
+        # 만드는 사이 데이터가 다시 로드되었으면 이전 버전 행렬은 열어 두지 않는다
+        current = store.get_snapshot().version == snapshot.version
+        with self.__lock:
+            self.__built += built
+            self.__mapped += 1
+            if current:
+                self.__matrices[key] = matrix
+                while len(self.__matrices) > FEATURE_STORE_CACHE_SIZE:
+                    self.__matrices.popitem(last=False)
+            self.__building.pop(key, None)
+        future.set_result(matrix)
+        return matrix
+
+    def __build(self, path: str, snapshot: DatasetSnapshot, as_of: str):
+        rfm = MaterializedRfmTable.getInstance().to_frame(as_of)
+        arrays = build_features(rfm)
+        os.makedirs(self.store_dir(), exist_ok=True)
+        temp_dir = os.path.join(self.store_dir(), f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+        os.makedirs(temp_dir)
+        for name, values in arrays.items():
+            np.save(os.path.join(temp_dir, f"{name}.npy"), values)
+        with open(os.path.join(temp_dir, "meta.json"), "w") as f:
+            json.dump({
+                "data_version": snapshot.version,
+                "generation": snapshot.generation,
+                "as_of_date": rfm.attrs.get("as_of_date"),
+                "feature_columns": FEATURE_COLUMNS,
+                "rows": int(len(rfm)),
+                "built_at": pd.Timestamp.now().isoformat(),
+            }, f)
+        try:
+            os.replace(temp_dir, path)
+        except OSError:
+            # 다른 프로세스가 같은 행렬을 먼저 저장한 경우 그것을 쓴다
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    @staticmethod
+    def __open(key: str, path: str) -> FeatureMatrix:
+        with open(os.path.join(path, "meta.json")) as f:
+            attrs = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in ("features", "labels", "customer_ids")
+        }
+        return FeatureMatrix(key=key, attrs=attrs, **arrays)
+
+    def invalidate(self, snapshot: DatasetSnapshot):
+        with self.__lock:
+            for key in [key for key in self.__matrices if not key.startswith(f"{snapshot.version}-")]:
+                del self.__matrices[key]
+            self.__generations.setdefault(snapshot.version, snapshot.generation)
+            # 현재 세대보다 앞선 세대에서 쓴 버전만 지운다
+            stale = {
+                version for version, generation in self.__generations.items()
+                if generation < snapshot.generation and version != snapshot.version
+            }
+            for version in stale:
+                del self.__generations[version]
+        if not stale or not os.path.isdir(self.store_dir()):
+            return
+        for name in os.listdir(self.store_dir()):
+            if not name.startswith(".") and name.rsplit("-", 1)[0] in stale:
+                shutil.rmtree(os.path.join(self.store_dir(), name), ignore_errors=True)
+
+    def status(self) -> dict:
+        with self.__lock:
+            return {
+                "matrices": [
+                    {"key": key, "rows": len(matrix), "bytes": int(matrix.features.nbytes + matrix.labels.nbytes)}
+                    for key, matrix in self.__matrices.items()
+                ],
+                "building": len(self.__building),
+                "built": self.__built,
+                "mapped": self.__mapped,
+            }
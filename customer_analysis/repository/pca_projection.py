@@ -0,0 +1,298 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from customer_analysis.repository.feature_store import GENDER_CODES
+from dataset_store.dataset_store import DatasetSnapshot, DatasetStore
+from dataset_store.fact_table import PurchaseFactTable
+
+
+logger = logging.getLogger(__name__)
+
+# PCA에 사용하는 구매 행 단위 특성
+PCA_COLUMNS = ["Quantity", "Price_KRW", "TotalAmount", "Satisfaction", "Age", "Gender"]
+PCA_SOLVERS = ("auto", "full", "randomized", "incremental")
+# auto: 구매 행이 이보다 많으면 randomized SVD, 더 많으면 청크 단위 IncrementalPCA
+PCA_RANDOMIZED_ROWS = 200_000
+PCA_INCREMENTAL_ROWS = 2_000_000
+# IncrementalPCA partial_fit과 transform에 넣는 행 수
+PCA_CHUNK_ROWS = 100_000
+
+
+def resolve_solver(solver: str, rows: int) -> str:
+    if solver not in PCA_SOLVERS:
+        raise ValueError(f"Unknown PCA solver: {solver}")
+    if solver != "auto":
+        return solver
+    if rows >= int(os.getenv("PCA_INCREMENTAL_ROWS", PCA_INCREMENTAL_ROWS)):
+        return "incremental"
+    if rows >= int(os.getenv("PCA_RANDOMIZED_ROWS", PCA_RANDOMIZED_ROWS)):
+        return "randomized"
+    return "full"
+
+
+def purchase_matrix(facts: PurchaseFactTable, start: int = 0, stop: int = None) -> np.ndarray:
+    """
+    start~stop 구매 행의 PCA 특성 행렬 (float64, 열 = PCA_COLUMNS). 상품 가격과 고객 속성은 코드로 배열 조회한다.
+    """
+    rows = slice(start, stop)
+    customer_codes = facts.customer_codes[rows]
+    gender_codes = facts.customers["Gender"].astype(str).map(GENDER_CODES).to_numpy(dtype=np.float64)
+    return np.column_stack([
+        facts.quantity[rows],
+        facts.products["Price (KRW)"].to_numpy()[facts.product_codes[rows]],
+        facts.total_amount[rows],
+        facts.satisfaction[rows],
+        facts.customers["Age"].to_numpy()[customer_codes],
+        gender_codes[customer_codes],
+    ]).astype(np.float64, copy=False)
+
+
+def rows_frame(rows: list) -> np.ndarray:
+    """
+    요청 본문의 구매 행(dict, PCA_COLUMNS 키, Gender는 M/F) 목록을 특성 행렬로 변환.
+    """
+    frame = pd.DataFrame(rows, columns=PCA_COLUMNS)
+    frame["Gender"] = frame["Gender"].map(GENDER_CODES)
+    return frame.to_numpy(dtype=np.float64)
+
+
+def fact_chunks(chunk_rows: int):
+    """
+    현재 데이터 버전의 구매 사실 행을 (사실 테이블, 시작, 끝) 청크로 차례로 반환.
+    stream 형식은 purchases.csv를 청크 단위로 읽고, 그 외에는 메모리의 사실 테이블을 chunk_rows 행씩 나눈다.
+    """
+    store = DatasetStore.getInstance()
+    if store.data_format() == "stream":
+        customers, products = PurchaseFactTable.current_dimensions()
+        for facts in PurchaseFactTable.chunks(store.get_snapshot(), customers, products):
+            for start in range(0, len(facts), chunk_rows):
+                yield facts, start, min(start + chunk_rows, len(facts))
+        return
+    facts = PurchaseFactTable.current()
+    for start in range(0, len(facts), chunk_rows):
+        yield facts, start, min(start + chunk_rows, len(facts))
+
+
+@dataclass(frozen=True, eq=False)
+class PcaProjection:
+    """
+    데이터 버전마다 한 번 학습해 저장한 PCA 투영. 이후 호출은 transform만 한다.
+    """
+    key: str
+    estimator: object
+    attrs: dict
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        chunk_rows = int(os.getenv("PCA_CHUNK_ROWS", PCA_CHUNK_ROWS))
+        if len(X) <= chunk_rows:
+            return self.estimator.transform(X)
+        return np.concatenate([self.estimator.transform(X[start:start + chunk_rows])
+                               for start in range(0, len(X), chunk_rows)])
+
+    def transform_purchases(self):
+        """
+        현재 데이터 버전의 모든 구매 행을 청크 단위로 투영해 (주성분 행렬, 고객 코드) 반환.
+        특성 행렬 전체를 한 번에 만들지 않으므로 메모리는 주성분 행렬과 청크 크기에 비례한다.
+        """
+        components, customer_codes = [], []
+        for facts, start, stop in fact_chunks(int(os.getenv("PCA_CHUNK_ROWS", PCA_CHUNK_ROWS))):
+            components.append(self.estimator.transform(purchase_matrix(facts, start, stop)))
+            customer_codes.append(facts.customer_codes[start:stop])
+        if not components:
+            return np.empty((0, self.attrs["n_components"])), np.empty(0, dtype=np.int32)
+        return np.concatenate(components), np.concatenate(customer_codes)
+
+
+class PcaProjectionStore:
+    """
+    구매 행 PCA 투영을 데이터 버전, 성분 수, solver마다 한 번만 학습해
+    PCA_PROJECTION_DIR(기본 ./cache/pca)/<데이터 버전>-<키>.joblib으로 저장한다.
+    이탈 레이블 기준일이 달라지거나 결과 캐시가 비워져도, 다른 프로세스(풀 워커)에서도 저장된 투영으로 transform만 한다.
+
+    solver
+    - full: 전체 특성 행렬로 PCA (기존 동작)
+    - randomized: 전체 특성 행렬로 randomized SVD
+    - incremental: 청크마다 IncrementalPCA.partial_fit (특성 행렬 전체를 만들지 않는다)
+    - auto: 구매 행 수(PCA_RANDOMIZED_ROWS, PCA_INCREMENTAL_ROWS)로 위에서 선택
+    데이터가 다시 로드되면 다른 데이터 버전의 투영을 지운다.
+    학습과 디스크 로드는 락 밖에서 하고(같은 키를 학습 중이면 그 결과를 기다린다) 락은 결과를 넣을 때만 잡는다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__projections = {}
+            cls.__instance.__fitting = {}
+            cls.__instance.__listening = False
+            cls.__instance.__fitted = 0
+            cls.__instance.__loaded = 0
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def store_dir() -> str:
+        return os.getenv("PCA_PROJECTION_DIR", "./cache/pca")
+
+    @staticmethod
+    def key(data_version: str, n_components: int, solver: str) -> str:
+        payload = json.dumps({"n_components": n_components, "solver": solver, "columns": PCA_COLUMNS}, sort_keys=True)
+        return f"{data_version}-{hashlib.sha1(payload.encode()).hexdigest()[:12]}"
+
+    def get(self, n_components: int, solver: str = "auto", fit: bool = True):
+        """
+        현재 데이터 버전의 PCA 투영. 메모리 → 디스크 → 학습 순으로 찾고, fit=False이면 학습하지 않고 None.
+        """
+        import joblib
+
+        store = DatasetStore.getInstance()
+        with self.__lock:
+            if not self.__listening:
+                store.add_listener(self.invalidate)
+                self.__listening = True
+        snapshot = store.get_snapshot()
+        # auto는 데이터 크기로 정해지므로 실제 solver로 키를 만든다
+        solver = resolve_solver(solver, self.__purchase_rows(snapshot))
+        key = self.key(snapshot.version, n_components, solver)
+        path = os.path.join(self.store_dir(), f"{key}.joblib")
+
+        with self.__lock:
+            projection = self.__projections.get(key)
+            if projection is not None:
+                return projection
+            future = self.__fitting.get(key)
+            owner = future is None and (fit or os.path.exists(path))
+            if owner:
+                future = self.__fitting[key] = Future()
+        if future is None:
+            return None
+        if not owner:
+            return future.result()
+
+        try:
+            loaded = os.path.exists(path)
+            if loaded:
+                saved = joblib.load(path)
+            else:
+                saved = self.__fit(n_components, solver, snapshot)
+                self.__save(path, saved)
+            projection = PcaProjection(key=key, **saved)
+        except BaseException as e:
+            with self.__lock:
+                self.__fitting.pop(key, None)
+            future.set_exception(e)
+            raise
+        # 학습하는 사이 데이터가 다시 로드되었으면 이전 버전 투영은 메모리에 남기지 않는다
+        current = store.get_snapshot().version == snapshot.version
+        with self.__lock:
+            if loaded:
+                self.__loaded += 1
+            else:
+                self.__fitted += 1
+            if current:
+                self.__projections[key] = projection
+            self.__fitting.pop(key, None)
+        future.set_result(projection)
+        return projection
+
+    @staticmethod
+    def __purchase_rows(snapshot: DatasetSnapshot) -> int:
+        if snapshot.purchases_rows is not None:
+            return snapshot.purchases_rows
+        return len(snapshot.purchases)
+
+    @staticmethod
+    def __fit(n_components: int, solver: str, snapshot: DatasetSnapshot) -> dict:
+        from sklearn.decomposition import PCA, IncrementalPCA
+
+        started = time.perf_counter()
+        chunk_rows = int(os.getenv("PCA_CHUNK_ROWS", PCA_CHUNK_ROWS))
+        if solver == "incremental":
+            estimator = IncrementalPCA(n_components=n_components)
+            # 배치를 하나 늦게 학습해, 짧은 청크(세그먼트 끝 등)는 앞뒤 배치에 붙인다
+            # (partial_fit은 배치마다 n_components 행 이상이 필요하다)
+            rows, batch = 0, None
+            for facts, start, stop in fact_chunks(chunk_rows):
+                X = purchase_matrix(facts, start, stop)
+                if batch is None:
+                    batch = X
+                elif len(batch) < n_components or len(X) < n_components:
+                    batch = np.concatenate([batch, X])
+                else:
+                    estimator.partial_fit(batch)
+                    rows += len(batch)
+                    batch = X
+            if batch is not None and len(batch) >= n_components:
+                estimator.partial_fit(batch)
+                rows += len(batch)
+            if rows == 0:
+                raise ValueError(f"Not enough purchases for {n_components} PCA components.")
+        else:
+            facts = PurchaseFactTable.current()
+            X = purchase_matrix(facts)
+            rows = len(X)
+            if solver == "randomized":
+                estimator = PCA(n_components=n_components, svd_solver="randomized", random_state=42)
+            else:
+                estimator = PCA(n_components=n_components)
+            estimator.fit(X)
+
+        attrs = {
+            "data_version": snapshot.version,
+            "n_components": n_components,
+            "solver": solver,
+            "columns": PCA_COLUMNS,
+            "rows": int(rows),
+            "explained_variance_ratio": [float(ratio) for ratio in estimator.explained_variance_ratio_],
+            "fit_seconds": round(time.perf_counter() - started, 3),
+            "fitted_at": pd.Timestamp.now().isoformat(),
+        }
+        logger.info("pca projection fitted", extra={key: attrs[key] for key in ("solver", "rows", "fit_seconds")})
+        return {"estimator": estimator, "attrs": attrs}
+
+    def __save(self, path: str, saved: dict):
+        import joblib
+
+        # 임시 파일에 쓴 뒤 이름을 바꿔 다른 프로세스가 반쯤 쓴 파일을 읽지 않게 한다
+        os.makedirs(self.store_dir(), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        joblib.dump(saved, temp_path)
+        os.replace(temp_path, path)
+
+    def invalidate(self, snapshot: DatasetSnapshot):
+        with self.__lock:
+            for key in [key for key in self.__projections if not key.startswith(f"{snapshot.version}-")]:
+                del self.__projections[key]
+        if not os.path.isdir(self.store_dir()):
+            return
+        for name in os.listdir(self.store_dir()):
+            if name.endswith(".joblib") and not name.startswith(f"{snapshot.version}-"):
+                try:
+                    os.remove(os.path.join(self.store_dir(), name))
+                except OSError:
+                    pass
+
+    def status(self) -> dict:
+        with self.__lock:
+            return {
+                "projections": [projection.attrs | {"key": key} for key, projection in self.__projections.items()],
+                "fitting": len(self.__fitting),
+                "fitted": self.__fitted,
+                "loaded": self.__loaded,
+            }
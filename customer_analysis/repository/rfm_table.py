@@ -0,0 +1,141 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dataset_store.dataset_store import DatasetStore
+from dataset_store.fact_table import PurchaseFactTable, synchronize
+from dataset_store.sharded_aggregation import ShardedAggregator
+
+
+def resolve_as_of_date(as_of_date=None, latest_purchase=None) -> pd.Timestamp:
+    """
+    Recency 기준일 결정.
+    인자 > RFM_AS_OF_DATE 환경 변수 순으로 사용하고, 'latest'는 마지막 구매일, 미지정 시 현재 시각.
+    """
+    value = as_of_date if as_of_date is not None else os.getenv("RFM_AS_OF_DATE")
+    if value is None or value == "now":
+        return pd.Timestamp.now()
+    if value == "latest":
+        return latest_purchase if latest_purchase is not None else pd.Timestamp.now()
+    return pd.Timestamp(value)
+
+
+def as_of_date_key() -> str:
+    """
+    결과 캐시 키에 넣을 기준일 설정. 'now'(기본)는 날짜가 바뀌면 Recency가 달라지므로 오늘 날짜로 구분한다.
+    """
+    value = os.getenv("RFM_AS_OF_DATE")
+    if value is None or value == "now":
+        return pd.Timestamp.now().normalize().isoformat()
+    return value
+
+
+class RfmTable:
+    """
+    고객 코드별 RFM 부분 집계(최근 구매일, 구매 횟수, 구매 금액 합, 만족도 합)를 배열로 유지하는 테이블.
+    새 사실 행은 apply_purchases로 기존 집계에 더해지므로 전체 이력을 다시 계산하지 않는다.
+    """
+
+    def __init__(self, customers: pd.DataFrame):
+        size = len(customers)
+        self.customers = customers
+        self.__last_purchase = np.full(size, np.datetime64("NaT"), dtype="datetime64[ns]")
+        self.__frequency = np.zeros(size, dtype=np.int64)
+        self.__monetary = np.zeros(size, dtype=np.float64)
+        self.__satisfaction_sum = np.zeros(size, dtype=np.float64)
+        self.__integer_amounts = True
+        # 기존 groupby("CustomerID")와 같은 CustomerID 정렬 순서로 내보낸다
+        self.__order = np.argsort(customers["CustomerID"].to_numpy().astype(str), kind="stable")
+        self.__rows = 0
+
+    @property
+    def rows(self) -> int:
+        return self.__rows
+
+    def apply_purchases(self, facts: PurchaseFactTable):
+        """
+        새 사실 행의 고객별 합계를 기존 집계에 더한다.
+        """
+        # 고객 코드별 부분 집계 (행이 많으면 고객 코드 해시로 샤드를 나눠 프로세스 풀에서 계산)
+        grouped = ShardedAggregator.getInstance().aggregate(
+            facts.customer_codes,
+            sums={"monetary": facts.total_amount, "satisfaction": facts.satisfaction},
+            maxes={"last_purchase": facts.purchase_date.astype("datetime64[ns]").view(np.int64)},
+            size=len(self.customers),
+        )
+        codes = grouped.keys
+        self.__frequency[codes] += grouped.counts
+        self.__monetary[codes] += grouped.sums["monetary"]
+        self.__satisfaction_sum[codes] += grouped.sums["satisfaction"]
+        # NaT는 int64 최솟값이므로 정수로 보고 최댓값을 취하면 최근 구매일이 된다
+        last_purchase = self.__last_purchase.view(np.int64)
+        last_purchase[codes] = np.maximum(last_purchase[codes], grouped.maxes["last_purchase"])
+        self.__integer_amounts &= facts.total_amount.dtype.kind in "iu"
+        self.__rows += len(facts)
+
+    def latest_purchase(self):
+        if self.__rows == 0:
+            return None
+        # 구매가 없는 고객(NaT)은 제외
+        return pd.Timestamp(self.__last_purchase[self.__frequency > 0].max())
+
+    def to_frame(self, as_of_date=None) -> pd.DataFrame:
+        """
+        기준일에 대한 RFM 데이터(Recency, Frequency, Monetary, Satisfaction, Gender, Age, Churn) 생성.
+        매번 새 DataFrame을 반환하므로 호출자가 수정해도 된다.
+        """
+        as_of = resolve_as_of_date(as_of_date, self.latest_purchase())
+        present = self.__order[self.__frequency[self.__order] > 0]
+
+        frequency = self.__frequency[present]
+        monetary = self.__monetary[present]
+        rfm = pd.DataFrame({
+            "Recency": (as_of.to_datetime64() - self.__last_purchase[present]) // np.timedelta64(1, "D"),
+            "Frequency": frequency,
+            "Monetary": monetary.astype(np.int64) if self.__integer_amounts else monetary,
+            "Satisfaction": self.__satisfaction_sum[present] / frequency,
+            "Gender": self.customers["Gender"].to_numpy()[present],
+            "Age": self.customers["Age"].to_numpy()[present],
+        }, index=pd.Index(self.customers["CustomerID"].to_numpy()[present], name="CustomerID"))
+        # 이탈 여부 생성
+        rfm["Churn"] = (rfm["Recency"] > 90).astype(int)
+        rfm.attrs["as_of_date"] = as_of.isoformat()
+        return rfm
+
+
+class MaterializedRfmTable:
+    """
+    현재 구매 사실 테이블에 대한 RfmTable을 프로세스 전역으로 유지.
+    사실 테이블에 행만 이어 붙은 경우 새 행만 반영하고, 차원이 바뀌면 다시 만든다.
+    stream 형식에서는 purchases.csv를 청크 단위로 읽어 고객별 부분 집계를 합친다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__table = None
+            cls.__instance.__generation = None
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    def to_frame(self, as_of_date=None) -> pd.DataFrame:
+        snapshot = DatasetStore.getInstance().get_snapshot()
+        with self.__lock:
+            self.__generation, (table,) = synchronize(
+                self.__generation, (self.__table, lambda customers, products: RfmTable(customers)),
+            )
+            self.__table = table
+
+            rfm = table.to_frame(as_of_date)
+            rfm.attrs["generation"] = snapshot.generation
+            rfm.attrs["data_version"] = snapshot.version
+            return rfm
@@ -0,0 +1,385 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset_store.fact_table import PurchaseFactTable
+
+
+# 요청할 수 있는 최대 K
+MAX_TOP_K = 1000
+# approximate 모드의 고객 요약은 오래된 일별 요약을 묶어 둔다: (최신 일이 이 일수보다 오래되면, 이 일수 단위로)
+# 365일 창에서 Count-Min 스케치 수가 365개에서 약 50개로 줄고, 창 경계는 묶음 단위(최대 31일)로 근사된다
+COARSE_BUCKET_TIERS = ((32, 8), (128, 32))
+
+
+def _aggregate(keys: np.ndarray, weights: np.ndarray):
+    # 같은 키의 가중치를 합쳐 키 오름차순 배열로 반환
+    unique, inverse = np.unique(np.asarray(keys, dtype=np.int64), return_inverse=True)
+    return unique, np.bincount(inverse, weights=weights, minlength=len(unique))
+
+
+def _ranked(keys: np.ndarray, values: np.ndarray, k: int) -> np.ndarray:
+    # 값 내림차순, 같으면 키(코드) 오름차순으로 앞의 k개 위치
+    # 전체를 정렬하지 않고 k번째 값 이상인 후보(k개 + 동점)만 골라 정렬한다
+    if 0 < k < len(values):
+        threshold = np.partition(values, len(values) - k)[len(values) - k]
+        candidates = np.flatnonzero(values >= threshold)
+        return candidates[np.lexsort((keys[candidates], -values[candidates]))[:k]]
+    return np.lexsort((keys, -values))[:k]
+
+
+class ExactCounter:
+    """
+    키별 정확한 합계를 키 오름차순의 희소 배열로 유지.
+    """
+
+    def __init__(self):
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.values = np.zeros(0)
+
+    def update(self, keys: np.ndarray, weights: np.ndarray):
+        self.keys, self.values = _aggregate(
+            np.concatenate([self.keys, np.asarray(keys, dtype=np.int64)]),
+            np.concatenate([self.values, weights]),
+        )
+
+    def merge(self, *others: "ExactCounter"):
+        self.update(
+            np.concatenate([other.keys for other in others]),
+            np.concatenate([other.values for other in others]),
+        )
+
+    def items(self) -> list:
+        return list(zip(self.keys.tolist(), self.values.tolist()))
+
+    def top(self, k: int) -> list:
+        ranked = _ranked(self.keys, self.values, k)
+        return list(zip(self.keys[ranked].tolist(), self.values[ranked].tolist()))
+
+    def estimate(self, key: int) -> float:
+        position = np.searchsorted(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return float(self.values[position])
+        return 0.0
+
+
+class SpaceSaving:
+    """
+    Space-Saving 요약. 최대 capacity개 키의 (추정치, 과대 추정 오차)만 유지하므로
+    키 수와 관계없이 메모리가 일정하고, 추정치 - 오차가 다른 키의 추정치보다 큰 키는 실제 상위 키임이 보장된다.
+    새 배치는 정확히 합친 뒤 병합 가능한 요약(mergeable summary) 방식으로 합쳐 키마다 루프를 돌지 않는다.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0)
+        self.errors = np.zeros(0)
+
+    def minimum(self) -> float:
+        # 추적하지 않는 키가 가질 수 있는 최대 합계
+        return float(self.counts.min()) if len(self.keys) >= self.capacity else 0.0
+
+    def __combine(self, keys: np.ndarray, counts: np.ndarray, errors: np.ndarray, minimum: float):
+        union = np.union1d(self.keys, keys)
+        own_minimum = self.minimum()
+        combined_counts = np.full(len(union), own_minimum + minimum)
+        combined_errors = np.full(len(union), own_minimum + minimum)
+
+        own = np.searchsorted(union, self.keys)
+        theirs = np.searchsorted(union, keys)
+        # 한쪽에만 있는 키는 다른 쪽의 최소 카운터 값만큼 있었을 수 있으므로 추정치와 오차에 더한다
+        combined_counts[own] += self.counts - own_minimum
+        combined_errors[own] += self.errors - own_minimum
+        combined_counts[theirs] += counts - minimum
+        combined_errors[theirs] += errors - minimum
+
+        kept = np.sort(_ranked(union, combined_counts, self.capacity))
+        self.keys, self.counts, self.errors = union[kept], combined_counts[kept], combined_errors[kept]
+
+    def update(self, keys: np.ndarray, weights: np.ndarray):
+        keys, weights = _aggregate(keys, weights)
+        self.__combine(keys, weights, np.zeros(len(keys)), 0.0)
+
+    def merge(self, *others: "SpaceSaving"):
+        for other in others:
+            self.__combine(other.keys, other.counts, other.errors, other.minimum())
+
+    def top(self, k: int) -> list:
+        ranked = _ranked(self.keys, self.counts, k)
+        return list(zip(self.keys[ranked].tolist(), self.counts[ranked].tolist()))
+
+    def estimate(self, key: int) -> float:
+        position = np.searchsorted(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return float(self.counts[position])
+        return self.minimum()
+
+
+class CountMinSketch:
+    """
+    Count-Min 스케치. 임의 키의 합계를 depth × width 배열로 과대 추정한다 (top은 지원하지 않음).
+    같은 seed로 만든 스케치끼리만 merge할 수 있다.
+    """
+    PRIME = 2_147_483_647
+
+    def __init__(self, width: int = 4096, depth: int = 4, seed: int = 42):
+        rng = np.random.default_rng(seed)
+        self.width = width
+        self.table = np.zeros((depth, width))
+        self.__a = rng.integers(1, self.PRIME, depth, dtype=np.int64)
+        self.__b = rng.integers(0, self.PRIME, depth, dtype=np.int64)
+
+    def __columns(self, keys: np.ndarray) -> np.ndarray:
+        keys = np.asarray(keys, dtype=np.int64) % self.PRIME
+        return (self.__a[:, None] * keys[None, :] + self.__b[:, None]) % self.PRIME % self.width
+
+    def update(self, keys: np.ndarray, weights: np.ndarray):
+        for row, columns in enumerate(self.__columns(keys)):
+            self.table[row] += np.bincount(columns, weights=weights, minlength=self.width)
+
+    def merge(self, *others: "CountMinSketch"):
+        for other in others:
+            self.table += other.table
+
+    def estimate(self, key: int) -> float:
+        columns = self.__columns(np.array([key]))[:, 0]
+        return float(self.table[np.arange(len(columns)), columns].min())
+
+
+def group_by_day(days: np.ndarray, oldest_day: int) -> list:
+    """
+    oldest_day 이후 행을 (일, 행 위치 배열) 목록으로 묶는다. 여러 요약이 한 번 만든 묶음을 같이 쓴다.
+    """
+    recent = np.flatnonzero(days >= oldest_day)
+    order = recent[np.argsort(days[recent], kind="stable")]
+    bucket_days, starts = np.unique(days[order], return_index=True)
+    return list(zip(bucket_days.tolist(), np.split(order, starts[1:])))
+
+
+class WindowedSummary:
+    """
+    전체 기간 요약과 일별 요약을 함께 유지해, 최근 N일 요약을 일별 요약의 병합으로 만든다.
+    max_window_days보다 오래된 일별 요약은 버린다.
+    tiers(COARSE_BUCKET_TIERS 형식)를 주면 오래된 일별 요약을 정렬된 여러 날 묶음으로 합쳐 요약 수를 줄이고,
+    창에는 시작일이 창 안에 있는 묶음만 넣는다 (창 경계가 묶음 단위로 근사된다).
+    """
+
+    def __init__(self, factory, max_window_days: int, tiers: tuple = ()):
+        self.__factory = factory
+        self.__max_window_days = max_window_days
+        self.__tiers = tiers
+        self.total = factory()
+        # 묶음 시작일 -> 요약, 묶음 시작일 -> 일수
+        self.buckets = {}
+        self.spans = {}
+
+    def __span(self, age: int) -> int:
+        span = 1
+        for older_than, tier_span in self.__tiers:
+            if age >= older_than:
+                span = tier_span
+        return span
+
+    def __bucket(self, day: int):
+        # 이 날을 포함하는 묶음 (늦게 들어온 오래된 구매는 이미 합쳐진 묶음에 더한다)
+        for span in {1, *(tier_span for _, tier_span in self.__tiers)}:
+            start = day - day % span
+            if start in self.buckets and start + self.spans[start] > day:
+                return self.buckets[start]
+        self.spans[day] = 1
+        bucket = self.buckets[day] = self.__factory()
+        return bucket
+
+    def __coarsen(self, latest_day: int):
+        # 시작일 오름차순으로 보면 더 큰 묶음의 시작 요약이 먼저 자리를 잡고 나머지가 그 안으로 합쳐진다
+        for start in sorted(self.buckets):
+            span = self.__span(latest_day - (start + self.spans[start] - 1))
+            if span <= self.spans[start]:
+                continue
+            target = start - start % span
+            bucket = self.buckets.pop(start)
+            del self.spans[start]
+            if target in self.buckets:
+                self.buckets[target].merge(bucket)
+                self.spans[target] = max(self.spans[target], span)
+            else:
+                self.buckets[target] = bucket
+                self.spans[target] = span
+
+    def update(self, keys: np.ndarray, weights: np.ndarray, day_groups: list, oldest_day: int):
+        self.total.update(keys, weights)
+        if not self.__max_window_days:
+            return
+
+        for day, rows in day_groups:
+            self.__bucket(day).update(keys[rows], weights[rows])
+        for start in [start for start in self.buckets if start + self.spans[start] <= oldest_day]:
+            del self.buckets[start]
+            del self.spans[start]
+        if self.__tiers:
+            self.__coarsen(oldest_day + self.__max_window_days - 1)
+
+    def window(self, window_days: int, latest_day: int):
+        if not window_days:
+            return self.total
+        merged = self.__factory()
+        buckets = [bucket for start, bucket in self.buckets.items() if start > latest_day - window_days]
+        if buckets:
+            merged.merge(*buckets)
+        return merged
+
+
+class PurchaseLeaderboards:
+    """
+    구매 사실 행이 들어올 때마다 갱신되는 카테고리/상품/고객 순위표.
+    상품/카테고리는 차원이 작아 항상 정확히 세고, 고객은 mode에 따라
+    exact(정확한 합계) 또는 approximate(Space-Saving 순위 + Count-Min 금액 추정)로 센다.
+    approximate 모드의 고객 기간 요약은 오래된 날을 COARSE_BUCKET_TIERS 단위로 묶어 메모리를 제한한다.
+    기간(window_days)은 데이터의 마지막 구매일 기준 최근 N일이며, 창별 순위는 갱신 후 첫 조회 때 한 번 정렬해 두고
+    이후에는 앞의 K개만 잘라 응답한다.
+    """
+
+    def __init__(self, customers: pd.DataFrame, products: pd.DataFrame,
+                 mode: str = "exact", capacity: int = MAX_TOP_K, max_window_days: int = 365):
+        if mode not in ("exact", "approximate"):
+            raise ValueError(f"지원하지 않는 순위 모드입니다: {mode}")
+        self.customers = customers
+        self.products = products
+        self.mode = mode
+        self.capacity = capacity
+        self.max_window_days = max_window_days
+        self.category_codes, self.category_names = pd.factorize(products["Category"].astype(str), sort=True)
+
+        def summary(factory, tiers=()):
+            return WindowedSummary(factory, max_window_days, tiers)
+
+        self.__category_quantity = summary(ExactCounter)
+        self.__product_quantity = summary(ExactCounter)
+        self.__product_satisfaction = summary(ExactCounter)
+        self.__product_count = summary(ExactCounter)
+        if mode == "exact":
+            self.__customer_quantity = summary(ExactCounter)
+            self.__customer_amount = summary(ExactCounter)
+        else:
+            self.__customer_quantity = summary(lambda: SpaceSaving(capacity), COARSE_BUCKET_TIERS)
+            self.__customer_amount = summary(CountMinSketch, COARSE_BUCKET_TIERS)
+        self.latest_day = None
+        self.__rows = 0
+        self.__boards = {}
+
+    @property
+    def rows(self) -> int:
+        return self.__rows
+
+    def apply_purchases(self, facts: PurchaseFactTable):
+        if len(facts) == 0:
+            return
+        days = facts.purchase_date.astype("datetime64[D]").astype(np.int64)
+        latest_day = int(days.max()) if self.latest_day is None else max(self.latest_day, int(days.max()))
+        quantity = facts.quantity.astype(np.float64)
+        oldest_day = latest_day - self.max_window_days + 1
+        groups = group_by_day(days, oldest_day) if self.max_window_days else []
+
+        def update(summary, keys, weights):
+            summary.update(keys, weights, groups, oldest_day)
+
+        update(self.__category_quantity, self.category_codes[facts.product_codes], quantity)
+        update(self.__product_quantity, facts.product_codes, quantity)
+        update(self.__product_satisfaction, facts.product_codes, facts.satisfaction.astype(np.float64))
+        update(self.__product_count, facts.product_codes, np.ones(len(facts)))
+        update(self.__customer_quantity, facts.customer_codes, quantity)
+        update(self.__customer_amount, facts.customer_codes, facts.total_amount.astype(np.float64))
+
+        self.latest_day = latest_day
+        self.__rows += len(facts)
+        self.__boards = {}
+
+    def __board(self, window_days) -> dict:
+        board = self.__boards.get(window_days)
+        if board is not None:
+            return board
+
+        latest_day = self.latest_day or 0
+        product_count = self.__product_count.window(window_days, latest_day)
+        product_satisfaction = self.__product_satisfaction.window(window_days, latest_day)
+        satisfaction = [
+            (code, product_satisfaction.estimate(code) / count)
+            for code, count in product_count.items() if count > 0
+        ]
+        product_quantity = self.__product_quantity.window(window_days, latest_day)
+        customer_quantity = self.__customer_quantity.window(window_days, latest_day)
+        customer_amount = self.__customer_amount.window(window_days, latest_day)
+
+        board = self.__boards[window_days] = {
+            "categories": self.__category_quantity.window(window_days, latest_day).items(),
+            "products_by_quantity": product_quantity.top(len(self.products)),
+            "products_by_satisfaction": sorted(satisfaction, key=lambda item: (-item[1], item[0])),
+            "product_quantity": product_quantity,
+            "customers": [
+                (code, quantity, customer_amount.estimate(code))
+                for code, quantity in customer_quantity.top(self.capacity)
+            ],
+        }
+        return board
+
+    def top(self, k: int = 10, window_days: int = None) -> dict:
+        """
+        기간 내 카테고리별 판매량, 상위 K개 상품(수량/만족도)과 상위 K명 고객.
+        """
+        if window_days and window_days > self.max_window_days:
+            raise ValueError(f"window_days는 {self.max_window_days}일 이하여야 합니다.")
+        board = self.__board(window_days)
+        product_names = self.products["ProductName"].to_numpy()
+        product_quantity = board["product_quantity"]
+
+        def product_rows(ranked) -> dict:
+            return {
+                product_names[code]: f"{int(product_quantity.estimate(code))} [{satisfaction:.2f}]"
+                for code, satisfaction in ranked[:k]
+            }
+
+        satisfaction = dict(board["products_by_satisfaction"])
+        customer_ids = self.customers["CustomerID"].to_numpy()
+        top_customers = board["customers"][:k]
+
+        return {
+            "category_sales": {self.category_names[code]: int(total) for code, total in board["categories"]},
+            "top_products_by_satisfaction": product_rows(board["products_by_satisfaction"]),
+            "top_products_by_quantity": product_rows([
+                (code, satisfaction.get(code, 0.0)) for code, _ in board["products_by_quantity"]
+            ]),
+            "top_customers_by_quantity": {
+                str(customer_ids[code]): int(quantity) for code, quantity, _ in top_customers
+            },
+            "most_frequent_customer": self.__customer_info(*top_customers[0]) if top_customers else None,
+            "leaderboard": {
+                "mode": self.mode,
+                "k": k,
+                "window_days": window_days,
+                "latest_date": str(np.datetime64(self.latest_day, "D")) if self.latest_day is not None else None,
+            },
+        }
+
+    def __customer_info(self, code: int, quantity: float, amount: float) -> dict:
+        customer = self.customers.iloc[code]
+        return {
+            "CustomerID": str(customer["CustomerID"]),
+            "Name": customer["Name"],
+            "Total Purchases": int(quantity),
+            "Total Spent": float(amount),
+            "SignupDate": str(customer["SignupDate"]),
+            "Location": customer["Location"]
+        }
+
+
+def leaderboard_options() -> dict:
+    """
+    TOP_K_MODE(exact|approximate), TOP_K_CAPACITY, TOP_K_MAX_WINDOW_DAYS 환경 변수.
+    """
+    return {
+        "mode": os.getenv("TOP_K_MODE", "exact"),
+        "capacity": int(os.getenv("TOP_K_CAPACITY", MAX_TOP_K)),
+        "max_window_days": int(os.getenv("TOP_K_MAX_WINDOW_DAYS", 365)),
+    }
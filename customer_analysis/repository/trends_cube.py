@@ -0,0 +1,343 @@
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from dataset_store.dataset_store import DatasetStore
+from dataset_store.fact_table import PurchaseFactTable, synchronize
+from dataset_store.sharded_aggregation import ShardedAggregator
+from customer_analysis.repository.top_k import PurchaseLeaderboards, leaderboard_options
+
+
+# 필터별 조회 결과를 보관할 최대 개수
+RESULT_CACHE_SIZE = 128
+
+
+@dataclass(frozen=True)
+class TrendsFilter:
+    """
+    구매 동향 조회 조건. 기간은 큐브의 집계 단위인 월("YYYY-MM", 양 끝 포함)로 지정한다.
+    """
+    start_month: Optional[str] = None
+    end_month: Optional[str] = None
+    categories: tuple = ()
+    locations: tuple = ()
+
+
+def month_index(values) -> np.ndarray:
+    # 1970-01 기준 월 번호
+    return np.asarray(values, dtype="datetime64[M]").astype(np.int64)
+
+
+def merge_cells(keys: np.ndarray, new_keys: np.ndarray, values: dict, new_values: dict):
+    """
+    기존 셀(keys, values)과 새 부분 합(new_keys, new_values)을 키별로 합쳐 (정렬된 셀 키, 합친 값) 반환.
+    """
+    cells, inverse = np.unique(np.concatenate([keys, new_keys]), return_inverse=True)
+    inverse = inverse.ravel()
+    return cells, {
+        name: np.bincount(inverse, weights=np.concatenate([values[name], new_values[name]]), minlength=len(cells))
+        for name in values
+    }
+
+
+class TrendsCube:
+    """
+    월 × 상품 × 지역 셀별 구매량/금액/만족도 합과 구매 수를 유지하는 집계 큐브.
+    셀 수는 고객 수와 무관하므로 조회는 셀 마스크와 bincount만으로 끝난다.
+    최다 구매 고객은 별도의 고객 단위 집계로 구한다.
+    - 기간/카테고리 조건이 없으면 고객별 누적 합(고객 수 길이 배열)에 지역 마스크만 적용
+    - 있으면 월 × 카테고리 × 고객 셀에서 조건에 맞는 셀만 고객별로 합산
+    새 사실 행은 셀 단위 부분 합으로 만든 뒤 기존 셀과 합치므로 전체 이력을 다시 읽지 않는다.
+    """
+
+    def __init__(self, customers: pd.DataFrame, products: pd.DataFrame):
+        self.customers = customers
+        self.products = products
+        self.__locations, customer_location = np.unique(customers["Location"].astype(str).to_numpy(), return_inverse=True)
+        self.__customer_location = customer_location.ravel()
+        self.__categories, product_category = np.unique(products["Category"].astype(str).to_numpy(), return_inverse=True)
+        self.__product_category = product_category.ravel()
+
+        # 월 × 상품 × 지역 셀
+        self.__month = np.zeros(0, dtype=np.int64)
+        self.__product = np.zeros(0, dtype=np.int64)
+        self.__location = np.zeros(0, dtype=np.int64)
+        self.__cells = {name: np.zeros(0) for name in ("quantity", "total_amount", "satisfaction", "count")}
+        # 월 × 카테고리 × 고객 셀 (최다 구매 고객용)
+        self.__rollup_month = np.zeros(0, dtype=np.int64)
+        self.__rollup_category = np.zeros(0, dtype=np.int64)
+        self.__rollup_customer = np.zeros(0, dtype=np.int64)
+        self.__rollup = {name: np.zeros(0) for name in ("quantity", "total_amount", "count")}
+        # 고객별 전체 기간 합
+        self.__customer_totals = {name: np.zeros(len(customers)) for name in ("quantity", "total_amount", "count")}
+        # 기존 groupby("CustomerID")와 같은 정렬 순서에서 상위 고객을 고른다
+        self.__customer_rank = np.argsort(np.argsort(
+            customers["CustomerID"].to_numpy().astype(str), kind="stable"
+        ))
+        self.__rows = 0
+
+    @property
+    def rows(self) -> int:
+        return self.__rows
+
+    @property
+    def cells(self) -> int:
+        return len(self.__month)
+
+    def apply_purchases(self, facts: PurchaseFactTable):
+        """
+        새 사실 행을 셀 단위로 집계해 기존 셀, 고객 단위 집계와 합친다.
+        """
+        product_count = len(self.products)
+        location_count = len(self.__locations)
+        customer_count = len(self.customers)
+        category_count = len(self.__categories)
+        months = month_index(facts.purchase_date)
+        aggregator = ShardedAggregator.getInstance()
+        columns = {"quantity": facts.quantity, "total_amount": facts.total_amount}
+
+        # 새 행의 셀별 부분 합 (행이 많으면 샤드를 나눠 프로세스 풀에서 계산)
+        grouped = aggregator.aggregate(
+            (months * product_count + facts.product_codes) * location_count
+            + self.__customer_location[facts.customer_codes],
+            sums={**columns, "satisfaction": facts.satisfaction},
+        )
+        cells, self.__cells = merge_cells(
+            (self.__month * product_count + self.__product) * location_count + self.__location, grouped.keys,
+            self.__cells, {**grouped.sums, "count": grouped.counts},
+        )
+        self.__location = cells % location_count
+        self.__product = cells // location_count % product_count
+        self.__month = cells // location_count // product_count
+
+        grouped = aggregator.aggregate(
+            (months * category_count + self.__product_category[facts.product_codes]) * customer_count
+            + facts.customer_codes,
+            sums=columns,
+            partition=facts.customer_codes,
+        )
+        cells, self.__rollup = merge_cells(
+            (self.__rollup_month * category_count + self.__rollup_category) * customer_count + self.__rollup_customer,
+            grouped.keys, self.__rollup, {**grouped.sums, "count": grouped.counts},
+        )
+        self.__rollup_customer = cells % customer_count
+        self.__rollup_category = cells // customer_count % category_count
+        self.__rollup_month = cells // customer_count // category_count
+
+        for name, values in {**columns, "count": None}.items():
+            self.__customer_totals[name] += np.bincount(facts.customer_codes, weights=values, minlength=customer_count)
+        self.__rows += len(facts)
+
+    @staticmethod
+    def __month_mask(months: np.ndarray, trends_filter: TrendsFilter) -> np.ndarray:
+        mask = np.ones(len(months), dtype=bool)
+        if trends_filter.start_month:
+            mask &= months >= month_index(trends_filter.start_month)
+        if trends_filter.end_month:
+            mask &= months <= month_index(trends_filter.end_month)
+        return mask
+
+    def __location_mask(self, trends_filter: TrendsFilter) -> np.ndarray:
+        # 지역 코드별 포함 여부
+        if not trends_filter.locations:
+            return np.ones(len(self.__locations), dtype=bool)
+        return np.isin(self.__locations, np.asarray(trends_filter.locations, dtype=str))
+
+    def __category_mask(self, trends_filter: TrendsFilter) -> np.ndarray:
+        # 카테고리 코드별 포함 여부
+        if not trends_filter.categories:
+            return np.ones(len(self.__categories), dtype=bool)
+        return np.isin(self.__categories, np.asarray(trends_filter.categories, dtype=str))
+
+    def __mask(self, trends_filter: TrendsFilter) -> np.ndarray:
+        mask = self.__month_mask(self.__month, trends_filter)
+        if trends_filter.categories:
+            mask &= self.__category_mask(trends_filter)[self.__product_category[self.__product]]
+        if trends_filter.locations:
+            mask &= self.__location_mask(trends_filter)[self.__location]
+        return mask
+
+    def query(self, trends_filter: TrendsFilter = TrendsFilter()) -> dict:
+        """
+        조건에 맞는 셀만 합산해 카테고리별 판매량, 상위 상품, 최다 구매 고객을 반환.
+        """
+        product_totals = self.__product_totals(self.__mask(trends_filter))
+        # 카테고리별 총 구매량
+        category_sales = product_totals.groupby("Category")["Quantity"].sum().astype(int).to_dict()
+        product_stats = self.__product_stats(product_totals)
+
+        def top_products(by: str) -> dict:
+            top = product_stats.sort_values(by=by, ascending=False).head(10)
+            return {
+                product: f"{int(total)} [{satisfaction:.2f}]"
+                for product, total, satisfaction in zip(top.index, top["Quantity"], top["Satisfaction"])
+            }
+
+        return {
+            "category_sales": category_sales,
+            # 만족도 평균 기준 상위 10개
+            "top_products_by_satisfaction": top_products("Satisfaction"),
+            # 총 주문 수량 기준 상위 10개
+            "top_products_by_quantity": top_products("Quantity"),
+            "most_frequent_customer": self.__top_customer(self.__customer_rollup(trends_filter)),
+        }
+
+    def __product_totals(self, mask: np.ndarray) -> pd.DataFrame:
+        product = self.__product[mask]
+        size = len(self.products)
+        product_count = np.bincount(product, weights=self.__cells["count"][mask], minlength=size)
+        return pd.DataFrame({
+            "ProductName": self.products["ProductName"].to_numpy(),
+            "Category": self.products["Category"].to_numpy(),
+            "Quantity": np.bincount(product, weights=self.__cells["quantity"][mask], minlength=size),
+            "SatisfactionSum": np.bincount(product, weights=self.__cells["satisfaction"][mask], minlength=size),
+            "Count": product_count,
+        })[product_count > 0]
+
+    @staticmethod
+    def __product_stats(product_totals: pd.DataFrame) -> pd.DataFrame:
+        # 제품별 총 구매량과 평균 만족도
+        product_stats = product_totals.groupby("ProductName")[["Quantity", "SatisfactionSum", "Count"]].sum()
+        product_stats["Satisfaction"] = product_stats["SatisfactionSum"] / product_stats["Count"]
+        return product_stats
+
+    def product_stats(self) -> pd.DataFrame:
+        """
+        전체 기간의 제품명별 총 구매량(Quantity)과 평균 만족도(Satisfaction).
+        """
+        return self.__product_stats(self.__product_totals(np.ones(len(self.__month), dtype=bool)))
+
+    def monthly_quantity(self) -> pd.Series:
+        """
+        월("YYYY-MM")별 총 구매량 (월 순서).
+        """
+        months, inverse = np.unique(self.__month, return_inverse=True)
+        quantity = np.bincount(inverse.ravel(), weights=self.__cells["quantity"], minlength=len(months))
+        return pd.Series(quantity, index=months.astype("datetime64[M]").astype(str))
+
+    def __customer_rollup(self, trends_filter: TrendsFilter) -> dict:
+        """
+        조건에 맞는 고객별 구매량/금액/구매 수 (고객 수 길이 배열).
+        """
+        size = len(self.customers)
+        if trends_filter.start_month or trends_filter.end_month or trends_filter.categories:
+            customer = self.__rollup_customer
+            mask = self.__month_mask(self.__rollup_month, trends_filter)
+            if trends_filter.categories:
+                mask &= self.__category_mask(trends_filter)[self.__rollup_category]
+            if trends_filter.locations:
+                mask &= self.__location_mask(trends_filter)[self.__customer_location[customer]]
+            customer = customer[mask]
+            return {
+                name: np.bincount(customer, weights=values[mask], minlength=size)
+                for name, values in self.__rollup.items()
+            }
+        if not trends_filter.locations:
+            return self.__customer_totals
+        included = self.__location_mask(trends_filter)[self.__customer_location]
+        return {name: np.where(included, values, 0) for name, values in self.__customer_totals.items()}
+
+    def __top_customer(self, customer_totals: dict):
+        present = np.flatnonzero(customer_totals["count"])
+        if len(present) == 0:
+            return None
+
+        # 고객별 총 구매량 및 금액
+        customer_totals = pd.DataFrame({
+            "Quantity": customer_totals["quantity"][present],
+            "TotalAmount": customer_totals["total_amount"][present],
+        }, index=present)
+        customer_totals = customer_totals.iloc[np.argsort(self.__customer_rank[present], kind="stable")]
+        top_code = customer_totals.sort_values(by="Quantity", ascending=False).index[0]
+        top_customer_info = self.customers.iloc[top_code]
+
+        # 상위 고객 정보 포맷팅
+        return {
+            "CustomerID": str(top_customer_info["CustomerID"]),
+            "Name": top_customer_info["Name"],
+            "Total Purchases": int(customer_totals.loc[top_code, "Quantity"]),
+            "Total Spent": float(customer_totals.loc[top_code, "TotalAmount"]),
+            "SignupDate": str(top_customer_info["SignupDate"]),
+            "Location": top_customer_info["Location"]
+        }
+
+
+class MaterializedTrendsCube:
+    """
+    현재 구매 사실 테이블에 대한 TrendsCube, 순위표(PurchaseLeaderboards)와 필터별 조회 결과를 프로세스 전역으로 유지.
+    사실 테이블에 행만 이어 붙은 경우 새 행만 반영하고, 차원이 바뀌면 다시 만든다.
+    stream 형식에서는 purchases.csv를 청크 단위로 한 번 읽어 큐브와 순위표에 함께 반영한다.
+    조회 결과는 공유되므로 호출자가 수정하면 안 된다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__cube = None
+            cls.__instance.__cube_rows = 0
+            cls.__instance.__leaderboards = None
+            cls.__instance.__generation = None
+            cls.__instance.__results = {}
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    def is_current(self) -> bool:
+        return self.__generation == DatasetStore.getInstance().get_snapshot().generation
+
+    def refresh(self) -> TrendsCube:
+        """
+        큐브를 현재 데이터 세대에 맞춘다.
+        """
+        with self.__lock:
+            generation, (cube, leaderboards) = synchronize(
+                self.__generation,
+                (self.__cube, TrendsCube),
+                (self.__leaderboards, lambda customers, products: PurchaseLeaderboards(customers, products, **leaderboard_options())),
+            )
+            if cube is not self.__cube or cube.rows != self.__cube_rows:
+                self.__results = {}
+
+            self.__cube = cube
+            self.__cube_rows = cube.rows
+            self.__leaderboards = leaderboards
+            self.__generation = generation
+            return cube
+
+    def query(self, trends_filter: TrendsFilter = TrendsFilter()) -> dict:
+        cube = self.__cube if self.is_current() else self.refresh()
+        with self.__lock:
+            result = self.__results.get(trends_filter)
+            if result is None or cube is not self.__cube:
+                result = cube.query(trends_filter)
+                if cube is self.__cube:
+                    if len(self.__results) >= RESULT_CACHE_SIZE:
+                        self.__results.pop(next(iter(self.__results)))
+                    self.__results[trends_filter] = result
+            return result
+
+    def chart_series(self):
+        """
+        차트용 (제품별 판매량/평균 만족도, 월별 판매량).
+        """
+        cube = self.__cube if self.is_current() else self.refresh()
+        with self.__lock:
+            return cube.product_stats(), cube.monthly_quantity()
+
+    def top(self, k: int = 10, window_days: int = None) -> dict:
+        """
+        순위표에서 상위 K개 상품/고객을 조회 (window_days: 마지막 구매일 기준 최근 N일).
+        """
+        if not self.is_current():
+            self.refresh()
+        with self.__lock:
+            return self.__leaderboards.top(k, window_days)
@@ -3,22 +3,57 @@ from abc import ABC, abstractmethod
 
 class CustomerService(ABC):
     @abstractmethod
-    async def predict_churn(self) -> dict:
+    def cached_churn(self):
         """
-        고객 이탈 예측 수행.
+        현재 데이터 버전에 대해 저장된 이탈 예측 결과 (없으면 None).
         """
         pass
 
     @abstractmethod
-    async def analyze_trends(self) -> dict:
+    def submit_churn_job(self):
         """
-        구매 동향 분석 수행.
+        고객 이탈 예측 학습 작업 등록. (작업, 중복 여부) 반환.
         """
         pass
 
     @abstractmethod
-    async def predict_churn_with_pca(self) -> dict:
+    async def analyze_trends(self, trends_filter):
         """
-        PCA를 적용한 고객 이탈 예측 수행.
+        기간/카테고리/지역 조건에 맞는 구매 동향 분석 수행. 직렬화된 결과(CachedResult) 반환.
         """
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def top_trends(self, k: int, window_days: int = None):
+        """
+        스트리밍 순위표에서 기간 내 상위 K개 상품/고객 조회. 직렬화된 결과(CachedResult) 반환.
+        """
+        pass
+
+    @abstractmethod
+    def cached_pca(self, n_components: int = 2, solver: str = "auto"):
+        """
+        현재 데이터 버전과 PCA 설정에 대해 저장된 PCA 이탈 예측 결과 (없으면 None).
+        """
+        pass
+
+    @abstractmethod
+    def submit_pca_job(self, n_components: int = 2, solver: str = "auto"):
+        """
+        PCA를 적용한 고객 이탈 예측 학습 작업 등록. (작업, 중복 여부) 반환.
+        """
+        pass
+
+    @abstractmethod
+    def transform_pca(self, rows: list, n_components: int = 2, solver: str = "auto"):
+        """
+        저장된 PCA 투영으로 구매 행을 주성분으로 변환 (투영이 없으면 None).
+        """
+        pass
+
+    @abstractmethod
+    async def render_chart(self, chart: str, fmt: str = "png", width: int = None, height: int = None, top_n: int = 10):
+        """
+        차트 이미지(CachedResult) 조회. 데이터/모델 지표가 바뀌지 않았으면 메모리의 이미지를 반환.
+        """
+        pass
@@ -1,60 +1,167 @@
 from customer_analysis.repository.customer_analysis_repository_impl import CustomerRepositoryImpl
+from customer_analysis.repository.rfm_table import as_of_date_key
+from customer_analysis.repository.trends_cube import MaterializedTrendsCube, TrendsFilter
 from customer_analysis.service.customer_analysis_service import CustomerService
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, classification_report
+from customer_analysis.visualization.chart_store import ChartStore
+from dataset_store.dataset_store import DatasetStore
+from dataset_store.result_cache import CachedResult, ResultCache
+from instrumentation.metrics import instrumented
+from task_executor.bounded_executor import BoundedExecutor
+from task_executor.job_queue import JobQueue
 
+from dataclasses import asdict
+from typing import Optional
 import json
+import logging
+import multiprocessing
+import os
 
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_service():
+    # 프로세스 풀 워커는 자신의 DatasetStore를 가지므로 바뀐 데이터 파일을 먼저 반영
+    if multiprocessing.parent_process() is not None:
+        DatasetStore.getInstance().reload()
+    return CustomerServiceImpl()
+
+
+def _save_metrics(metrics: dict, filename: str):
+    # 모델 비교 차트는 이 지표 파일로 요청 시 그린다 (ChartStore)
+    os.makedirs('./graphs', exist_ok=True)
+    with open(os.path.join('./graphs', filename), 'w') as f:
+        json.dump(metrics, f)
+
+
+# 프로세스 풀에도 제출할 수 있도록 모듈 수준 함수로 감싼 작업들
+def run_predict_churn():
+    metrics = _worker_service().predict_churn_sync()
+    _save_metrics(metrics, 'logistic_regression_metrics.json')
+    return metrics
+
+
+def run_predict_churn_with_pca(n_components=2, solver="auto"):
+    metrics = _worker_service().predict_churn_with_pca_sync(n_components, solver)
+    _save_metrics(metrics, 'pca_logistic_regression_metrics.json')
+    return metrics
+
+
+@instrumented
 class CustomerServiceImpl(CustomerService):
     def __init__(self):
         self.__repository = CustomerRepositoryImpl()
 
-    async def predict_churn(self):
-        # 데이터 준비
-        rfm = self.__repository.prepare_data()
+    @staticmethod
+    def __submit_cached_job(kind: str, func, params: dict, *args):
+        # 같은 데이터 버전에 대해 진행 중인 학습이 있으면 그 작업을 그대로 반환하고, 성공한 결과는 결과 캐시에 저장
+        data_version = DatasetStore.getInstance().get_snapshot().version
+        return JobQueue.getInstance().submit(
+            kind, func, *args, params=params, data_version=data_version,
+            on_success=lambda result: ResultCache.getInstance().put(kind, params, result, data_version),
+        )
+
+    def cached_churn(self) -> Optional[CachedResult]:
+        return ResultCache.getInstance().get("churn", {"as_of_date": as_of_date_key()})
+
+    def submit_churn_job(self):
+        return self.__submit_cached_job("churn", run_predict_churn, {"as_of_date": as_of_date_key()})
+
+    async def analyze_trends(self, trends_filter: TrendsFilter = TrendsFilter()) -> CachedResult:
+        cache = ResultCache.getInstance()
+        params = asdict(trends_filter)
+        cached = cache.get("trends", params)
+        if cached is not None:
+            return cached
+        # 캐시에 없으면 큐브 갱신(필요한 경우)과 조회를 이벤트 루프 밖의 스레드에서 수행
+        return await BoundedExecutor.getInstance().run_local(
+            "trends", cache.get_or_compute, "trends", params, lambda: self.analyze_trends_sync(trends_filter),
+        )
 
-        # 학습 및 테스트 데이터 분리
-        X_train, X_test, y_train, y_test = self.__repository.split_data(rfm)
+    async def top_trends(self, k: int, window_days: int = None) -> CachedResult:
+        cache = ResultCache.getInstance()
+        params = {"k": k, "window_days": window_days}
+        cached = cache.get("top_trends", params)
+        if cached is not None:
+            return cached
+        cube = MaterializedTrendsCube.getInstance()
+        if not cube.is_current():
+            await BoundedExecutor.getInstance().run_local("trends", cube.refresh)
+        return await BoundedExecutor.getInstance().run_local(
+            "trends", cache.get_or_compute, "top_trends", params, lambda: self.__repository.top_trends(k, window_days),
+        )
+
+    @staticmethod
+    def __pca_params(n_components: int, solver: str) -> dict:
+        return {"n_components": n_components, "solver": solver, "as_of_date": as_of_date_key()}
+
+    def cached_pca(self, n_components=2, solver="auto") -> Optional[CachedResult]:
+        return ResultCache.getInstance().get("pca", self.__pca_params(n_components, solver))
+
+    def submit_pca_job(self, n_components=2, solver="auto"):
+        return self.__submit_cached_job(
+            "pca", run_predict_churn_with_pca, self.__pca_params(n_components, solver), n_components, solver,
+        )
+
+    def transform_pca(self, rows, n_components=2, solver="auto"):
+        transformed = self.__repository.transform_pca(rows, n_components, solver)
+        if transformed is None:
+            return None
+        projection, components = transformed
+        return {
+            "projection": projection.key,
+            "solver": projection.attrs["solver"],
+            "explained_variance_ratio": projection.attrs["explained_variance_ratio"],
+            "components": components.tolist(),
+        }
+
+    async def render_chart(self, chart: str, fmt: str = "png", width: int = None, height: int = None,
+                           top_n: int = 10) -> CachedResult:
+        # 메모리에 있으면 바로 반환하고, 그리기(입력 집계 + 프로세스 풀 렌더링)만 스레드에서 수행
+        store = ChartStore.getInstance()
+        cached = store.lookup(store.key(chart, fmt, width, height, top_n))
+        if cached is not None:
+            return cached
+        return await BoundedExecutor.getInstance().run_local("charts", store.get, chart, fmt, width, height, top_n)
+
+    def predict_churn_sync(self):
+        # 고객 단위 특성 행렬을 학습 및 테스트 데이터로 분리
+        X_train, X_test, y_train, y_test = self.__repository.customer_features().split()
 
         # 모델 학습
         model = self.__repository.train_model(X_train, y_train)
 
         # 모델 평가
         accuracy, report = self.__repository.evaluate_model(model, X_test, y_test)
-        # f1_score = report["weighted avg"]["f1-score"]
-
-        # with open('./graphs/logistic_regression_metrics.json', 'w') as f:
-        #     json.dump({"accuracy": accuracy, "f1_score" : f1_score}, f)
-
 
         return {
             "accuracy": accuracy,
             "classification_report": report
         }
 
-    async def analyze_trends(self):
+    def analyze_trends_sync(self, trends_filter: TrendsFilter = TrendsFilter()):
         # 구매 동향 분석
-        trends = self.__repository.analyze_trends()
+        trends = self.__repository.analyze_trends(trends_filter)
         return trends
 
-    async def predict_churn_with_pca(self):
+    def predict_churn_with_pca_sync(self, n_components=2, solver="auto"):
         """
-        PCA 처리(n_components=2 고정)와 고객 이탈 예측 수행.
+        PCA 처리(저장된 투영 재사용)와 고객 이탈 예측 수행.
         """
-        X_train, X_test, y_train, y_test = self.__repository.perform_pca_and_split(2)
-        
+        X_train, X_test, y_train, y_test = self.__repository.perform_pca_and_split(n_components, solver)
+
         model = self.__repository.train_model_with_pca(X_train, y_train)
-        
+
         accuracy, report = self.__repository.evaluate_model_with_pca(model, X_test, y_test)
-        # f1_score = report["weighted avg"]["f1_score"]
 
-        # with open('./graphs/pca_logistic_regression_metrics.json', 'w') as f:
-        #     json.dump({"accuracy": accuracy, "f1_score": f1_score}, f)
+        logger.debug("pca split", extra={"train_shape": X_train.shape, "test_shape": X_test.shape})
 
-        print(X_train.shape, y_train.shape)
-        print(X_test.shape, y_test.shape)
-        
+        projection = self.__repository.pca_projection(n_components, solver)
         return {
-            "accuracy": accuracy, 
-            "classification_report": report
+            "accuracy": accuracy,
+            "classification_report": report,
+            "pca": {
+                key: projection.attrs[key]
+                for key in ("n_components", "solver", "rows", "explained_variance_ratio", "fit_seconds")
+            },
         }
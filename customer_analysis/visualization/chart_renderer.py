@@ -0,0 +1,124 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+
+# 내용 해시별로 기억하는 렌더링 결과 수
+CHART_CACHE_SIZE = 64
+
+
+def chart_key(func, args: tuple, options: dict) -> str:
+    """
+    차트 함수와 입력(인자, 형식/크기 옵션)의 내용 해시.
+    """
+    payload = json.dumps(
+        {"func": f"{func.__module__}.{func.__qualname__}", "args": args, "options": options},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _render(func, args: tuple, options: dict) -> bytes:
+    # 프로세스 풀 워커: Figure API만 쓰므로 pyplot 백엔드/전역 상태가 없다
+    return func(*args, **options)
+
+
+class ChartRenderer:
+    """
+    matplotlib 차트를 spawn 프로세스 풀에서 그려 이미지 바이트로 반환.
+    차트 함수는 Figure 객체를 직접 만들고 바이트를 반환하는 모듈 수준 함수여야 한다 (pickle 가능).
+    입력의 내용 해시로 결과를 기억하므로 입력이 바뀌지 않은 차트는 다시 그리지 않는다.
+
+    CHART_WORKERS(기본: min(2, CPU 수)), CHART_CACHE_SIZE 환경 변수로 설정.
+    이미 풀 워커 안(학습 작업 등)에서 호출되면 현재 프로세스에서 그린다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__workers = max(int(os.getenv("CHART_WORKERS", min(2, os.cpu_count() or 1))), 1)
+            cls.__instance.__cache_size = int(os.getenv("CHART_CACHE_SIZE", CHART_CACHE_SIZE))
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__pool = None
+            cls.__instance.__images = OrderedDict()
+            cls.__instance.__rendered = 0
+            cls.__instance.__skipped = 0
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    def __get_pool(self):
+        with self.__lock:
+            if self.__pool is None:
+                self.__pool = ProcessPoolExecutor(
+                    max_workers=self.__workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self.__pool
+
+    def __cached(self, key: str):
+        with self.__lock:
+            image = self.__images.get(key)
+            if image is not None:
+                self.__images.move_to_end(key)
+                self.__skipped += 1
+            return image
+
+    def __remember(self, key: str, image: bytes):
+        with self.__lock:
+            self.__images[key] = image
+            self.__rendered += 1
+            while len(self.__images) > self.__cache_size:
+                self.__images.popitem(last=False)
+
+    def render(self, func, *args, **options) -> bytes:
+        """
+        func(*args, **options)로 그린 이미지 바이트.
+        """
+        return self.render_many({"chart": (func, args)}, **options)["chart"]
+
+    def render_many(self, charts: dict, **options) -> dict:
+        """
+        {이름: (차트 함수, 인자)}를 병렬로 그려 {이름: 이미지 바이트}로 반환. options(fmt, width, height 등)는 모든 차트에 적용.
+        """
+        keys = {name: chart_key(func, args, options) for name, (func, args) in charts.items()}
+        images = {name: self.__cached(key) for name, key in keys.items()}
+        missing = [name for name, image in images.items() if image is None]
+        if not missing:
+            return images
+
+        if multiprocessing.parent_process() is not None:
+            rendered = {name: _render(*charts[name], options) for name in missing}
+        else:
+            pool = self.__get_pool()
+            futures = {name: pool.submit(_render, *charts[name], options) for name in missing}
+            rendered = {name: future.result() for name, future in futures.items()}
+        for name, image in rendered.items():
+            self.__remember(keys[name], image)
+            images[name] = image
+        return images
+
+    def status(self) -> dict:
+        with self.__lock:
+            return {
+                "workers": self.__workers,
+                "cached": len(self.__images),
+                "rendered": self.__rendered,
+                "skipped": self.__skipped,
+                "started": self.__pool is not None,
+            }
+
+    def shutdown(self):
+        with self.__lock:
+            if self.__pool is not None:
+                self.__pool.shutdown(wait=True, cancel_futures=True)
+                self.__pool = None
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+from customer_analysis.repository.rfm_table import MaterializedRfmTable, as_of_date_key
+from customer_analysis.repository.trends_cube import MaterializedTrendsCube
+from customer_analysis.visualization import visualization
+from customer_analysis.visualization.chart_renderer import ChartRenderer
+from dataset_store.dataset_store import DatasetStore
+from dataset_store.result_cache import CachedResult
+
+
+# 메모리에 유지하는 차트 이미지 크기 합의 상한 (바이트)
+CHART_STORE_MAX_BYTES = 32 * 1024 * 1024
+# 요청의 픽셀 크기를 Figure 크기(인치)로 바꿀 때 쓰는 해상도 (matplotlib 기본값)
+CHART_DPI = 100
+AGE_BINS = [0, 20, 30, 40, 50, 60, 70, 100]
+AGE_LABELS = ['18-19', '20-29', '30-39', '40-49', '50-59', '60-69', '70+']
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """
+    차트 그리기 함수, 그 입력을 만드는 함수, 입력이 의존하는 버전의 종류.
+    source: data(데이터 버전), rfm(데이터 버전 + RFM 기준일), metrics(모델 지표 파일 버전)
+    """
+    render: object
+    inputs: object
+    source: str
+    top_n: bool = False
+
+
+def gender_counts() -> tuple:
+    customers = DatasetStore.getInstance().get_snapshot().customers
+    counts = customers["Gender"].astype(str).value_counts()
+    return ({gender: int(count) for gender, count in counts.items()},)
+
+
+def age_counts() -> tuple:
+    customers = DatasetStore.getInstance().get_snapshot().customers
+    groups = pd.cut(customers["Age"], bins=AGE_BINS, labels=AGE_LABELS, right=False)
+    counts = groups.value_counts().sort_index()
+    return ({str(group): int(count) for group, count in counts.items()},)
+
+
+def product_sales(top_n: int) -> tuple:
+    product_stats, _ = MaterializedTrendsCube.getInstance().chart_series()
+    top = product_stats["Quantity"].sort_values(ascending=False).head(top_n)
+    return ({str(name): float(quantity) for name, quantity in top.items()},)
+
+
+def product_satisfaction(top_n: int) -> tuple:
+    product_stats, _ = MaterializedTrendsCube.getInstance().chart_series()
+    top = product_stats["Satisfaction"].sort_values(ascending=False).head(top_n)
+    return ({str(name): float(satisfaction) for name, satisfaction in top.items()},)
+
+
+def monthly_sales() -> tuple:
+    _, monthly = MaterializedTrendsCube.getInstance().chart_series()
+    return ({month: float(quantity) for month, quantity in monthly.items()},)
+
+
+def churn_counts() -> tuple:
+    churn = MaterializedRfmTable.getInstance().to_frame()["Churn"]
+    return ({"Not Churned": int((churn == 0).sum()), "Churned": int((churn == 1).sum())},)
+
+
+def model_f1_inputs(model_name: str):
+    def inputs() -> tuple:
+        metrics = visualization.load_metrics()
+        if model_name not in metrics:
+            raise FileNotFoundError(f"No metrics for {model_name}. Train the model first.")
+        return model_name, metrics[model_name]
+    return inputs
+
+
+CHARTS = {
+    "customer_gender_distribution": ChartSpec(visualization.render_gender_distribution, gender_counts, "data"),
+    "customer_age_distribution": ChartSpec(visualization.render_age_distribution, age_counts, "data"),
+    "product_sales": ChartSpec(visualization.render_product_sales, product_sales, "data", top_n=True),
+    "product_satisfaction": ChartSpec(visualization.render_product_satisfaction, product_satisfaction, "data", top_n=True),
+    "monthly_sales_trend": ChartSpec(visualization.render_monthly_sales, monthly_sales, "data"),
+    "churn_distribution": ChartSpec(visualization.render_churn_distribution, churn_counts, "rfm"),
+    **{
+        f"{slug}_f1_scores": ChartSpec(visualization.render_f1_scores, model_f1_inputs(model_name), "metrics")
+        for model_name, slug in visualization.MODEL_SLUGS.items()
+    },
+    "model_accuracy_comparison": ChartSpec(
+        visualization.render_accuracy_comparison, lambda: (visualization.load_metrics(),), "metrics",
+    ),
+    "model_comparison_f1_accuracy": ChartSpec(
+        visualization.render_model_comparison, lambda: (visualization.load_metrics(),), "metrics",
+    ),
+}
+MODEL_CHARTS = [name for name, spec in CHARTS.items() if spec.source == "metrics"]
+
+
+class ChartStore:
+    """
+    차트를 요청 시 그려 메모리의 이미지 바이트로 제공하는 저장소.
+    (차트 종류, 입력 버전, 형식/크기/top_n)의 해시를 키로 CHART_STORE_MAX_BYTES 이하의 LRU에 보관하므로
+    데이터나 모델 지표가 바뀌기 전까지는 다시 그리지 않고, 키는 그대로 ETag로 쓴다.
+    같은 키를 동시에 요청하면 한 번만 그리고 나머지는 그 결과를 기다린다.
+    그리기는 ChartRenderer 프로세스 풀에서 하므로 호출은 이벤트 루프 밖(스레드)에서 한다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__max_bytes = int(os.getenv("CHART_STORE_MAX_BYTES", CHART_STORE_MAX_BYTES))
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__images = OrderedDict()
+            cls.__instance.__bytes = 0
+            cls.__instance.__in_flight = {}
+            cls.__instance.__coalesced = 0
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def names() -> list:
+        return list(CHARTS)
+
+    @staticmethod
+    def __version(spec: ChartSpec) -> str:
+        if spec.source == "metrics":
+            return visualization.metrics_version()
+        data_version = DatasetStore.getInstance().get_snapshot().version
+        if spec.source == "rfm":
+            return f"{data_version}:{as_of_date_key()}"
+        return data_version
+
+    @staticmethod
+    def __options(spec: ChartSpec, fmt: str, width: Optional[int], height: Optional[int], top_n: int) -> dict:
+        options = {"fmt": fmt}
+        if width is not None:
+            options["width"] = width / CHART_DPI
+        if height is not None:
+            options["height"] = height / CHART_DPI
+        if spec.top_n:
+            options["top_n"] = top_n
+        return options
+
+    def key(self, chart: str, fmt: str = "png", width: int = None, height: int = None, top_n: int = 10) -> str:
+        """
+        차트 이미지의 키 (ETag). 알 수 없는 차트면 KeyError.
+        """
+        spec = CHARTS[chart]
+        payload = json.dumps({
+            "chart": chart,
+            "version": self.__version(spec),
+            "options": self.__options(spec, fmt, width, height, top_n),
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def lookup(self, key: str) -> Optional[CachedResult]:
+        with self.__lock:
+            image = self.__images.get(key)
+            if image is None:
+                return None
+            self.__images.move_to_end(key)
+            return CachedResult(key, image)
+
+    def get(self, chart: str, fmt: str = "png", width: int = None, height: int = None, top_n: int = 10) -> CachedResult:
+        """
+        차트 이미지. 없으면 그리고, 같은 차트를 그리는 중이면 그 결과를 기다린다.
+        알 수 없는 차트는 KeyError, 학습된 모델 지표가 없으면 FileNotFoundError.
+        """
+        key = self.key(chart, fmt, width, height, top_n)
+        with self.__lock:
+            image = self.__images.get(key)
+            if image is not None:
+                self.__images.move_to_end(key)
+                return CachedResult(key, image)
+            future = self.__in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self.__in_flight[key] = Future()
+            else:
+                self.__coalesced += 1
+        if not owner:
+            return CachedResult(key, future.result())
+
+        try:
+            spec = CHARTS[chart]
+            options = self.__options(spec, fmt, width, height, top_n)
+            top = {"top_n": options.pop("top_n")} if spec.top_n else {}
+            image = ChartRenderer.getInstance().render(spec.render, *spec.inputs(**top), **options)
+        except BaseException as e:
+            with self.__lock:
+                self.__in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self.__lock:
+            self.__remember(key, image)
+            self.__in_flight.pop(key, None)
+        future.set_result(image)
+        return CachedResult(key, image)
+
+    def __remember(self, key: str, image: bytes):
+        if len(image) > self.__max_bytes:
+            return
+        self.__images[key] = image
+        self.__bytes += len(image)
+        while self.__bytes > self.__max_bytes:
+            _, evicted = self.__images.popitem(last=False)
+            self.__bytes -= len(evicted)
+
+    def status(self) -> dict:
+        with self.__lock:
+            return {
+                "images": len(self.__images),
+                "bytes": self.__bytes,
+                "max_bytes": self.__max_bytes,
+                "rendering": len(self.__in_flight),
+                "coalesced": self.__coalesced,
+                "renderer": ChartRenderer.getInstance().status(),
+            }
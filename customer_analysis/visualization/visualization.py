@@ -1,125 +1,223 @@
+import hashlib
+import io
 import json
-import matplotlib.pyplot as plt
 import os
+from typing import TYPE_CHECKING
 
-def plot_modeling_results(metrics):
+# matplotlib은 처음 그릴 때 import한다. 차트를 ChartRenderer 풀에서 그리는 API 프로세스는 로드하지 않는다.
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+# 모델 이름과 차트/지표 파일 이름에 쓰는 식별자
+MODEL_SLUGS = {
+    "Logistic Regression": "logistic_regression",
+    "PCA + Logistic Regression": "pca_logistic_regression",
+}
+# 학습 작업이 저장하는 모델별 지표 파일
+METRICS_FILES = {model_name: f'./graphs/{slug}_metrics.json' for model_name, slug in MODEL_SLUGS.items()}
+CHART_FORMATS = ("png", "svg")
+
+
+def new_figure(**kwargs) -> "Figure":
+    """
+    Create a pyplot-free Figure, importing matplotlib on first use.
+    """
+    from matplotlib.figure import Figure
+    return Figure(**kwargs)
+
+
+def figure_bytes(fig: "Figure", fmt: str = "png") -> bytes:
+    """
+    Figure를 이미지 바이트로 저장 (pyplot 전역 상태 없이 Agg/SVG 캔버스 사용).
+    """
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+    import matplotlib
+
+    buffer = io.BytesIO()
+    # SVG의 생성 시각과 무작위 요소 ID를 고정해 같은 입력이면 같은 바이트가 되게 한다
+    with matplotlib.rc_context({"svg.hashsalt": "chart"}):
+        fig.savefig(buffer, format=fmt, metadata={"Date": None} if fmt == "svg" else None)
+    return buffer.getvalue()
+
+
+def metrics_version() -> str:
+    """
+    Fingerprint (size and mtime) of the saved metrics files; changes whenever a model is retrained.
+    """
+    fingerprint = []
+    for model_name, path in METRICS_FILES.items():
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprint.append((model_name, stat.st_size, stat.st_mtime_ns))
+    return hashlib.sha1(repr(fingerprint).encode()).hexdigest()[:12]
+
+
+def load_metrics() -> dict:
+    """
+    Load every saved model metrics JSON once. Models that have not been trained yet are skipped.
+    """
+    metrics = {}
+    for model_name, path in METRICS_FILES.items():
+        if os.path.exists(path):
+            with open(path) as f:
+                metrics[model_name] = json.load(f)
+    if not metrics:
+        raise FileNotFoundError("No model metrics found. Train a model first.")
+    return metrics
+
+
+def render_f1_scores(model_name, model_metrics, fmt="png", width=10, height=6) -> bytes:
     """
-    Plot F1 scores of the models from the given metrics dictionary.
+    Plot per-class F1 scores of one model.
     """
-    for model_name, model_metrics in metrics.items():
-        classification_report = model_metrics['classification_report']
-        f1_scores = [classification_report[str(label)]["f1-score"] for label in [0, 1]]
-        labels = [f"Class {label}" for label in [0, 1]]
+    classification_report = model_metrics['classification_report']
+    f1_scores = [classification_report[str(label)]["f1-score"] for label in [0, 1]]
+    labels = [f"Class {label}" for label in [0, 1]]
+
+    fig = new_figure(figsize=(width, height))
+    ax = fig.subplots()
+    ax.bar(labels, f1_scores, color=['skyblue', 'orange'])
+    ax.set_title(f"F1 Score Comparison for {model_name}", fontsize=14)
+    ax.set_ylabel("F1 Score", fontsize=12)
+    ax.set_ylim(0, 1.1)
+    return figure_bytes(fig, fmt)
 
-        plt.figure(figsize=(10, 6))
-        plt.bar(labels, f1_scores, color=['skyblue', 'orange'])
-        plt.title(f"F1 Score Comparison for {model_name}", fontsize=14)
-        plt.ylabel("F1 Score", fontsize=12)
-        plt.ylim(0, 1.1)
-        os.makedirs('./graphs', exist_ok=True)
-        plt.savefig(f'./graphs/{model_name.replace(" ", "_").lower()}_f1_scores.png')
-        plt.show()
 
-def plot_model_comparison():
+def render_model_comparison(metrics, fmt="png", width=10, height=6) -> bytes:
     """
     Plot a comparison of F1 scores and Accuracy for all models.
     """
-    with open('./graphs/logistic_regression_metrics.json') as f:
-        lr_metrics = json.load(f)
-
-    with open('./graphs/pca_logistic_regression_metrics.json') as f:
-        pca_lr_metrics = json.load(f)
-
-    # Extract metrics
-    metrics = {
-        "Logistic Regression": {
-            "f1_score": lr_metrics["classification_report"]["weighted avg"]["f1-score"],
-            "accuracy": lr_metrics["accuracy"]
-        },
-        "PCA + Logistic Regression": {
-            "f1_score": pca_lr_metrics["classification_report"]["weighted avg"]["f1-score"],
-            "accuracy": pca_lr_metrics["accuracy"]
-        }
-    }
-
-    # Data preparation
     categories = list(metrics.keys())
-    f1_scores = [metrics[category]["f1_score"] for category in categories]
+    f1_scores = [metrics[category]["classification_report"]["weighted avg"]["f1-score"] for category in categories]
     accuracies = [metrics[category]["accuracy"] for category in categories]
 
-    # Plot
     x = range(len(categories))
-    width = 0.4
-
-    plt.figure(figsize=(10, 6))
-    plt.bar([p - width/2 for p in x], f1_scores, width=width, label='F1 Score', color='skyblue')
-    plt.bar([p + width/2 for p in x], accuracies, width=width, label='Accuracy', color='orange')
-    plt.xticks(x, categories, fontsize=12)
-    plt.ylabel('Score', fontsize=12)
-    plt.title('Model Comparison: F1 Score vs Accuracy', fontsize=14)
-    plt.legend(fontsize=12)
-    plt.ylim(0, 1.1)
-    os.makedirs('./graphs', exist_ok=True)
-    plt.tight_layout()
-    plt.savefig('./graphs/model_comparison_f1_accuracy.png')
-    plt.show()
-
-def plot_accuracy_comparison():
-    """
-    Plot the accuracy of Logistic Regression and PCA + Logistic Regression models.
-    """
-    with open('./graphs/logistic_regression_metrics.json') as f:
-        lr_metrics = json.load(f)
-
-    with open('./graphs/pca_logistic_regression_metrics.json') as f:
-        pca_lr_metrics = json.load(f)
-
-    # Extract accuracies
-    metrics = {
-        "Logistic Regression": lr_metrics["accuracy"],
-        "PCA + Logistic Regression": pca_lr_metrics["accuracy"]
-    }
-
-    # Data preparation
-    categories = list(metrics.keys())
-    accuracies = list(metrics.values())
+    bar_width = 0.4
+
+    fig = new_figure(figsize=(width, height), layout="tight")
+    ax = fig.subplots()
+    ax.bar([p - bar_width/2 for p in x], f1_scores, width=bar_width, label='F1 Score', color='skyblue')
+    ax.bar([p + bar_width/2 for p in x], accuracies, width=bar_width, label='Accuracy', color='orange')
+    ax.set_xticks(list(x), categories, fontsize=12)
+    ax.set_ylabel('Score', fontsize=12)
+    ax.set_title('Model Comparison: F1 Score vs Accuracy', fontsize=14)
+    ax.legend(fontsize=12)
+    ax.set_ylim(0, 1.1)
+    return figure_bytes(fig, fmt)
+
 
-    # Plot
-    plt.figure(figsize=(10, 6))
-    plt.bar(categories, accuracies, color=['skyblue', 'orange'])
-    plt.title('Model Accuracy Comparison', fontsize=14)
-    plt.ylabel('Accuracy', fontsize=12)
-    plt.ylim(0, 1.1)
-    plt.xticks(fontsize=12)
+def render_accuracy_comparison(metrics, fmt="png", width=10, height=6) -> bytes:
+    """
+    Plot the accuracy of each trained model.
+    """
+    categories = list(metrics.keys())
+    accuracies = [metrics[category]["accuracy"] for category in categories]
 
-    # Save and show plot
-    os.makedirs('./graphs', exist_ok=True)
-    plt.tight_layout()
-    plt.savefig('./graphs/model_accuracy_comparison.png')
-    plt.show()
+    fig = new_figure(figsize=(width, height), layout="tight")
+    ax = fig.subplots()
+    ax.bar(categories, accuracies, color=['skyblue', 'orange'][:len(categories)])
+    ax.set_title('Model Accuracy Comparison', fontsize=14)
+    ax.set_ylabel('Accuracy', fontsize=12)
+    ax.set_ylim(0, 1.1)
+    ax.tick_params(axis='x', labelsize=12)
+    return figure_bytes(fig, fmt)
 
 
-def visualize_results():
+def render_gender_distribution(counts, fmt="png", width=8, height=6) -> bytes:
+    """
+    Pie chart of customers per gender. counts: {"M": n, "F": n}
     """
-    Orchestrate the visualization process by loading JSON metrics and calling the plotting functions.
+    names = {"M": "Male", "F": "Female"}
+    labels = [names.get(gender, gender) for gender in counts]
+    colors = ['skyblue', 'orange']
+
+    fig = new_figure(figsize=(width, height))
+    ax = fig.subplots()
+    ax.pie(
+        list(counts.values()),
+        labels=labels,
+        autopct='%1.1f%%',  # 각 항목에 % 표기
+        startangle=90,
+        colors=colors[:len(labels)],
+        explode=[0.1] + [0] * (len(labels) - 1),  # 강조 효과 (첫 항목 약간 분리)
+        textprops={'fontsize': 12}
+    )
+    ax.set_title('Customer Gender Distribution', fontsize=16)
+    return figure_bytes(fig, fmt)
+
+
+def render_age_distribution(counts, fmt="png", width=8, height=6) -> bytes:
     """
-    with open('./graphs/logistic_regression_metrics.json') as f:
-        lr_metrics = json.load(f)
+    Bar chart of customers per age group. counts: {"20-29": n, ...} in display order
+    """
+    fig = new_figure(figsize=(width, height), layout="tight")
+    ax = fig.subplots()
+    ax.bar(list(counts.keys()), list(counts.values()), color='lightgreen')
+    ax.set_title('Customer Age Distribution')
+    ax.set_xlabel('Age Group')
+    ax.set_ylabel('Number of Customers')
+    ax.tick_params(axis='x', labelrotation=45)
+    return figure_bytes(fig, fmt)
 
-    with open('./graphs/pca_logistic_regression_metrics.json') as f:
-        pca_lr_metrics = json.load(f)
 
-    metrics = {
-        "Logistic Regression": lr_metrics,
-        "PCA + Logistic Regression": pca_lr_metrics
-    }
+def render_product_sales(sales, fmt="png", width=12, height=8) -> bytes:
+    """
+    Bar chart of the best selling products. sales: {product name: total quantity} in rank order
+    """
+    fig = new_figure(figsize=(width, height), layout="tight")
+    ax = fig.subplots()
+    ax.bar(list(sales.keys()), list(sales.values()), color='lightblue')
+    ax.set_title(f'Top {len(sales)} Product Sales')
+    ax.set_xlabel('Product Name')
+    ax.set_ylabel('Total Sales')
+    ax.tick_params(axis='x', labelrotation=45)
+    return figure_bytes(fig, fmt)
 
-    # Generate individual F1 score plots
-    plot_modeling_results(metrics)
 
-    # Generate individual accuracy
-    plot_accuracy_comparison()
+def render_product_satisfaction(satisfaction, fmt="png", width=12, height=8) -> bytes:
+    """
+    Bar chart of the best rated products. satisfaction: {product name: average satisfaction} in rank order
+    """
+    fig = new_figure(figsize=(width, height), layout="tight")
+    ax = fig.subplots()
+    ax.bar(list(satisfaction.keys()), list(satisfaction.values()), color='lightcoral')
+    ax.set_title(f'Top {len(satisfaction)} Product Satisfaction')
+    ax.set_xlabel('Product Name')
+    ax.set_ylabel('Average Satisfaction')
+    ax.tick_params(axis='x', labelrotation=45)
+    return figure_bytes(fig, fmt)
 
-    # Generate overall comparison plot
-    plot_model_comparison()
 
+def render_monthly_sales(sales, fmt="png", width=12, height=8) -> bytes:
+    """
+    Line chart of total quantity sold per month. sales: {"YYYY-MM": quantity} in month order
+    """
+    fig = new_figure(figsize=(width, height), layout="tight")
+    ax = fig.subplots()
+    ax.plot(list(sales.keys()), list(sales.values()), marker='o', color='teal')
+    ax.set_title('Monthly Sales Trend')
+    ax.set_xlabel('Month-Year')
+    ax.set_ylabel('Total Sales')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    return figure_bytes(fig, fmt)
+
+
+def render_churn_distribution(counts, fmt="png", width=8, height=6) -> bytes:
+    """
+    Pie chart of retained vs churned customers. counts: {"Not Churned": n, "Churned": n}
+    """
+    fig = new_figure(figsize=(width, height))
+    ax = fig.subplots()
+    ax.pie(
+        list(counts.values()),
+        labels=list(counts.keys()),
+        autopct='%1.1f%%',
+        startangle=90,
+        colors=['lightblue', 'salmon'],
+        explode=[0, 0.1],  # Highlight Churned
+        textprops={'fontsize': 12}
+    )
+    ax.set_title('Churn Distribution', fontsize=16)
+    return figure_bytes(fig, fmt)
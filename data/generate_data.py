@@ -1,102 +1,452 @@
-import pandas as pd
+"""
+합성 고객/상품/구매 데이터 생성기.
+
+행 단위 파이썬 루프 대신 NumPy로 한 번에 생성하고, 구매 데이터는 shard_rows 단위 샤드로 나눠
+여러 프로세스에서 만든다. 샤드마다 SeedSequence에서 파생한 난수 스트림을 쓰므로
+같은 seed/end-date/크기라면 워커 수와 관계없이 같은 데이터가 나온다.
+
+- 고객마다 가입일, 구매 성향(감마 분포), 이탈 시점(지수 분포 수명)이 있고 활동 기간 안에서만 구매한다.
+- 구매일은 연말/겨울과 주말에 몰리는 계절성 가중치를 따른다.
+- 출력은 CSV(샤드 파일을 순서대로 이어 붙임) 또는 dataset_store.columnar 형식(메모리 매핑 배열에 샤드별로 기록).
+
+    python generate_data.py                                   # 기존과 같이 현재 디렉터리에 400명/2,500건 CSV
+    python -m data.generate_data --customers 100000 --purchases 10000000 --workers 4 --output ./data
+    python -m data.generate_data --purchases 100000000 --format columnar --output ./data/columnar
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-from faker import Faker
-import random
-from datetime import datetime, timedelta
+import pandas as pd
+
+
+KOREAN_DOMAINS = ["naver.com", "daum.net", "gmail.com", "hanmail.net", "kakao.com"]
+# 성/이름 음절과 아이디에 쓰는 로마자 표기
+SURNAMES = [
+    ("김", "gim"), ("이", "i"), ("박", "bak"), ("최", "choe"), ("정", "jeong"), ("강", "gang"), ("조", "jo"),
+    ("윤", "yun"), ("장", "jang"), ("임", "im"), ("한", "han"), ("오", "o"), ("서", "seo"), ("신", "sin"),
+    ("권", "gwon"), ("황", "hwang"), ("안", "an"), ("송", "song"), ("류", "ryu"), ("홍", "hong"),
+]
+GIVEN_SYLLABLES = [
+    ("민", "min"), ("서", "seo"), ("지", "ji"), ("현", "hyeon"), ("준", "jun"), ("우", "u"), ("영", "yeong"),
+    ("수", "su"), ("정", "jeong"), ("은", "eun"), ("하", "ha"), ("진", "jin"), ("예", "ye"), ("도", "do"),
+    ("성", "seong"), ("혜", "hye"), ("경", "gyeong"), ("희", "hui"), ("호", "ho"), ("광", "gwang"),
+]
+LOCATIONS = [
+    "서울특별시 강남구", "서울특별시 송파구", "서울특별시 마포구", "서울특별시 노원구", "부산광역시 해운대구",
+    "부산광역시 사하구", "대구광역시 수성구", "인천광역시 연수구", "광주광역시 서구", "대전광역시 유성구",
+    "울산광역시 남구", "세종특별자치시", "수원시 영통구", "성남시 분당구", "고양시 일산동구", "용인시 수지구",
+    "부천시 원미구", "안산시 단원구", "안양시 동안구", "남양주시", "화성시", "청주시 흥덕구", "천안시 동남구",
+    "전주시 완산구", "포항시 북구", "창원시 성산구", "김해시", "제주시", "춘천시", "홍성군",
+]
+CATALOG = {
+    "Beer": {
+        "Cass": 1400,
+        "Terra": 1980,
+        "Asahi": 3000,
+        "Corona": 2650,
+        "Tiger": 3000,
+        "Sapporo": 3000,
+        "Kirin Ichibang": 3000,
+        "Hite": 2170,
+        "Kelly": 2170,
+        "Guinness": 3000
+    },
+    "Wine": {
+        "Ruffino Lumina Pinot Grigio": 39000,
+        "Meiomi Pinot Noir": 90000,
+        "Bontara Merlot": 65000,
+        "Sonoma Estate Cabernet Sauvignon": 85000,
+        "19 Crimes Red Blend": 67200,
+        "David's Nadia Chenin Blanc 2017": 61800,
+        "100 Hectares Grande Reserva Branco": 60000,
+        "Gunderloch Riesling Royal Blue": 85000,
+        "Fleur de Mer Rosé": 36000,
+        "Louis Jadot Bourgogne Chardonnay": 35000
+    },
+    "Whiskey": {
+        "Ballantine's 12 Year": 49000,
+        "Ballantine's 21 Year": 177000,
+        "Ballantine's 30 Year": 524900,
+        "Glenfiddich 12 Year": 67500,
+        "Glenfiddich 21 Year": 279000,
+        "Glenfiddich 30 Year": 1250000,
+        "Johnnie Walker Green Label": 69000,
+        "Johnnie Walker Black Label": 39000,
+        "Johnnie Walker Blue Label": 338000,
+        "Johnnie Walker Red Label": 22000
+    }
+}
+# 카테고리별 (구매 빈도 가중치, 수량 이항분포 p): 맥주는 자주 여러 병, 위스키는 드물게 한두 병
+CATEGORY_BEHAVIOR = {"Beer": (3.0, 0.5), "Wine": (1.2, 0.3), "Whiskey": (0.8, 0.15)}
+
+SIGNUP_DAYS = 730  # 가입일: 종료일 이전 2년
+HISTORY_DAYS = 365  # 구매일: 종료일 이전 1년
+MEAN_LIFETIME_DAYS = 240  # 가입 후 이탈까지 평균 일수
+SHARD_ROWS = 500_000
+PURCHASE_COLUMNS = ["purchaseID", "CustomerID", "ProductID", "Quantity", "Price (KRW)", "TotalAmount", "purchaseDate", "Satisfaction"]
+
+
+def _streams(seed: int) -> dict:
+    # 용도별 독립 난수 스트림. 구매 스트림은 샤드 번호별로 다시 나눈다
+    names = ["customers", "products", "activity", "purchases", "profile"]
+    return dict(zip(names, np.random.SeedSequence(seed).spawn(len(names))))
+
+
+def _uuid4_strings(rng: np.random.Generator, count: int) -> np.ndarray:
+    # 16바이트 난수에 버전/변형 비트를 넣고 16진수 문자로 펼쳐 "8-4-4-4-12" 형식의 S36 배열을 만든다
+    raw = rng.integers(0, 256, (count, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    digits = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+    hex_chars = np.empty((count, 32), dtype=np.uint8)
+    hex_chars[:, 0::2] = digits[raw >> 4]
+    hex_chars[:, 1::2] = digits[raw & 0x0F]
+    out = np.full((count, 36), ord("-"), dtype=np.uint8)
+    positions = np.r_[0:8, 9:13, 14:18, 19:23, 24:36]
+    out[:, positions] = hex_chars
+    return out.view("S36").ravel()
+
+
+def _end_date(end_date=None) -> pd.Timestamp:
+    return pd.Timestamp(end_date).normalize() if end_date is not None else pd.Timestamp.today().normalize()
 
-# Faker 초기화
-fake = Faker('ko_KR')
 
 # 1. 고객 데이터 생성
-def generate_customers(num_customers=400):
-    customers = []
-    korean_domains = ["naver.com", "daum.net", "gmail.com", "hanmail.net", "kakao.com"]
-    for _ in range(num_customers):
-        local_part = fake.user_name()
-        domain = random.choice(korean_domains)
-        customer_id = f"{local_part}@{domain}"
-        name = fake.name()
-        age = random.randint(18, 70)
-        gender = random.choice(["M", "F"])
-        location = fake.city()
-        signup_date = fake.date_between(start_date="-2y", end_date="today")
-        customers.append([customer_id, name, age, gender, location, signup_date])
-    return pd.DataFrame(customers, columns=["CustomerID", "Name", "Age", "Gender", "Location", "SignupDate"])
+def generate_customers(num_customers=400, seed=42, end_date=None):
+    rng = np.random.default_rng(_streams(seed)["customers"])
+    end = _end_date(end_date)
+
+    surname = rng.integers(0, len(SURNAMES), num_customers)
+    first = rng.integers(0, len(GIVEN_SYLLABLES), num_customers)
+    second = rng.integers(0, len(GIVEN_SYLLABLES), num_customers)
+    surnames_ko, surnames_en = map(np.array, zip(*SURNAMES))
+    given_ko, given_en = map(np.array, zip(*GIVEN_SYLLABLES))
+
+    names = pd.Series(surnames_ko[surname]) + given_ko[first] + given_ko[second]
+    # 같은 이름이 많으므로 아이디 뒤에 고객 번호를 붙여 CustomerID가 겹치지 않게 한다
+    local_part = pd.Series(given_en[first]) + given_en[second] + surnames_en[surname] + np.arange(num_customers).astype(str)
+    domain = np.array(KOREAN_DOMAINS)[rng.integers(0, len(KOREAN_DOMAINS), num_customers)]
+
+    return pd.DataFrame({
+        "CustomerID": local_part + "@" + domain,
+        "Name": names,
+        "Age": np.clip(np.rint(rng.normal(40, 12, num_customers)), 18, 70).astype(np.int64),
+        "Gender": np.where(rng.random(num_customers) < 0.5, "M", "F"),
+        "Location": np.array(LOCATIONS)[rng.integers(0, len(LOCATIONS), num_customers)],
+        "SignupDate": (end - pd.to_timedelta(rng.integers(0, SIGNUP_DAYS, num_customers), unit="D")).strftime("%Y-%m-%d"),
+    })
+
 
 # 2. 상품 데이터 생성
+def generate_products(seed=42):
+    rng = np.random.default_rng(_streams(seed)["products"])
+    rows = [
+        (product_name, category, price)
+        for category, products_info in CATALOG.items()
+        for product_name, price in products_info.items()
+    ]
+    product_ids = [str(uuid.UUID(bytes=bytes(value), version=4)) for value in rng.integers(0, 256, (len(rows), 16), dtype=np.uint8)]
+    return pd.DataFrame(
+        [(product_id, *row) for product_id, row in zip(product_ids, rows)],
+        columns=["ProductID", "ProductName", "Category", "Price (KRW)"],
+    )
+
+
+def _day_weights(start: pd.Timestamp, days: int) -> np.ndarray:
+    # 계절성: 겨울에 높고 여름에 낮은 연간 주기 + 12월 후반 연말 수요 + 금/토 주말 수요
+    dates = pd.date_range(start, periods=days, freq="D")
+    day_of_year = dates.dayofyear.to_numpy()
+    weights = 1 + 0.15 * np.cos(2 * np.pi * (day_of_year - 355) / 365.25)
+    weights += 0.35 * ((dates.month == 12) & (dates.day >= 15))
+    weights += 0.25 * np.isin(dates.dayofweek, [4, 5])
+    return weights
+
+
+def customer_activity(customers: pd.DataFrame, seed=42, end_date=None) -> dict:
+    """
+    고객별 구매 가능 기간(구매 기간 시작일 기준 일 번호)과 고객 선택 누적 가중치.
+    """
+    rng = np.random.default_rng(_streams(seed)["activity"])
+    end = _end_date(end_date)
+    start = end - pd.Timedelta(days=HISTORY_DAYS - 1)
+    count = len(customers)
+
+    signup = (pd.to_datetime(customers["SignupDate"]) - start).dt.days.to_numpy()
+    lifetime = rng.exponential(MEAN_LIFETIME_DAYS, count).astype(np.int64)
+    first_day = np.maximum(signup, 0)
+    last_day = np.minimum(signup + lifetime, HISTORY_DAYS - 1)
+    active_days = np.maximum(last_day - first_day + 1, 0)
+
+    # 구매 성향(주당 구매율)은 소수의 단골이 많이 사는 긴 꼬리 분포
+    propensity = rng.gamma(0.8, 1.0, count)
+    weights = propensity * active_days
+    if weights.sum() == 0:
+        first_day, last_day, weights = np.zeros(count, np.int64), np.full(count, HISTORY_DAYS - 1), np.ones(count)
+
+    return {
+        "start": np.datetime64(start.date(), "D"),
+        "first_day": first_day,
+        "last_day": last_day,
+        "cumulative_weights": np.cumsum(weights),
+        "cumulative_day_weights": np.cumsum(_day_weights(start, HISTORY_DAYS)),
+    }
+
 
-def generate_products():
-    categories = {
-        "Beer": {
-            "Cass": 1400, 
-            "Terra": 1980, 
-            "Asahi": 3000, 
-            "Corona": 2650, 
-            "Tiger": 3000,
-            "Sapporo": 3000, 
-            "Kirin Ichibang": 3000, 
-            "Hite": 2170, 
-            "Kelly": 2170,
-            "Guinness": 3000
-        },
-        "Wine": {
-            "Ruffino Lumina Pinot Grigio": 39000,
-            "Meiomi Pinot Noir": 90000,
-            "Bontara Merlot": 65000,
-            "Sonoma Estate Cabernet Sauvignon": 85000,
-            "19 Crimes Red Blend": 67200,
-            "David's Nadia Chenin Blanc 2017": 61800,
-            "100 Hectares Grande Reserva Branco": 60000,
-            "Gunderloch Riesling Royal Blue": 85000,
-            "Fleur de Mer Rosé": 36000,
-            "Louis Jadot Bourgogne Chardonnay": 35000
-        },
-        "Whiskey": {
-            "Ballantine's 12 Year": 49000,
-            "Ballantine's 21 Year": 177000,
-            "Ballantine's 30 Year": 524900,
-            "Glenfiddich 12 Year": 67500,
-            "Glenfiddich 21 Year": 279000,
-            "Glenfiddich 30 Year": 1250000,
-            "Johnnie Walker Green Label": 69000,
-            "Johnnie Walker Black Label": 39000,
-            "Johnnie Walker Blue Label": 338000,
-            "Johnnie Walker Red Label": 22000
-        }
+def _product_profile(products: pd.DataFrame, seed: int) -> dict:
+    rng = np.random.default_rng(_streams(seed)["profile"])
+    behavior = products["Category"].map(CATEGORY_BEHAVIOR)
+    popularity = np.array([weight for weight, _ in behavior]) * rng.gamma(2.0, 1.0, len(products))
+    return {
+        "cumulative_weights": np.cumsum(popularity),
+        "quantity_p": np.array([p for _, p in behavior]),
+        "satisfaction_mean": rng.normal(6.0, 1.0, len(products)),
+        "price": products["Price (KRW)"].to_numpy(dtype=np.int64),
     }
 
-    products = []
-    for category, products_info in categories.items():
-        for product_name, price in products_info.items():
-            product_id = fake.uuid4()  # 고유 ID 생성
-            products.append([product_id, product_name, category, price])
 
-    return pd.DataFrame(products, columns=["ProductID", "ProductName", "Category", "Price (KRW)"])
+def _purchase_arrays(rng: np.random.Generator, rows: int, activity: dict, profile: dict) -> dict:
+    # 고객: 성향 × 활동 일수에 비례해 선택
+    customer_weights = activity["cumulative_weights"]
+    customer = np.searchsorted(customer_weights, rng.random(rows) * customer_weights[-1], side="right")
+    customer = np.minimum(customer, len(customer_weights) - 1)
+
+    # 구매일: 고객의 활동 기간 안에서 계절성 가중치의 역누적분포로 추출
+    day_weights = activity["cumulative_day_weights"]
+    lower = np.where(activity["first_day"][customer] > 0, day_weights[np.maximum(activity["first_day"][customer] - 1, 0)], 0.0)
+    upper = day_weights[activity["last_day"][customer]]
+    day = np.searchsorted(day_weights, lower + rng.random(rows) * (upper - lower), side="right")
+    day = np.clip(day, activity["first_day"][customer], activity["last_day"][customer])
+
+    product_weights = profile["cumulative_weights"]
+    product = np.minimum(
+        np.searchsorted(product_weights, rng.random(rows) * product_weights[-1], side="right"),
+        len(product_weights) - 1,
+    )
+    quantity = 1 + rng.binomial(4, profile["quantity_p"][product])
+    satisfaction = np.clip(np.rint(profile["satisfaction_mean"][product] + rng.normal(0, 2, rows)), 1, 10)
+    price = profile["price"][product]
+
+    return {
+        "purchaseID": _uuid4_strings(rng, rows),
+        "customer": customer,
+        "product": product,
+        "Quantity": quantity.astype(np.int64),
+        "Price (KRW)": price,
+        "TotalAmount": quantity * price,
+        "purchaseDate": activity["start"] + day.astype("timedelta64[D]"),
+        "Satisfaction": satisfaction.astype(np.int64),
+    }
+
 
 # 3. 구매 데이터 생성
-def generate_purchases(customers, products, num_purchases=2500):
-    purchases = []
-    for _ in range(num_purchases):
-        purchase_id = fake.uuid4()
-        customer_id = random.choice(customers["CustomerID"])
-        product = products.sample(1).iloc[0]
-        product_id = product["ProductID"]
-        quantity = random.randint(1, 5)
-        price = product["Price (KRW)"]
-        total_amount = round(quantity * price, 2)
-        purchase_date = fake.date_between(start_date="-1y", end_date="today")
-        satisfaction = random.randint(1,10)
-        purchases.append([purchase_id, customer_id, product_id, quantity, price, total_amount, purchase_date, satisfaction])
-    return pd.DataFrame(purchases, columns=["purchaseID", "CustomerID", "ProductID", "Quantity", "Price (KRW)", "TotalAmount", "purchaseDate", "Satisfaction"])
-
-# 데이터 생성
-customers = generate_customers(400)
-products = generate_products()
-purchases = generate_purchases(customers, products, 2500)
-
-# 데이터 저장 또는 확인
-customers.to_csv("customers.csv", index=False)
-products.to_csv("products.csv", index=False)
-purchases.to_csv("purchases.csv", index=False)
-
-print("데이터 생성 완료!")
+def generate_purchases(customers, products, num_purchases=2500, seed=42, end_date=None):
+    """
+    메모리에 한 번에 만드는 구매 데이터 (작은 데이터용). 큰 데이터는 write_dataset을 사용한다.
+    """
+    activity = customer_activity(customers, seed, end_date)
+    profile = _product_profile(products, seed)
+    starts = range(0, num_purchases, SHARD_ROWS)
+    seed_sequences = _streams(seed)["purchases"].spawn(len(starts))
+    frames = []
+    for start, seed_sequence in zip(starts, seed_sequences):
+        rng = np.random.default_rng(seed_sequence)
+        arrays = _purchase_arrays(rng, min(SHARD_ROWS, num_purchases - start), activity, profile)
+        frames.append(_purchase_frame(arrays, customers["CustomerID"].to_numpy(), products["ProductID"].to_numpy()))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=PURCHASE_COLUMNS)
+
+
+def _purchase_frame(arrays: dict, customer_ids: np.ndarray, product_ids: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({
+        "purchaseID": arrays["purchaseID"].astype(str),
+        "CustomerID": customer_ids[arrays["customer"]],
+        "ProductID": product_ids[arrays["product"]],
+        "Quantity": arrays["Quantity"],
+        "Price (KRW)": arrays["Price (KRW)"],
+        "TotalAmount": arrays["TotalAmount"],
+        "purchaseDate": np.datetime_as_string(arrays["purchaseDate"], unit="D"),
+        "Satisfaction": arrays["Satisfaction"],
+    })
+
+
+def _write_shard(task: dict) -> int:
+    """
+    프로세스 풀 워커: 샤드 하나를 만들어 CSV 조각 파일 또는 컬럼 배열의 해당 구간에 기록.
+    """
+    work_dir = task["work_dir"]
+    activity = {name: np.load(os.path.join(work_dir, f"activity.{name}.npy"), mmap_mode="r")
+                for name in ("first_day", "last_day", "cumulative_weights", "cumulative_day_weights")}
+    activity["start"] = np.datetime64(task["start"], "D")
+    profile = _product_profile(pd.read_csv(os.path.join(work_dir, "products.csv")), task["seed"])
+    rng = np.random.default_rng(task["seed_sequence"])
+    arrays = _purchase_arrays(rng, task["rows"], activity, profile)
+
+    if task["format"] == "csv":
+        customer_ids = np.load(os.path.join(work_dir, "customer_ids.npy"), mmap_mode="r")
+        product_ids = pd.read_csv(os.path.join(work_dir, "products.csv"))["ProductID"].to_numpy()
+        _purchase_frame(arrays, customer_ids, product_ids).to_csv(
+            os.path.join(work_dir, f"purchases.part-{task['shard']:05d}.csv"), index=False, header=False
+        )
+    else:
+        from dataset_store.columnar import column_file_name
+
+        offset, end = task["offset"], task["offset"] + task["rows"]
+        sources = {"CustomerID": arrays["customer"], "ProductID": arrays["product"]}
+        for column in PURCHASE_COLUMNS:
+            output = np.load(os.path.join(task["output_dir"], "purchases", f"{column_file_name(column)}.npy"), mmap_mode="r+")
+            output[offset:end] = sources.get(column, arrays.get(column))
+            output.flush()
+    return task["rows"]
+
+
+def _write_columnar_dimensions(output_dir: str, customers: pd.DataFrame, products: pd.DataFrame, purchases: int) -> dict:
+    """
+    customers/products 테이블과 purchases 컬럼 파일(빈 메모리 매핑 배열)을 만들고 manifest를 반환.
+    """
+    from dataset_store.columnar import SCHEMA, code_dtype, column_file_name
+
+    manifest = {"created_at": pd.Timestamp.now().isoformat(), "tables": {}}
+    for table, frame in (("customers", customers), ("products", products)):
+        table_dir = os.path.join(output_dir, table)
+        os.makedirs(table_dir)
+        columns = {}
+        for column, (kind, arg) in SCHEMA[table].items():
+            entry = {"kind": kind, "file": f"{column_file_name(column)}.npy"}
+            values = frame[column]
+            if kind in ("id", "category"):
+                codes, dictionary = (np.arange(len(values)), values.astype(str).to_numpy()) if kind == "id" \
+                    else pd.factorize(values.astype(str))
+                entry["dictionary"] = f"{column_file_name(column)}.dict.npy"
+                np.save(os.path.join(table_dir, entry["dictionary"]), np.asarray(dictionary).astype(str))
+                np.save(os.path.join(table_dir, entry["file"]), codes.astype(code_dtype(len(dictionary))))
+            elif kind == "int":
+                np.save(os.path.join(table_dir, entry["file"]), values.to_numpy(dtype=arg))
+            else:
+                np.save(os.path.join(table_dir, entry["file"]), pd.to_datetime(values).to_numpy().astype("datetime64[D]"))
+            columns[column] = entry
+        manifest["tables"][table] = {"rows": len(frame), "columns": columns}
+
+    table_dir = os.path.join(output_dir, "purchases")
+    os.makedirs(table_dir)
+    columns = {}
+    dtypes = {
+        "purchaseID": "S36",
+        "CustomerID": code_dtype(len(customers)),
+        "ProductID": code_dtype(len(products)),
+        "purchaseDate": "datetime64[D]",
+    }
+    for column, (kind, arg) in SCHEMA["purchases"].items():
+        entry = {"kind": kind, "file": f"{column_file_name(column)}.npy"}
+        if kind == "ref":
+            entry["references"] = arg
+        np.lib.format.open_memmap(
+            os.path.join(table_dir, entry["file"]), mode="w+", dtype=dtypes.get(column, arg), shape=(purchases,)
+        ).flush()
+        columns[column] = entry
+    manifest["tables"]["purchases"] = {"rows": purchases, "columns": columns}
+    return manifest
+
+
+def write_dataset(output_dir: str, num_customers: int, num_purchases: int, seed: int = 42, end_date=None,
+                  output_format: str = "csv", workers: int = None, shard_rows: int = SHARD_ROWS) -> dict:
+    """
+    고객/상품/구매 데이터를 output_dir에 기록. 구매 데이터는 샤드 단위로 워커 프로세스에서 만들고,
+    워커 하나가 한 번에 들고 있는 행은 shard_rows개로 제한된다.
+    """
+    if output_format not in ("csv", "columnar"):
+        raise ValueError(f"지원하지 않는 출력 형식입니다: {output_format}")
+    end = _end_date(end_date)
+    customers = generate_customers(num_customers, seed, end)
+    products = generate_products(seed)
+    activity = customer_activity(customers, seed, end)
+
+    os.makedirs(output_dir, exist_ok=True)
+    # 컬럼 형식은 convert_to_columnar와 같이 임시 디렉터리에 만든 뒤 교체
+    target_dir = f"{output_dir.rstrip(os.sep)}.tmp" if output_format == "columnar" else output_dir
+    if output_format == "columnar":
+        shutil.rmtree(target_dir, ignore_errors=True)
+        os.makedirs(target_dir)
+    work_dir = os.path.join(target_dir, ".generate")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+
+    for name in ("first_day", "last_day", "cumulative_weights", "cumulative_day_weights"):
+        np.save(os.path.join(work_dir, f"activity.{name}.npy"), activity[name])
+    np.save(os.path.join(work_dir, "customer_ids.npy"), customers["CustomerID"].to_numpy().astype(str))
+    products.to_csv(os.path.join(work_dir, "products.csv"), index=False)
+
+    if output_format == "csv":
+        customers.to_csv(os.path.join(target_dir, "customers.csv"), index=False)
+        products.to_csv(os.path.join(target_dir, "products.csv"), index=False)
+        manifest = None
+    else:
+        manifest = _write_columnar_dimensions(target_dir, customers, products, num_purchases)
+
+    shard_count = (num_purchases + shard_rows - 1) // shard_rows
+    seed_sequences = _streams(seed)["purchases"].spawn(shard_count)
+    tasks = [{
+        "shard": shard,
+        "offset": shard * shard_rows,
+        "rows": min(shard_rows, num_purchases - shard * shard_rows),
+        "seed": seed,
+        "seed_sequence": seed_sequences[shard],
+        "start": str(activity["start"]),
+        "format": output_format,
+        "work_dir": work_dir,
+        "output_dir": target_dir,
+    } for shard in range(shard_count)]
+
+    workers = max(1, min(workers or os.cpu_count() or 1, shard_count or 1))
+    if workers == 1:
+        written = sum(map(_write_shard, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            written = sum(pool.map(_write_shard, tasks))
+
+    if output_format == "csv":
+        # 샤드 조각을 순서대로 이어 붙여 purchases.csv 하나로 만든다
+        with open(os.path.join(target_dir, "purchases.csv"), "wb") as out:
+            out.write((",".join(PURCHASE_COLUMNS) + "\n").encode())
+            for task in tasks:
+                part = os.path.join(work_dir, f"purchases.part-{task['shard']:05d}.csv")
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out, 1 << 24)
+                os.remove(part)
+        shutil.rmtree(work_dir)
+    else:
+        shutil.rmtree(work_dir)
+        with open(os.path.join(target_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.replace(target_dir, output_dir)
+
+    return {"customers": len(customers), "products": len(products), "purchases": written, "shards": shard_count, "workers": workers}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=400)
+    parser.add_argument("--purchases", type=int, default=2500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", default=None, help="구매 기간 종료일 (기본: 오늘)")
+    parser.add_argument("--format", choices=["csv", "columnar"], default="csv")
+    parser.add_argument("--output", default=".")
+    parser.add_argument("--workers", type=int, default=None, help="기본: CPU 수")
+    parser.add_argument("--shard-rows", type=int, default=SHARD_ROWS)
+    args = parser.parse_args()
+
+    if args.format == "columnar":
+        # 스크립트로 실행할 때도 dataset_store 패키지를 찾도록 저장소 루트를 경로에 추가
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    started = time.perf_counter()
+    result = write_dataset(args.output, args.customers, args.purchases, args.seed, args.end_date,
+                           args.format, args.workers, args.shard_rows)
+    print(f"데이터 생성 완료! {result} ({time.perf_counter() - started:.1f}s)")
@@ -0,0 +1,219 @@
+"""
+data/ 의 CSV를 컬럼 단위 NPY 형식으로 변환하고 메모리 매핑으로 읽는다.
+
+    <output>/manifest.json
+    <output>/<table>/<column>.npy        값 또는 사전 코드
+    <output>/<table>/<column>.dict.npy   사전(고정 폭 문자열)
+
+CustomerID/ProductID는 customers/products 행 순서의 정수 코드로, Category/Gender/Location 등은
+범주형 코드로, 수치 컬럼은 스키마의 작은 정수형으로 저장한다.
+
+    python -m dataset_store.columnar --data-dir ./data --output ./data/columnar
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# 컬럼 종류: id(고유 키 사전), ref(다른 테이블 id 코드), category, int, date, bytes
+SCHEMA = {
+    "customers": {
+        "CustomerID": ("id", None),
+        "Name": ("category", None),
+        "Age": ("int", "int8"),
+        "Gender": ("category", None),
+        "Location": ("category", None),
+        "SignupDate": ("date", None),
+    },
+    "products": {
+        "ProductID": ("id", None),
+        "ProductName": ("category", None),
+        "Category": ("category", None),
+        "Price (KRW)": ("int", "int32"),
+    },
+    "purchases": {
+        "purchaseID": ("bytes", None),
+        "CustomerID": ("ref", "customers"),
+        "ProductID": ("ref", "products"),
+        "Quantity": ("int", "int8"),
+        "Price (KRW)": ("int", "int32"),
+        "TotalAmount": ("int", "int32"),
+        "purchaseDate": ("date", None),
+        "Satisfaction": ("int", "int8"),
+    },
+}
+# 참조 대상 테이블을 먼저 변환
+TABLE_ORDER = ["customers", "products", "purchases"]
+CHUNK_ROWS = 1_000_000
+
+
+def column_file_name(column: str) -> str:
+    return column.replace(" ", "_").replace("(", "").replace(")", "")
+
+
+def _downcast(values: pd.Series, dtype: str, column: str) -> np.ndarray:
+    info = np.iinfo(dtype)
+    if len(values) and (values.min() < info.min or values.max() > info.max):
+        raise ValueError(f"{column} 값이 {dtype} 범위를 벗어납니다.")
+    return values.to_numpy(dtype=dtype)
+
+
+def code_dtype(size: int) -> str:
+    for dtype in ("int8", "int16", "int32"):
+        if size < np.iinfo(dtype).max:
+            return dtype
+    return "int64"
+
+
+def _count_rows(path: str) -> int:
+    with open(path, "rb") as f:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 24), b"")) - 1
+
+
+def convert_to_columnar(data_dir: str = "./data", output_dir: str = None) -> dict:
+    """
+    세 CSV를 컬럼 형식으로 변환하고 manifest를 반환.
+    purchases는 CHUNK_ROWS 단위로 읽어 미리 할당한 메모리 매핑 배열에 채우므로 메모리 사용량이 일정하다.
+    """
+    output_dir = output_dir or os.path.join(data_dir, "columnar")
+    temp_dir = f"{output_dir}.tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+
+    manifest = {"created_at": pd.Timestamp.now().isoformat(), "tables": {}}
+    id_dictionaries = {}
+
+    for table in TABLE_ORDER:
+        schema = SCHEMA[table]
+        source = os.path.join(data_dir, f"{table}.csv")
+        rows = _count_rows(source)
+        table_dir = os.path.join(temp_dir, table)
+        os.makedirs(table_dir)
+
+        if table != "purchases":
+            frame = pd.read_csv(source)
+            if table == "customers":
+                frame = frame.drop_duplicates("CustomerID").reset_index(drop=True)
+            rows = len(frame)
+            chunks = [frame]
+        else:
+            chunks = pd.read_csv(source, chunksize=CHUNK_ROWS)
+
+        columns = {}
+        outputs = {}
+        categories = {}
+        offset = 0
+        for chunk in chunks:
+            for column, (kind, arg) in schema.items():
+                values = chunk[column]
+                if kind == "id":
+                    id_dictionaries[table] = pd.Index(values.astype(str))
+                    encoded = np.arange(len(values), dtype=code_dtype(len(values)))
+                elif kind == "ref":
+                    dictionary = id_dictionaries[arg]
+                    encoded = dictionary.get_indexer(values.astype(str)).astype(code_dtype(len(dictionary)))
+                elif kind == "category":
+                    # 청크마다 새 범주가 나올 수 있으므로 누적 사전에 이어 붙인다
+                    known = categories.setdefault(column, pd.Index([], dtype=object))
+                    new = pd.Index(values.astype(str).unique()).difference(known)
+                    known = categories[column] = known.append(new)
+                    encoded = known.get_indexer(values.astype(str))
+                elif kind == "int":
+                    encoded = _downcast(values, arg, column)
+                elif kind == "date":
+                    encoded = pd.to_datetime(values).to_numpy().astype("datetime64[D]")
+                else:
+                    encoded = values.astype(str).to_numpy().astype("S")
+
+                if column not in outputs:
+                    dtype = encoded.dtype if kind != "category" else "int32"
+                    if kind == "bytes":
+                        dtype = f"S{max(encoded.dtype.itemsize, 36)}"
+                    path = os.path.join(table_dir, f"{column_file_name(column)}.npy")
+                    outputs[column] = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(rows,))
+                outputs[column][offset:offset + len(chunk)] = encoded
+            offset += len(chunk)
+
+        for column, (kind, arg) in schema.items():
+            entry = {"kind": kind, "file": f"{column_file_name(column)}.npy"}
+            if kind == "id":
+                dictionary = id_dictionaries[table].to_numpy().astype(str)
+                entry["dictionary"] = f"{column_file_name(column)}.dict.npy"
+                np.save(os.path.join(table_dir, entry["dictionary"]), dictionary)
+            elif kind == "ref":
+                entry["references"] = arg
+            elif kind == "category":
+                # 코드 폭을 범주 수에 맞게 줄인다
+                dictionary = categories[column].to_numpy().astype(str)
+                entry["dictionary"] = f"{column_file_name(column)}.dict.npy"
+                np.save(os.path.join(table_dir, entry["dictionary"]), dictionary)
+                codes = np.asarray(outputs[column]).astype(code_dtype(len(dictionary)))
+                del outputs[column]
+                np.save(os.path.join(table_dir, entry["file"]), codes)
+            columns[column] = entry
+        for output in outputs.values():
+            output.flush()
+
+        manifest["tables"][table] = {"rows": rows, "columns": columns}
+
+    with open(os.path.join(temp_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(temp_dir, output_dir)
+    return manifest
+
+
+def load_columnar(columnar_dir: str, mmap: bool = True, include_bytes: bool = False) -> dict:
+    """
+    컬럼 형식 데이터를 DataFrame으로 로드. 수치/코드 배열은 가능한 한 메모리 매핑으로 읽는다.
+    CustomerID/ProductID는 customers/products와 같은 범주를 공유하는 Categorical로 복원되므로
+    기존 merge가 문자열 대신 정수 코드로 조인된다.
+    purchaseID 같은 고유 문자열(bytes) 컬럼은 분석에 쓰이지 않으므로 include_bytes일 때만 읽는다.
+    """
+    with open(os.path.join(columnar_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    mmap_mode = "r" if mmap else None
+    dictionaries = {}
+    tables = {}
+    for table in TABLE_ORDER:
+        table_dir = os.path.join(columnar_dir, table)
+        data = {}
+        for column, entry in manifest["tables"][table]["columns"].items():
+            values = np.load(os.path.join(table_dir, entry["file"]), mmap_mode=mmap_mode)
+            kind = entry["kind"]
+            if kind == "bytes" and not include_bytes:
+                continue
+            if kind in ("id", "category"):
+                dictionary = pd.Index(np.load(os.path.join(table_dir, entry["dictionary"])), dtype=object)
+                if kind == "id":
+                    dictionaries[table] = dictionary
+                data[column] = pd.Categorical.from_codes(values, categories=dictionary, validate=False)
+            elif kind == "ref":
+                data[column] = pd.Categorical.from_codes(
+                    values, categories=dictionaries[entry["references"]], validate=False
+                )
+            elif kind == "bytes":
+                data[column] = pd.Series(values).str.decode("ascii")
+            else:
+                data[column] = values
+        tables[table] = pd.DataFrame(data, copy=False)
+    return tables
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    manifest = convert_to_columnar(args.data_dir, args.output)
+    rows = {table: info["rows"] for table, info in manifest["tables"].items()}
+    print(f"columnar 변환 완료: {rows} ({time.perf_counter() - started:.1f}s)")
@@ -0,0 +1,77 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from customer_analysis.repository.feature_store import FeatureStore
+from customer_analysis.repository.pca_projection import PcaProjectionStore
+from dataset_store.dataset_store import DatasetStore
+from dataset_store.purchase_ingest import IngestError, PurchaseIngest
+from dataset_store.result_cache import ResultCache
+from instrumentation.controller.readiness_controller import requireReady
+from task_executor.bounded_executor import BoundedExecutor
+
+datasetStoreRouter = APIRouter()
+
+
+def store_status() -> dict:
+    return {
+        **DatasetStore.getInstance().status(),
+        "result_cache": ResultCache.getInstance().status(),
+        "feature_store": FeatureStore.getInstance().status(),
+        "pca_projections": PcaProjectionStore.getInstance().status(),
+    }
+
+
+@datasetStoreRouter.get("/dataset-store/status")
+async def dataset_status():
+    """
+    Report the loaded data version, load time, memory footprint, result cache usage, mapped feature matrices
+    and stored PCA projections.
+    """
+    # 메모리 사용량 계산(deep)과 빌드 중 잡혀 있는 저장소 락 대기는 이벤트 루프 밖의 스레드에서 수행
+    return await BoundedExecutor.getInstance().run_local("dataset", store_status)
+
+
+@datasetStoreRouter.post("/dataset-store/reload", dependencies=[Depends(requireReady)])
+async def reload_dataset(force: bool = False):
+    """
+    Pick up changed data files without restarting the server.
+    """
+    store = DatasetStore.getInstance()
+    executor = BoundedExecutor.getInstance()
+    reloaded = await executor.run_local("dataset", store.reload, force=force)
+    return {"reloaded": reloaded, **await executor.run_local("dataset", store.status)}
+
+
+@datasetStoreRouter.post("/dataset-store/purchases", dependencies=[Depends(requireReady)])
+async def ingest_purchases(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = None,
+    on_error: Literal["reject", "skip"] = "reject",
+):
+    """
+    Bulk-append purchases from a streamed NDJSON or CSV (with header) body, without rewriting purchases.csv.
+    Rows are validated against the known customers, products and catalog prices and committed atomically
+    as a new append-only segment; aggregates, caches and the online churn model pick up only the new rows.
+    A purchaseID that is already committed (or repeated in the body) is rejected as duplicate_purchase_id.
+    on_error=reject (default) commits nothing if any row is invalid; on_error=skip commits the valid rows.
+    The format defaults to csv for a text/csv Content-Type and ndjson otherwise.
+    """
+    store = DatasetStore.getInstance()
+    if store.data_format() == "columnar":
+        raise HTTPException(status_code=409, detail="Ingest is not supported for the columnar dataset format.")
+    format = format or ("csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson")
+
+    # 본문은 배치 단위로 받아 파싱/검증/기록만 스레드에서 수행 (본문 전체를 메모리에 모으지 않는다)
+    executor = BoundedExecutor.getInstance()
+    ingest = PurchaseIngest(format, on_error)
+    try:
+        async for chunk in request.stream():
+            batch = ingest.feed(chunk)
+            if batch is not None:
+                await executor.run_local("ingest", ingest.write, batch)
+        return await executor.run_local("ingest", ingest.finish)
+    except IngestError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    finally:
+        ingest.abort()
@@ -0,0 +1,406 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+from dataset_store.columnar import load_columnar
+
+
+DATASET_FILES = {
+    "products": "products.csv",
+    "purchases": "purchases.csv",
+    "customers": "customers.csv",
+}
+# 수집 API로 추가된 구매 세그먼트(불변 CSV)를 두는 DATA_DIR 아래 디렉터리
+PURCHASE_SEGMENT_DIR = "purchase_segments"
+# stream 형식에서 purchases.csv를 한 번에 읽는 행 수
+PURCHASES_CHUNK_ROWS = 500_000
+HASH_BLOCK_BYTES = 1 << 24
+
+
+def _scan(f, size: Optional[int] = None):
+    """
+    파일 앞 size 바이트(None이면 끝까지)를 블록 단위로 읽어 (sha1, 읽은 바이트 수, 줄 수)를 반환.
+    파일 전체를 메모리에 올리지 않는다.
+    """
+    digest = hashlib.sha1()
+    read = lines = 0
+    while size is None or read < size:
+        block = f.read(HASH_BLOCK_BYTES if size is None else min(HASH_BLOCK_BYTES, size - read))
+        if not block:
+            break
+        digest.update(block)
+        read += len(block)
+        lines += block.count(b"\n")
+    return digest, read, lines
+
+
+class _BoundedReader(io.RawIOBase):
+    """
+    파일 앞 size 바이트만 읽는 reader. 스냅샷 이후 파일 끝에 추가된 행을 읽지 않도록 한다.
+    """
+
+    def __init__(self, f, size: int):
+        self.__file = f
+        self.__remaining = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.__file.read(min(len(buffer), self.__remaining))
+        buffer[:len(data)] = data
+        self.__remaining -= len(data)
+        return len(data)
+
+
+@dataclass(frozen=True, eq=False)
+class DatasetSnapshot:
+    """
+    특정 시점에 로드된 세 개의 CSV 테이블 묶음.
+    여러 요청이 공유하므로 DataFrame을 제자리에서 수정하면 안 된다.
+    """
+    generation: int
+    version: str
+    products: pd.DataFrame
+    purchases: pd.DataFrame
+    customers: pd.DataFrame
+    fingerprint: tuple
+    loaded_at: float
+    load_seconds: float
+    purchases_digest: str
+    purchases_size: int
+    # purchases.csv 끝에 행만 추가된 경우 새로 읽은 행과 직전 세대 번호
+    appended_purchases: Optional[pd.DataFrame] = None
+    parent_generation: Optional[int] = None
+    # stream 형식: purchases는 헤더만 들고 파일의 행 수만 기록한다
+    purchases_rows: Optional[int] = None
+    # purchases.csv 뒤에 이어지는 구매 세그먼트 파일 이름 (커밋 순서)
+    purchase_segments: tuple = ()
+
+    def tables(self) -> dict:
+        return {
+            "products": self.products,
+            "purchases": self.purchases,
+            "customers": self.customers,
+        }
+
+    def memory_bytes(self) -> dict:
+        return {
+            name: int(table.memory_usage(deep=True).sum())
+            for name, table in self.tables().items()
+        }
+
+
+class DatasetStore:
+    """
+    프로세스 전역 데이터셋 저장소.
+    앱 시작 시 한 번 로드하고 모든 Repository 인스턴스가 같은 스냅샷을 공유한다.
+    구매 테이블은 purchases.csv 뒤에 DATA_DIR/purchase_segments/의 세그먼트들을 커밋 순서로 이어 붙인 것이다 (csv/stream 형식).
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__lock = threading.RLock()
+            cls.__instance.__snapshot = None
+            cls.__instance.__listeners = []
+            cls.__instance.__derived_lock = threading.RLock()
+            cls.__instance.__derived = {}
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def data_dir() -> str:
+        return os.getenv("DATA_DIR", "./data")
+
+    @staticmethod
+    def data_format() -> str:
+        # csv: data/*.csv, columnar: dataset_store.columnar로 변환한 COLUMNAR_DIR,
+        # stream: data/*.csv 중 purchases.csv는 메모리에 올리지 않고 청크 단위로 읽는다
+        return os.getenv("DATASET_FORMAT", "csv")
+
+    @staticmethod
+    def chunk_rows() -> int:
+        return int(os.getenv("PURCHASES_CHUNK_ROWS", PURCHASES_CHUNK_ROWS))
+
+    def columnar_dir(self) -> str:
+        return os.getenv("COLUMNAR_DIR", os.path.join(self.data_dir(), "columnar"))
+
+    def segment_dir(self) -> str:
+        return os.path.join(self.data_dir(), PURCHASE_SEGMENT_DIR)
+
+    def segments(self) -> list:
+        """
+        커밋된 구매 세그먼트 파일 이름 (커밋 순서). 쓰는 중인 임시 파일은 '.'으로 시작하므로 제외된다.
+        """
+        try:
+            names = os.listdir(self.segment_dir())
+        except FileNotFoundError:
+            return []
+        return sorted(name for name in names if name.endswith(".csv") and not name.startswith("."))
+
+    def __read_segments(self, names) -> list:
+        return [pd.read_csv(os.path.join(self.segment_dir(), name)) for name in names]
+
+    def __file_paths(self) -> dict:
+        data_dir = self.data_dir()
+        return {name: os.path.join(data_dir, filename) for name, filename in DATASET_FILES.items()}
+
+    def __fingerprint(self) -> tuple:
+        # 파일 크기와 수정 시각으로 데이터 버전을 식별
+        if self.data_format() == "columnar":
+            paths = {"manifest": os.path.join(self.columnar_dir(), "manifest.json")}
+        else:
+            paths = self.__file_paths()
+        fingerprint = []
+        for name, path in sorted(paths.items()):
+            stat = os.stat(path)
+            fingerprint.append((name, stat.st_size, stat.st_mtime_ns))
+        if self.data_format() != "columnar":
+            # 세그먼트는 불변이고 이름이 커밋 순서이므로 개수와 마지막 이름으로 식별
+            segments = self.segments()
+            fingerprint.append(("purchase_segments", len(segments), segments[-1] if segments else ""))
+        return tuple(fingerprint)
+
+    @staticmethod
+    def __segments_of(fingerprint: tuple, segments: list) -> tuple:
+        # fingerprint를 만든 뒤 커밋된 세그먼트는 다음 로드에서 반영한다
+        count = dict((entry[0], entry[1]) for entry in fingerprint).get("purchase_segments", 0)
+        return tuple(segments[:count])
+
+    def __read(self, fingerprint: tuple) -> DatasetSnapshot:
+        if self.data_format() == "columnar":
+            started = time.perf_counter()
+            tables = load_columnar(self.columnar_dir())
+            return self.__snapshot_of(
+                fingerprint, tables, time.perf_counter() - started,
+                purchases_digest="", purchases_size=0,
+            )
+
+        started = time.perf_counter()
+        paths = self.__file_paths()
+        tables = {name: pd.read_csv(path) for name, path in paths.items() if name != "purchases"}
+        segment_names = self.__segments_of(fingerprint, self.segments())
+        if self.data_format() == "stream":
+            tables["purchases"] = pd.read_csv(paths["purchases"], nrows=0)
+            with open(paths["purchases"], "rb") as f:
+                digest, size, lines = _scan(f)
+                f.seek(max(size - 1, 0))
+                unterminated = size > 0 and f.read(1) != b"\n"
+            segment_rows = sum(len(segment) for segment in self.__read_segments(segment_names))
+            return self.__snapshot_of(
+                fingerprint, tables, time.perf_counter() - started,
+                purchases_digest=digest.hexdigest(), purchases_size=size,
+                purchases_rows=max(lines - 1, 0) + int(unterminated) + segment_rows,
+                purchase_segments=segment_names,
+            )
+
+        # 추가 여부 판별용 해시를 위해 purchases는 바이트로 한 번만 읽어 파싱
+        with open(paths["purchases"], "rb") as f:
+            purchases_bytes = f.read()
+        tables["purchases"] = pd.read_csv(io.BytesIO(purchases_bytes))
+        if segment_names:
+            tables["purchases"] = pd.concat(
+                [tables["purchases"], *self.__read_segments(segment_names)], ignore_index=True,
+            )
+        load_seconds = time.perf_counter() - started
+
+        return self.__snapshot_of(
+            fingerprint, tables, load_seconds,
+            purchases_digest=hashlib.sha1(purchases_bytes).hexdigest(),
+            purchases_size=len(purchases_bytes),
+            purchase_segments=segment_names,
+        )
+
+    def __read_appended(self, fingerprint: tuple) -> Optional[DatasetSnapshot]:
+        """
+        products/customers가 그대로이고 purchases.csv 뒤에 행만 추가되었거나 새 구매 세그먼트만 커밋되었다면
+        추가된 부분만 읽어 새 스냅샷을 만든다. 그렇지 않으면 None.
+        """
+        previous = self.__snapshot
+        if self.data_format() == "columnar" or previous.purchases_size == 0:
+            return None
+        unchanged = {entry[0]: entry for entry in previous.fingerprint}
+        for entry in fingerprint:
+            if entry[0] not in ("purchases", "purchase_segments") and unchanged.get(entry[0]) != entry:
+                return None
+
+        started = time.perf_counter()
+        # 세그먼트는 지워지거나 바뀌지 않으므로 이전 목록 뒤에 새 이름만 붙었는지 확인
+        segment_names = self.__segments_of(fingerprint, self.segments())
+        if segment_names[:len(previous.purchase_segments)] != previous.purchase_segments:
+            return None
+        new_segments = self.__read_segments(segment_names[len(previous.purchase_segments):])
+
+        path = self.__file_paths()["purchases"]
+        digest = None
+        appended_bytes = b""
+        if unchanged.get("purchases") not in fingerprint:
+            if os.path.getsize(path) <= previous.purchases_size:
+                return None
+            # 이전 크기까지의 해시만 블록 단위로 확인하고 추가된 부분만 읽는다
+            with open(path, "rb") as f:
+                header = f.readline()
+                f.seek(previous.purchases_size - 1)
+                if f.read(1) != b"\n":
+                    return None
+                f.seek(0)
+                digest, _, _ = _scan(f, previous.purchases_size)
+                if digest.hexdigest() != previous.purchases_digest:
+                    return None
+                appended_bytes = f.read()
+            digest.update(appended_bytes)
+
+        parts = new_segments
+        if appended_bytes:
+            parts = [pd.read_csv(io.BytesIO(header + appended_bytes)), *new_segments]
+        if not parts:
+            return None
+        appended = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        tables = previous.tables()
+        extra = {}
+        if previous.purchases_rows is not None:
+            extra["purchases_rows"] = previous.purchases_rows + len(appended)
+        else:
+            tables["purchases"] = pd.concat([previous.purchases, appended], ignore_index=True)
+        load_seconds = time.perf_counter() - started
+
+        return self.__snapshot_of(
+            fingerprint, tables, load_seconds,
+            purchases_digest=digest.hexdigest() if digest is not None else previous.purchases_digest,
+            purchases_size=previous.purchases_size + len(appended_bytes),
+            appended_purchases=appended,
+            parent_generation=previous.generation,
+            purchase_segments=segment_names,
+            **extra,
+        )
+
+    def __snapshot_of(self, fingerprint: tuple, tables: dict, load_seconds: float, **extra) -> DatasetSnapshot:
+        previous = self.__snapshot
+        return DatasetSnapshot(
+            generation=previous.generation + 1 if previous is not None else 1,
+            version=hashlib.sha1(repr(fingerprint).encode()).hexdigest()[:12],
+            products=tables["products"],
+            purchases=tables["purchases"],
+            customers=tables["customers"],
+            fingerprint=fingerprint,
+            loaded_at=time.time(),
+            load_seconds=load_seconds,
+            **extra,
+        )
+
+    def load(self) -> DatasetSnapshot:
+        """
+        CSV 파일을 다시 읽어 새 스냅샷으로 교체.
+        """
+        with self.__lock:
+            snapshot = self.__read(self.__fingerprint())
+            self.__publish(snapshot)
+            return snapshot
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        데이터 파일이 바뀐 경우에만 다시 로드. 교체 여부를 반환.
+        """
+        with self.__lock:
+            if force or self.__snapshot is None:
+                self.load()
+                return True
+
+            fingerprint = self.__fingerprint()
+            if self.__snapshot.fingerprint == fingerprint:
+                return False
+
+            snapshot = self.__read_appended(fingerprint)
+            if snapshot is None:
+                snapshot = self.__read(fingerprint)
+            self.__publish(snapshot)
+            return True
+
+    def get_snapshot(self) -> DatasetSnapshot:
+        snapshot = self.__snapshot
+        if snapshot is None:
+            with self.__lock:
+                if self.__snapshot is None:
+                    self.load()
+                snapshot = self.__snapshot
+        return snapshot
+
+    def get_derived(self, name: str, builder, appender=None):
+        """
+        스냅샷에서 파생된 값(사실 테이블 등)을 데이터 세대마다 한 번만 만든다.
+        직전 세대에 구매 행만 추가된 경우 appender(이전 값, 스냅샷)로 갱신한다.
+        """
+        snapshot = self.get_snapshot()
+        with self.__derived_lock:
+            entry = self.__derived.get(name)
+            if entry is not None and entry[0] == snapshot.generation:
+                return entry[1]
+
+            if entry is not None and appender is not None and snapshot.appended_purchases is not None \
+                    and snapshot.parent_generation == entry[0]:
+                value = appender(entry[1], snapshot)
+            else:
+                value = builder(snapshot)
+            self.__derived[name] = (snapshot.generation, value)
+            return value
+
+    def purchase_chunks(self, snapshot: DatasetSnapshot, chunk_rows: Optional[int] = None):
+        """
+        스냅샷의 구매 행을 DataFrame 청크로 차례로 반환.
+        stream 형식은 purchases.csv의 스냅샷 시점 크기까지와 스냅샷의 세그먼트들을 chunk_rows 행씩 읽고,
+        그 외에는 로드된 테이블 하나를 반환한다.
+        """
+        if snapshot.purchases_rows is None:
+            yield snapshot.purchases
+            return
+        chunk_rows = chunk_rows or self.chunk_rows()
+        with open(self.__file_paths()["purchases"], "rb") as f:
+            reader = io.BufferedReader(_BoundedReader(f, snapshot.purchases_size), HASH_BLOCK_BYTES)
+            yield from pd.read_csv(reader, chunksize=chunk_rows)
+        for name in snapshot.purchase_segments:
+            yield from pd.read_csv(os.path.join(self.segment_dir(), name), chunksize=chunk_rows)
+
+    def add_listener(self, listener):
+        """
+        스냅샷이 교체될 때 listener(snapshot)을 호출하도록 등록.
+        """
+        with self.__lock:
+            self.__listeners.append(listener)
+
+    def __publish(self, snapshot: DatasetSnapshot):
+        self.__snapshot = snapshot
+        for listener in list(self.__listeners):
+            listener(snapshot)
+
+    def status(self) -> dict:
+        snapshot = self.get_snapshot()
+        memory = snapshot.memory_bytes()
+        return {
+            "generation": snapshot.generation,
+            "version": snapshot.version,
+            "data_dir": self.data_dir(),
+            "format": self.data_format(),
+            "loaded_at": pd.Timestamp(snapshot.loaded_at, unit="s").isoformat(),
+            "load_seconds": snapshot.load_seconds,
+            "appended_rows": len(snapshot.appended_purchases) if snapshot.appended_purchases is not None else 0,
+            "purchase_segments": len(snapshot.purchase_segments),
+            "rows": {
+                name: snapshot.purchases_rows if name == "purchases" and snapshot.purchases_rows is not None else len(table)
+                for name, table in snapshot.tables().items()
+            },
+            "memory_bytes": memory,
+            "total_memory_bytes": sum(memory.values()),
+        }
@@ -0,0 +1,180 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from dataset_store.dataset_store import DatasetStore, DatasetSnapshot
+
+
+def encode_keys(values: pd.Series, dictionary: pd.Index) -> np.ndarray:
+    """
+    키 컬럼을 dictionary 위치 코드(int32, 없는 키는 -1)로 변환.
+    Categorical이면 범주만 조회하고 코드로 펼쳐 문자열 해시를 행마다 하지 않는다.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        positions = dictionary.get_indexer(values.cat.categories).astype(np.int32)
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, positions[codes], -1).astype(np.int32)
+    return dictionary.get_indexer(values).astype(np.int32)
+
+
+@dataclass(frozen=True, eq=False)
+class PurchaseFactTable:
+    """
+    purchases ⋈ products ⋈ customers를 한 번만 수행해 둔 비정규화 구매 사실 테이블.
+    행마다 고객/상품 정수 코드와 구매 수치만 배열로 들고, 고객/상품 속성은 코드로 배열 조회한다.
+    기존 inner join과 같이 알려진 고객/상품의 구매만 포함한다.
+    """
+    customers: pd.DataFrame  # 코드 순서의 고객 차원 (CustomerID 중복 제거)
+    products: pd.DataFrame  # 코드 순서의 상품 차원
+    customer_codes: np.ndarray
+    product_codes: np.ndarray
+    quantity: np.ndarray
+    total_amount: np.ndarray
+    satisfaction: np.ndarray
+    purchase_date: np.ndarray
+
+    @classmethod
+    def dimensions(cls, snapshot: DatasetSnapshot):
+        customers = snapshot.customers.drop_duplicates("CustomerID").reset_index(drop=True)
+        products = snapshot.products.drop_duplicates("ProductID").reset_index(drop=True)
+        return customers, products
+
+    @classmethod
+    def build(cls, purchases: pd.DataFrame, customers: pd.DataFrame, products: pd.DataFrame):
+        customer_codes = encode_keys(purchases["CustomerID"], pd.Index(customers["CustomerID"]))
+        product_codes = encode_keys(purchases["ProductID"], pd.Index(products["ProductID"]))
+        known = (customer_codes >= 0) & (product_codes >= 0)
+
+        return cls(
+            customers=customers,
+            products=products,
+            customer_codes=customer_codes[known],
+            product_codes=product_codes[known],
+            quantity=purchases["Quantity"].to_numpy()[known],
+            total_amount=purchases["TotalAmount"].to_numpy()[known],
+            satisfaction=purchases["Satisfaction"].to_numpy()[known],
+            purchase_date=pd.to_datetime(purchases["purchaseDate"]).to_numpy()[known],
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot: DatasetSnapshot):
+        customers, products = cls.dimensions(snapshot)
+        chunks = list(cls.chunks(snapshot, customers, products))
+        if len(chunks) == 1:
+            return chunks[0]
+        # stream 형식: 청크별 사실 행(코드와 수치 배열)만 이어 붙인다
+        return cls(customers=customers, products=products, **{
+            name: np.concatenate([getattr(chunk, name) for chunk in chunks])
+            for name in ("customer_codes", "product_codes", "quantity", "total_amount", "satisfaction", "purchase_date")
+        })
+
+    @classmethod
+    def chunks(cls, snapshot: DatasetSnapshot, customers: pd.DataFrame, products: pd.DataFrame):
+        """
+        스냅샷의 구매 행을 청크 단위 사실 테이블로 차례로 반환 (stream 형식이 아니면 하나).
+        """
+        for purchases in DatasetStore.getInstance().purchase_chunks(snapshot):
+            yield cls.build(purchases, customers, products)
+
+    def append(self, purchases: pd.DataFrame):
+        """
+        같은 차원에 대한 새 구매 행을 이어 붙인 새 테이블을 반환.
+        """
+        appended = self.build(purchases, self.customers, self.products)
+        return PurchaseFactTable(
+            customers=self.customers,
+            products=self.products,
+            customer_codes=np.concatenate([self.customer_codes, appended.customer_codes]),
+            product_codes=np.concatenate([self.product_codes, appended.product_codes]),
+            quantity=np.concatenate([self.quantity, appended.quantity]),
+            total_amount=np.concatenate([self.total_amount, appended.total_amount]),
+            satisfaction=np.concatenate([self.satisfaction, appended.satisfaction]),
+            purchase_date=np.concatenate([self.purchase_date, appended.purchase_date]),
+        )
+
+    def tail(self, start: int):
+        """
+        start 번째 행부터의 사실 행 (증분 집계용).
+        """
+        return PurchaseFactTable(
+            customers=self.customers,
+            products=self.products,
+            customer_codes=self.customer_codes[start:],
+            product_codes=self.product_codes[start:],
+            quantity=self.quantity[start:],
+            total_amount=self.total_amount[start:],
+            satisfaction=self.satisfaction[start:],
+            purchase_date=self.purchase_date[start:],
+        )
+
+    def __len__(self) -> int:
+        return len(self.customer_codes)
+
+    def customer_attribute(self, column: str) -> np.ndarray:
+        return self.customers[column].to_numpy()[self.customer_codes]
+
+    def product_attribute(self, column: str) -> np.ndarray:
+        return self.products[column].to_numpy()[self.product_codes]
+
+    @staticmethod
+    def current_dimensions():
+        """
+        현재 데이터 버전의 (고객, 상품) 차원. 구매 행만 추가된 경우 같은 객체를 유지한다.
+        """
+        return DatasetStore.getInstance().get_derived(
+            "purchase_dimensions",
+            PurchaseFactTable.dimensions,
+            lambda dimensions, snapshot: dimensions,
+        )
+
+    @staticmethod
+    def current():
+        """
+        현재 데이터 버전의 사실 테이블. 구매 행만 추가된 경우 기존 테이블에 이어 붙인다.
+        """
+        return DatasetStore.getInstance().get_derived(
+            "purchase_fact_table",
+            PurchaseFactTable.from_snapshot,
+            lambda table, snapshot: table.append(snapshot.appended_purchases),
+        )
+
+
+def synchronize(generation, *aggregates):
+    """
+    apply_purchases로 구매 행을 누적하는 집계(rows, customers 속성을 가진 RfmTable, TrendsCube 등)를
+    현재 데이터 세대에 맞춰 (세대, [집계...])로 반환한다. aggregates는 (현재 집계 또는 None, factory) 쌍이다.
+
+    - csv/columnar: 사실 테이블에서 집계가 아직 반영하지 않은 행만 더한다.
+    - stream: 집계가 직전 세대(generation)를 반영했고 구매 행만 추가되었다면 추가된 행만 더하고,
+      그 외에는 factory(customers, products)로 새로 만든 뒤 purchases.csv를 청크 단위로 한 번 읽어 모든 집계에 더한다.
+      메모리는 집계 크기(고객/상품 수)와 청크 크기에만 비례한다.
+    """
+    store = DatasetStore.getInstance()
+    snapshot = store.get_snapshot()
+    if store.data_format() != "stream":
+        facts = PurchaseFactTable.current()
+        results = []
+        for aggregate, factory in aggregates:
+            if aggregate is None or aggregate.customers is not facts.customers or aggregate.rows > len(facts):
+                aggregate = factory(facts.customers, facts.products)
+            if aggregate.rows < len(facts):
+                aggregate.apply_purchases(facts.tail(aggregate.rows))
+            results.append(aggregate)
+        return snapshot.generation, results
+
+    customers, products = PurchaseFactTable.current_dimensions()
+    current = all(aggregate is not None and aggregate.customers is customers for aggregate, _ in aggregates)
+    if current and generation == snapshot.generation:
+        return snapshot.generation, [aggregate for aggregate, _ in aggregates]
+    if current and snapshot.appended_purchases is not None and snapshot.parent_generation == generation:
+        facts = PurchaseFactTable.build(snapshot.appended_purchases, customers, products)
+        for aggregate, _ in aggregates:
+            aggregate.apply_purchases(facts)
+        return snapshot.generation, [aggregate for aggregate, _ in aggregates]
+
+    results = [factory(customers, products) for _, factory in aggregates]
+    for facts in PurchaseFactTable.chunks(snapshot, customers, products):
+        for aggregate in results:
+            aggregate.apply_purchases(facts)
+    return snapshot.generation, results
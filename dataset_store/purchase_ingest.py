@@ -0,0 +1,296 @@
+import io
+import logging
+import os
+import threading
+import uuid
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from dataset_store.dataset_store import DatasetStore
+from dataset_store.fact_table import encode_keys
+
+
+logger = logging.getLogger(__name__)
+
+# purchases.csv와 같은 열 순서
+PURCHASE_COLUMNS = [
+    "purchaseID", "CustomerID", "ProductID", "Quantity", "Price (KRW)", "TotalAmount", "purchaseDate", "Satisfaction",
+]
+INGEST_FORMATS = ("ndjson", "csv")
+# 요청 본문을 이 크기(줄 단위로 자름)마다 파싱/검증해 임시 세그먼트에 기록
+INGEST_BATCH_BYTES = 4 * 1024 * 1024
+# 거부 사유별로 응답에 담는 예시 행 수
+INGEST_ERROR_SAMPLES = 20
+SATISFACTION_RANGE = (1, 10)
+
+
+class IngestError(Exception):
+    """
+    본문 형식이 잘못되었거나(400) 검증에 실패한 행이 있어(422) 아무것도 커밋하지 않은 경우.
+    """
+
+    def __init__(self, status_code: int, detail):
+        super().__init__(str(detail))
+        self.status_code = status_code
+        self.detail = detail
+
+
+def committed_purchase_ids() -> set:
+    """
+    현재 데이터 세대에 커밋된 purchaseID 집합 (purchases.csv와 세그먼트).
+    세대마다 한 번 만들고, 구매 행만 추가된 세대는 추가된 행의 ID만 더한다. 호출자가 수정하면 안 된다.
+    """
+    store = DatasetStore.getInstance()
+
+    def build(snapshot) -> set:
+        # stream 형식은 청크 단위로 읽어 ID만 모은다
+        ids = set()
+        for chunk in store.purchase_chunks(snapshot):
+            ids.update(chunk["purchaseID"].astype(str).tolist())
+        return ids
+
+    def append(ids: set, snapshot) -> set:
+        # 이전 세대의 값은 더 이상 쓰이지 않으므로 제자리에서 갱신
+        ids.update(snapshot.appended_purchases["purchaseID"].astype(str).tolist())
+        return ids
+
+    return store.get_derived("purchase_ids", build, append)
+
+
+def validate_purchases(frame: pd.DataFrame, customers: pd.Index, products: pd.DataFrame, seen_ids: set,
+                       committed_ids=frozenset()):
+    """
+    구매 행을 벡터 연산으로 검증해 (purchases.csv 형식의 유효 행, 행별 거부 사유 배열(유효하면 ""))을 반환.
+    고객/상품은 알려진 ID만, 가격은 상품 가격, TotalAmount는 Quantity × 가격(비어 있으면 채운다)이어야 한다.
+    purchaseID는 이미 커밋된 ID(committed_ids)나 이 요청의 앞선 행(seen_ids에 누적)과 겹칠 수 없다.
+    """
+    missing = [column for column in PURCHASE_COLUMNS if column not in frame.columns and column != "TotalAmount"]
+    if missing:
+        raise IngestError(400, f"Missing purchase columns: {missing}")
+
+    purchase_ids = frame["purchaseID"].astype("string").str.strip()
+    customer_ids = frame["CustomerID"].astype("string")
+    product_codes = encode_keys(frame["ProductID"].astype("string").fillna(""), pd.Index(products["ProductID"]))
+    quantity = pd.to_numeric(frame["Quantity"], errors="coerce")
+    price = pd.to_numeric(frame["Price (KRW)"], errors="coerce")
+    total = pd.to_numeric(frame["TotalAmount"], errors="coerce") if "TotalAmount" in frame.columns \
+        else pd.Series(np.nan, index=frame.index)
+    total = total.fillna(quantity * price)
+    purchase_date = pd.to_datetime(frame["purchaseDate"], format="%Y-%m-%d", errors="coerce")
+    satisfaction = pd.to_numeric(frame["Satisfaction"], errors="coerce")
+    catalog_price = np.where(product_codes >= 0, products["Price (KRW)"].to_numpy()[product_codes], np.nan)
+    # 큰 ID 집합을 isin으로 넘기면 호출마다 해시 테이블을 다시 만들므로 행별로 조회
+    known = np.fromiter(
+        (not pd.isna(value) and (value in seen_ids or value in committed_ids) for value in purchase_ids),
+        dtype=bool, count=len(purchase_ids),
+    )
+    duplicated = purchase_ids.duplicated(keep="first").to_numpy() | known
+
+    # 행마다 처음 걸린 사유 하나만 기록
+    checks = [
+        ("missing_purchase_id", purchase_ids.isna().to_numpy() | (purchase_ids == "").fillna(True).to_numpy()),
+        ("duplicate_purchase_id", duplicated),
+        ("unknown_customer", encode_keys(customer_ids.fillna(""), customers) < 0),
+        ("unknown_product", product_codes < 0),
+        ("invalid_quantity", ~((quantity >= 1) & (quantity % 1 == 0)).to_numpy()),
+        ("price_mismatch", ~(price == catalog_price).to_numpy()),
+        ("total_mismatch", ~(total == quantity * price).to_numpy()),
+        ("invalid_purchase_date", purchase_date.isna().to_numpy()),
+        ("invalid_satisfaction", ~(satisfaction.between(*SATISFACTION_RANGE) & (satisfaction % 1 == 0)).to_numpy()),
+    ]
+    reasons = np.select([failed for _, failed in checks], [reason for reason, _ in checks], default="")
+    valid = reasons == ""
+    seen_ids.update(purchase_ids[valid].tolist())
+
+    accepted = pd.DataFrame({
+        "purchaseID": purchase_ids[valid],
+        "CustomerID": customer_ids[valid],
+        "ProductID": frame["ProductID"].astype("string")[valid],
+        "Quantity": quantity[valid].astype(np.int64),
+        "Price (KRW)": price[valid].astype(np.int64),
+        "TotalAmount": total[valid].astype(np.int64),
+        "purchaseDate": purchase_date[valid].dt.strftime("%Y-%m-%d"),
+        "Satisfaction": satisfaction[valid].astype(np.int64),
+    })
+    return accepted, reasons
+
+
+class PurchaseIngest:
+    """
+    요청 하나의 구매 행 대량 수집. 스트리밍 본문(NDJSON 또는 헤더가 있는 CSV)을 INGEST_BATCH_BYTES 단위로
+    파싱/검증해 세그먼트 디렉터리의 임시 파일에 이어 쓰고, finish()에서 다음 순번 이름으로 한 번에 공개한다.
+
+    - 커밋은 임시 파일을 '<순번 8자리>.csv'로 하드 링크하는 것이므로 원자적이고, 같은 순번을 잡은
+      다른 프로세스가 있으면 다음 순번으로 다시 시도한다. 세그먼트는 커밋 후 수정하지 않는다 (append-only).
+    - purchaseID는 커밋된 ID(committed_purchase_ids)와도 겹칠 수 없다. 동시에 같은 ID를 수집한 다른 요청이
+      먼저 커밋했다면 커밋 직전 확인에서 409로 거부한다.
+    - on_error='reject'(기본)는 검증에 실패한 행이 하나라도 있으면 아무것도 커밋하지 않고,
+      'skip'은 유효한 행만 커밋하고 거부 사유별 행 수를 반환한다.
+    - 커밋 후 DatasetStore를 다시 읽으면 새 세그먼트만 추가 행으로 읽혀 스냅샷 리스너(결과 캐시, 특성 저장소,
+      온라인 이탈 모델 등)와 사실 테이블/RFM/동향 큐브가 추가 행만 반영한다.
+    """
+
+    # 커밋 직전 중복 확인과 커밋을 프로세스 안에서 직렬화
+    __commit_lock = threading.Lock()
+
+    def __init__(self, fmt: str, on_error: str = "reject"):
+        if fmt not in INGEST_FORMATS:
+            raise IngestError(400, f"Unknown ingest format: {fmt}")
+        store = DatasetStore.getInstance()
+        snapshot = store.get_snapshot()
+        self.fmt = fmt
+        self.on_error = on_error
+        self.rows = 0
+        self.rejected = Counter()
+        self.samples = []
+        self.segment = None
+        self.__store = store
+        self.__customers = pd.Index(snapshot.customers["CustomerID"].drop_duplicates())
+        self.__products = snapshot.products.drop_duplicates("ProductID")
+        self.__seen_ids = set()
+        self.__buffer = bytearray()
+        self.__header = None
+        self.__row = 0
+        self.__temp_path = None
+        self.__temp = None
+
+    def feed(self, chunk: bytes):
+        """
+        본문 조각을 모아 INGEST_BATCH_BYTES를 넘으면 완성된 줄들까지를 배치로 반환 (아니면 None).
+        """
+        self.__buffer += chunk
+        if len(self.__buffer) < INGEST_BATCH_BYTES:
+            return None
+        end = self.__buffer.rfind(b"\n")
+        if end < 0:
+            return None
+        batch = bytes(self.__buffer[:end + 1])
+        del self.__buffer[:end + 1]
+        return batch
+
+    def write(self, batch: bytes):
+        """
+        배치를 파싱/검증하고 유효한 행을 임시 세그먼트에 기록.
+        """
+        if self.fmt == "csv" and self.__header is None:
+            header, _, batch = batch.partition(b"\n")
+            self.__header = header + b"\n"
+        if not batch.strip():
+            return
+        frame = self.__parse(batch)
+        first_row = self.__row
+        self.__row += len(frame)
+        accepted, reasons = validate_purchases(
+            frame, self.__customers, self.__products, self.__seen_ids, committed_purchase_ids(),
+        )
+
+        failed = np.flatnonzero(reasons != "")
+        if len(failed):
+            self.rejected.update(reasons[failed].tolist())
+            for row in failed[:max(INGEST_ERROR_SAMPLES - len(self.samples), 0)]:
+                self.samples.append({"row": first_row + int(row) + 1, "reason": str(reasons[row])})
+            if self.on_error == "reject":
+                raise IngestError(422, {
+                    "message": "Invalid purchases; nothing was committed (use on_error=skip to keep valid rows).",
+                    "rejected": dict(self.rejected),
+                    "samples": self.samples,
+                })
+        if len(accepted):
+            self.__append(accepted)
+
+    def __parse(self, batch: bytes) -> pd.DataFrame:
+        try:
+            if self.fmt == "ndjson":
+                frame = pd.read_json(io.BytesIO(batch), lines=True, dtype=False)
+            else:
+                frame = pd.read_csv(io.BytesIO(self.__header + batch), dtype=str, keep_default_na=False,
+                                    na_values=[""])
+        except ValueError as e:
+            raise IngestError(400, f"Invalid {self.fmt} body after row {self.__row}: {e}")
+        return frame.reset_index(drop=True)
+
+    def __append(self, accepted: pd.DataFrame):
+        if self.__temp is None:
+            os.makedirs(self.__store.segment_dir(), exist_ok=True)
+            self.__temp_path = os.path.join(self.__store.segment_dir(), f".ingest-{uuid.uuid4().hex}.tmp")
+            self.__temp = open(self.__temp_path, "w", newline="")
+            accepted.to_csv(self.__temp, index=False)
+        else:
+            accepted.to_csv(self.__temp, index=False, header=False)
+        self.rows += len(accepted)
+
+    def finish(self) -> dict:
+        """
+        남은 본문을 처리하고 유효한 행이 있으면 세그먼트로 커밋한 뒤 데이터셋을 다시 읽는다.
+        """
+        if self.__buffer:
+            batch = bytes(self.__buffer)
+            self.__buffer.clear()
+            self.write(batch if batch.endswith(b"\n") else batch + b"\n")
+        if self.rows == 0 and not self.rejected:
+            raise IngestError(400, "No purchases in request body.")
+        if self.rows:
+            with self.__commit_lock:
+                self.__check_committed()
+                self.segment = self.__commit()
+                self.__store.reload()
+        logger.info("purchases ingested", extra={
+            "segment": self.segment, "rows": self.rows, "rejected": sum(self.rejected.values()),
+        })
+        snapshot = self.__store.get_snapshot()
+        return {**self.summary(), "generation": snapshot.generation, "version": snapshot.version}
+
+    def __check_committed(self):
+        # 이 요청이 검증된 뒤 커밋된 세그먼트에 같은 purchaseID가 있으면 커밋하지 않는다
+        self.__store.reload()
+        conflicts = self.__seen_ids & committed_purchase_ids()
+        if conflicts:
+            raise IngestError(409, {
+                "message": "Purchases with the same purchaseID were committed by another ingest; nothing was committed.",
+                "rejected": {"duplicate_purchase_id": len(conflicts)},
+                "purchase_ids": sorted(conflicts)[:INGEST_ERROR_SAMPLES],
+            })
+
+    def __commit(self) -> str:
+        self.__temp.flush()
+        os.fsync(self.__temp.fileno())
+        self.__temp.close()
+        self.__temp = None
+        segment_dir = self.__store.segment_dir()
+        segments = self.__store.segments()
+        sequence = int(segments[-1].split(".")[0]) + 1 if segments else 1
+        while True:
+            name = f"{sequence:08d}.csv"
+            try:
+                os.link(self.__temp_path, os.path.join(segment_dir, name))
+                break
+            except FileExistsError:
+                sequence += 1
+        os.remove(self.__temp_path)
+        self.__temp_path = None
+        return name
+
+    def summary(self) -> dict:
+        return {
+            "segment": self.segment,
+            "rows": self.rows,
+            "rejected_rows": sum(self.rejected.values()),
+            "rejected": dict(self.rejected),
+            "samples": self.samples,
+        }
+
+    def abort(self):
+        """
+        커밋하지 않은 임시 세그먼트를 지운다 (커밋 후에는 아무것도 하지 않는다).
+        """
+        if self.__temp is not None:
+            self.__temp.close()
+            self.__temp = None
+        if self.__temp_path is not None:
+            try:
+                os.remove(self.__temp_path)
+            except OSError:
+                pass
+            self.__temp_path = None
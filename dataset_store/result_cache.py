@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from dataset_store.dataset_store import DatasetStore, DatasetSnapshot
+
+
+# 메모리 계층에 유지하는 응답 본문 크기 합의 상한 (바이트)
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """
+    직렬화된 JSON 응답 본문과 그 ETag (입력 데이터 버전과 파라미터의 해시).
+    """
+    key: str
+    body: bytes
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.key}"'
+
+
+def encode_result(result) -> bytes:
+    # JSONResponse와 같은 방식으로 직렬화
+    return json.dumps(result, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class ResultCache:
+    """
+    분석 결과를 (데이터 버전, 이름, 파라미터)의 해시로 저장하는 2계층 캐시.
+    데이터 파일이 같으면 같은 입력에 같은 결과가 나오므로, 한 번 계산한 응답 본문을 그대로 돌려준다.
+
+    - 메모리: RESULT_CACHE_MAX_BYTES 이하로 유지하는 LRU
+    - 디스크: RESULT_CACHE_DIR/<데이터 버전>-<키>.json. 재시작 후에도 데이터 버전이 같으면 재사용한다
+    - DatasetStore가 새 스냅샷을 게시하면 다른 버전의 항목을 두 계층에서 모두 지운다
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__max_bytes = int(os.getenv("RESULT_CACHE_MAX_BYTES", RESULT_CACHE_MAX_BYTES))
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__entries = OrderedDict()
+            cls.__instance.__bytes = 0
+            cls.__instance.__hits = {"memory": 0, "disk": 0}
+            cls.__instance.__misses = 0
+            cls.__instance.__listening = False
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def cache_dir() -> str:
+        return os.getenv("RESULT_CACHE_DIR", "./cache/results")
+
+    @staticmethod
+    def key(name: str, params: dict, data_version: str) -> str:
+        payload = json.dumps({"name": name, "data_version": data_version, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def __path(self, data_version: str, key: str) -> str:
+        return os.path.join(self.cache_dir(), f"{data_version}-{key}.json")
+
+    def load(self):
+        """
+        스냅샷 교체 알림을 등록하고 현재 데이터 버전이 아닌 디스크 항목을 지운다.
+        """
+        store = DatasetStore.getInstance()
+        with self.__lock:
+            if not self.__listening:
+                store.add_listener(self.invalidate)
+                self.__listening = True
+        self.invalidate(store.get_snapshot())
+
+    def invalidate(self, snapshot: DatasetSnapshot):
+        with self.__lock:
+            for key, (data_version, body) in list(self.__entries.items()):
+                if data_version != snapshot.version:
+                    del self.__entries[key]
+                    self.__bytes -= len(body)
+        if not os.path.isdir(self.cache_dir()):
+            return
+        for name in os.listdir(self.cache_dir()):
+            if not name.startswith(f"{snapshot.version}-"):
+                try:
+                    os.remove(os.path.join(self.cache_dir(), name))
+                except OSError:
+                    pass
+
+    def get(self, name: str, params: dict) -> Optional[CachedResult]:
+        """
+        현재 데이터 버전에 대해 저장된 결과. 메모리에 없으면 디스크에서 읽어 메모리에 올린다.
+        """
+        data_version = DatasetStore.getInstance().get_snapshot().version
+        key = self.key(name, params, data_version)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                self.__entries.move_to_end(key)
+                self.__hits["memory"] += 1
+                return CachedResult(key, entry[1])
+        try:
+            with open(self.__path(data_version, key), "rb") as f:
+                body = f.read()
+        except OSError:
+            with self.__lock:
+                self.__misses += 1
+            return None
+        with self.__lock:
+            self.__hits["disk"] += 1
+            self.__remember(key, data_version, body)
+        return CachedResult(key, body)
+
+    def put(self, name: str, params: dict, result, data_version: str) -> CachedResult:
+        """
+        data_version의 입력으로 계산한 결과를 저장. 그사이 데이터가 바뀌었으면 저장하지 않고 돌려주기만 한다.
+        """
+        key = self.key(name, params, data_version)
+        cached = CachedResult(key, encode_result(result))
+        if data_version != DatasetStore.getInstance().get_snapshot().version:
+            return cached
+
+        os.makedirs(self.cache_dir(), exist_ok=True)
+        path = self.__path(data_version, key)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(cached.body)
+        os.replace(temp_path, path)
+        with self.__lock:
+            self.__remember(key, data_version, cached.body)
+        return cached
+
+    def get_or_compute(self, name: str, params: dict, compute) -> CachedResult:
+        """
+        저장된 결과가 없으면 compute()로 계산해 저장한다.
+        """
+        cached = self.get(name, params)
+        if cached is not None:
+            return cached
+        data_version = DatasetStore.getInstance().get_snapshot().version
+        return self.put(name, params, compute(), data_version)
+
+    def __remember(self, key: str, data_version: str, body: bytes):
+        previous = self.__entries.pop(key, None)
+        if previous is not None:
+            self.__bytes -= len(previous[1])
+        if len(body) > self.__max_bytes:
+            return
+        self.__entries[key] = (data_version, body)
+        self.__bytes += len(body)
+        while self.__bytes > self.__max_bytes:
+            _, (_, evicted) = self.__entries.popitem(last=False)
+            self.__bytes -= len(evicted)
+
+    def status(self) -> dict:
+        with self.__lock:
+            return {
+                "entries": len(self.__entries),
+                "bytes": self.__bytes,
+                "max_bytes": self.__max_bytes,
+                "hits": dict(self.__hits),
+                "misses": self.__misses,
+                "dir": self.cache_dir(),
+            }
@@ -0,0 +1,199 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+
+# 이보다 적은 행은 프로세스 간 복사 비용이 더 커서 현재 프로세스에서 집계
+AGGREGATION_MIN_ROWS = 1_000_000
+# 최댓값 집계의 초기값 (datetime64를 int64로 본 NaT와 같다)
+MISSING = np.iinfo(np.int64).min
+
+
+@dataclass
+class GroupedAggregate:
+    """
+    키별 행 수, 합계, 최댓값. keys는 정렬된 고유 키이고 나머지 배열은 keys와 같은 순서다.
+    """
+    keys: np.ndarray
+    counts: np.ndarray
+    sums: dict
+    maxes: dict
+
+
+def aggregate(keys: np.ndarray, sums: dict, maxes: Optional[dict] = None, size: Optional[int] = None) -> GroupedAggregate:
+    """
+    키별 행 수와 sums 컬럼의 합, maxes 컬럼(int64)의 최댓값.
+    size가 주어지면 키를 0..size-1의 조밀한 코드로 보고 정렬 없이 bincount로 집계한다.
+    """
+    maxes = maxes or {}
+    if size is not None:
+        counts = np.bincount(keys, minlength=size)
+        groups = np.flatnonzero(counts)
+        inverse, length = keys, size
+    else:
+        groups, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.ravel()
+        counts = length = None
+
+    if counts is None:
+        counts = np.bincount(inverse, minlength=len(groups))
+    else:
+        counts = counts[groups]
+    summed = {name: np.bincount(inverse, weights=values, minlength=length or len(groups)) for name, values in sums.items()}
+    maximum = {}
+    for name, values in maxes.items():
+        result = np.full(length or len(groups), MISSING, dtype=np.int64)
+        np.maximum.at(result, inverse, values)
+        maximum[name] = result
+    if size is not None:
+        summed = {name: values[groups] for name, values in summed.items()}
+        maximum = {name: values[groups] for name, values in maximum.items()}
+    return GroupedAggregate(groups, counts, summed, maximum)
+
+
+def share_arrays(arrays: dict):
+    """
+    배열들을 공유 메모리 블록에 복사하고 (블록 목록, {이름: (블록 이름, dtype, 길이)})를 반환.
+    """
+    blocks, specs = [], {}
+    for name, values in arrays.items():
+        values = np.ascontiguousarray(values)
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        blocks.append(block)
+        specs[name] = (block.name, values.dtype.str, len(values))
+    return blocks, specs
+
+
+def read_shared(specs: dict, copy: bool):
+    # spawn 워커는 부모의 resource tracker를 공유하므로 블록은 만든 쪽과 관계없이 부모가 unlink 하면 정리된다
+    blocks = {name: shared_memory.SharedMemory(name=block_name) for name, (block_name, _, _) in specs.items()}
+    arrays = {
+        name: np.ndarray((length,), dtype=dtype, buffer=blocks[name].buf)
+        for name, (_, dtype, length) in specs.items()
+    }
+    if copy:
+        arrays = {name: values.copy() for name, values in arrays.items()}
+    return blocks, arrays
+
+
+def _aggregate_shard(specs: dict, shard: int, shard_count: int, size: Optional[int], sum_names: list, max_names: list) -> dict:
+    """
+    프로세스 풀 워커: partition % shard_count == shard인 행만 집계해 결과를 새 공유 메모리 블록으로 넘긴다.
+    """
+    blocks, arrays = read_shared(specs, copy=False)
+    try:
+        mask = arrays["partition"] % shard_count == shard
+        result = aggregate(
+            arrays["keys"][mask],
+            {name: arrays[f"sum:{name}"][mask] for name in sum_names},
+            {name: arrays[f"max:{name}"][mask] for name in max_names},
+            size,
+        )
+    finally:
+        del arrays
+        for block in blocks.values():
+            block.close()
+
+    outputs = {"keys": result.keys, "counts": result.counts}
+    outputs.update({f"sum:{name}": values for name, values in result.sums.items()})
+    outputs.update({f"max:{name}": values for name, values in result.maxes.items()})
+    output_blocks, output_specs = share_arrays(outputs)
+    # 결과 블록은 부모 프로세스가 읽은 뒤 삭제한다
+    for block in output_blocks:
+        block.close()
+    return output_specs
+
+
+class ShardedAggregator:
+    """
+    구매 사실 행의 키별 집계를 프로세스 풀에서 샤드 단위로 나눠 실행.
+    행을 partition(고객 코드 등) 해시로 샤드에 배정하므로 샤드마다 키가 겹치지 않고, 병합은 이어 붙여 정렬하기만 하면 된다.
+    입력 컬럼과 샤드별 결과는 공유 메모리로 주고받아 DataFrame/배열을 pickle하지 않는다.
+
+    AGGREGATION_WORKERS(기본: CPU 수), AGGREGATION_MIN_ROWS 환경 변수로 설정.
+    워커가 1개이거나 행이 적으면 현재 프로세스에서 aggregate를 그대로 실행한다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__workers = int(os.getenv("AGGREGATION_WORKERS", os.cpu_count() or 1))
+            cls.__instance.__min_rows = int(os.getenv("AGGREGATION_MIN_ROWS", AGGREGATION_MIN_ROWS))
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__pool = None
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    def __get_pool(self):
+        with self.__lock:
+            if self.__pool is None:
+                # 스레드가 있는 서버 프로세스를 fork하면 잠금 상태가 복제되므로 spawn 사용
+                self.__pool = ProcessPoolExecutor(
+                    max_workers=self.__workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self.__pool
+
+    def aggregate(self, keys: np.ndarray, sums: dict, maxes: Optional[dict] = None, size: Optional[int] = None,
+                  partition: Optional[np.ndarray] = None) -> GroupedAggregate:
+        """
+        module 수준 aggregate와 같은 결과를 샤드 병렬로 계산.
+        partition: 샤드 배정에 쓸 정수 배열 (기본: keys). 같은 키의 행은 같은 partition 값을 가져야 한다.
+        """
+        maxes = maxes or {}
+        if self.__workers < 2 or len(keys) < self.__min_rows:
+            return aggregate(keys, sums, maxes, size)
+
+        inputs = {"keys": keys, "partition": keys if partition is None else partition}
+        inputs.update({f"sum:{name}": values for name, values in sums.items()})
+        inputs.update({f"max:{name}": values for name, values in maxes.items()})
+        blocks, specs = share_arrays(inputs)
+        try:
+            pool = self.__get_pool()
+            futures = [
+                pool.submit(_aggregate_shard, specs, shard, self.__workers, size, list(sums), list(maxes))
+                for shard in range(self.__workers)
+            ]
+            parts = []
+            for future in futures:
+                output_blocks, part = read_shared(future.result(), copy=True)
+                for block in output_blocks.values():
+                    block.close()
+                    block.unlink()
+                parts.append(part)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        merged = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        order = np.argsort(merged["keys"], kind="stable")
+        merged = {name: values[order] for name, values in merged.items()}
+        return GroupedAggregate(
+            keys=merged["keys"],
+            counts=merged["counts"],
+            sums={name: merged[f"sum:{name}"] for name in sums},
+            maxes={name: merged[f"max:{name}"] for name in maxes},
+        )
+
+    def status(self) -> dict:
+        return {"workers": self.__workers, "min_rows": self.__min_rows, "started": self.__pool is not None}
+
+    def shutdown(self):
+        with self.__lock:
+            if self.__pool is not None:
+                self.__pool.shutdown(wait=True, cancel_futures=True)
+                self.__pool = None
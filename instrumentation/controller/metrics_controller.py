@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from instrumentation.metrics import MetricsRegistry
+
+metricsRouter = APIRouter()
+
+
+@metricsRouter.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Request and analysis-stage latency/memory histograms and row counters in Prometheus text format.
+    """
+    return PlainTextResponse(MetricsRegistry.getInstance().render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,74 @@
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+
+from instrumentation.profiling import Profiler
+
+profilingRouter = APIRouter()
+
+
+class ProfilingRequest(BaseModel):
+    mode: Literal["sampling", "cprofile"] = "sampling"
+    requests: int = Field(1, ge=1, le=100)
+
+
+@profilingRouter.get("/admin/profiling")
+async def profiling_status():
+    """
+    Report whether this worker is armed to profile upcoming requests.
+    """
+    return Profiler.getInstance().status()
+
+
+@profilingRouter.post("/admin/profiling")
+async def arm_profiling(profilingRequest: ProfilingRequest = ProfilingRequest()):
+    """
+    Profile the next N requests handled by this worker (sampling: all threads, cprofile: event loop thread).
+    Each profiled response carries an X-Profile-Id header.
+    """
+    profiler = Profiler.getInstance()
+    profiler.arm(profilingRequest.mode, profilingRequest.requests)
+    return profiler.status()
+
+
+@profilingRouter.delete("/admin/profiling")
+async def disarm_profiling():
+    """
+    Stop profiling upcoming requests on this worker.
+    """
+    profiler = Profiler.getInstance()
+    profiler.disarm()
+    return profiler.status()
+
+
+@profilingRouter.get("/admin/profiles")
+async def list_profiles():
+    """
+    List stored profiles, newest first.
+    """
+    return {"profiles": Profiler.getInstance().list()}
+
+
+@profilingRouter.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """
+    Profile summary: duration, tracemalloc peak and top allocation sites, and the cProfile summary in cprofile mode.
+    """
+    record = Profiler.getInstance().get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return record
+
+
+@profilingRouter.get("/admin/profiles/{profile_id}/download")
+async def download_profile(profile_id: str):
+    """
+    Download the raw profile: .pstats (load with pstats/snakeviz) or .collapsed (flamegraph.pl / speedscope).
+    """
+    path = Profiler.getInstance().file_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    media_type = "application/octet-stream" if path.endswith(".pstats") else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=path.rsplit("/", 1)[-1])
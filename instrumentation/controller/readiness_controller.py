@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+
+from instrumentation.readiness import Readiness
+
+readinessRouter = APIRouter()
+
+
+async def requireReady():
+    # 데이터 로드 중인 백그라운드 단계가 DatasetStore 락을 잡고 있으므로, 준비 전의 데이터 요청은
+    # 이벤트 루프에서 락을 기다리지 않고 바로 503으로 거절한다 (/health 등이 막히지 않도록)
+    readiness = Readiness.getInstance()
+    if not readiness.is_ready():
+        error = readiness.status()["error"]
+        detail = f"Server failed to start: {error}" if error else "Server is starting; data is still loading."
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "1"})
+
+
+@readinessRouter.get("/health")
+async def health():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@readinessRouter.get("/ready")
+async def ready():
+    """
+    Readiness probe: 200 once data is loaded and derived tables are built, 503 before that (or if startup failed).
+    Also reports boot time, per-phase timings and resident memory.
+    """
+    readiness = Readiness.getInstance()
+    status = readiness.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
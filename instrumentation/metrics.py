@@ -0,0 +1,277 @@
+import functools
+import inspect
+import logging
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+# 지연 시간(초)과 RSS 증가량(바이트) 히스토그램 버킷
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+MEMORY_BUCKETS = tuple(1024 * 1024 * 4 ** exponent for exponent in range(8))  # 1MiB ~ 16GiB
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_current_span = ContextVar("current_span", default=None)
+# span마다 파일을 열지 않도록 /proc/self/statm을 프로세스별로 한 번만 연다 (pid, fd)
+_statm = None
+
+
+def rss_bytes() -> int:
+    """
+    현재 프로세스의 상주 메모리(RSS). /proc이 없으면 최대 RSS로 대신한다.
+    """
+    global _statm
+    try:
+        if _statm is None or _statm[0] != os.getpid():
+            _statm = (os.getpid(), os.open("/proc/self/statm", os.O_RDONLY))
+        return int(os.pread(_statm[1], 128, 0).split()[1]) * PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self.__series = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self.__series.get(labels)
+        if series is None:
+            series = self.__series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][index] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.__series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, description: str, label_names: tuple):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.__series = {}
+
+    def inc(self, labels: tuple, amount: float = 1):
+        self.__series[labels] = self.__series.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.__series.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = None
+
+    def render(self) -> list:
+        if self.value is None:
+            return []
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+
+class MetricsRegistry:
+    """
+    요청/분석 단계별 지연 시간, 메모리 증가량, 처리 행 수를 모아 Prometheus 텍스트 형식으로 내보내는 레지스트리.
+    값은 이 프로세스에서 관측한 것만 포함한다 (process 모드 풀 워커 안의 단계는 작업 단위로만 보인다).
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__request_seconds = Histogram(
+                "http_request_duration_seconds", "HTTP request latency by route.",
+                ("method", "route", "status"), LATENCY_BUCKETS,
+            )
+            cls.__instance.__request_memory = Histogram(
+                "http_request_memory_growth_bytes", "Process RSS growth while handling a request.",
+                ("method", "route"), MEMORY_BUCKETS,
+            )
+            cls.__instance.__span_seconds = Histogram(
+                "analysis_span_duration_seconds", "Latency of instrumented repository/service methods.",
+                ("component", "method"), LATENCY_BUCKETS,
+            )
+            cls.__instance.__span_memory = Histogram(
+                "analysis_span_memory_growth_bytes", "Process RSS growth during instrumented methods.",
+                ("component", "method"), MEMORY_BUCKETS,
+            )
+            cls.__instance.__span_rows = Counter(
+                "analysis_span_rows_total", "Rows processed by instrumented methods.", ("component", "method"),
+            )
+            cls.__instance.__span_errors = Counter(
+                "analysis_span_errors_total", "Instrumented method calls that raised.", ("component", "method", "error"),
+            )
+            cls.__instance.__gauges = {}
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, memory_growth: int):
+        with self.__lock:
+            self.__request_seconds.observe((method, route, str(status)), seconds)
+            self.__request_memory.observe((method, route), memory_growth)
+
+    def observe_span(self, component: str, method: str, seconds: float, memory_growth: int,
+                     rows: Optional[int], error: Optional[str]):
+        labels = (component, method)
+        with self.__lock:
+            self.__span_seconds.observe(labels, seconds)
+            self.__span_memory.observe(labels, memory_growth)
+            if rows is not None:
+                self.__span_rows.inc(labels, rows)
+            if error is not None:
+                self.__span_errors.inc(labels + (error,))
+
+    def set_gauge(self, name: str, description: str, value: float):
+        with self.__lock:
+            gauge = self.__gauges.get(name)
+            if gauge is None:
+                gauge = self.__gauges[name] = Gauge(name, description)
+            gauge.value = value
+
+    def render(self) -> str:
+        with self.__lock:
+            lines = []
+            for metric in (self.__request_seconds, self.__request_memory, self.__span_seconds,
+                           self.__span_memory, self.__span_rows, self.__span_errors, *self.__gauges.values()):
+                lines.extend(metric.render())
+        lines.extend([
+            "# HELP process_resident_memory_bytes Resident memory size in bytes.",
+            "# TYPE process_resident_memory_bytes gauge",
+            f"process_resident_memory_bytes {rss_bytes()}",
+        ])
+        return "\n".join(lines) + "\n"
+
+
+class Span:
+    __slots__ = ("component", "method", "rows")
+
+    def __init__(self, component: str, method: str):
+        self.component = component
+        self.method = method
+        self.rows = None
+
+
+def record_rows(rows: int):
+    """
+    현재 단계가 처리한 행 수를 기록 (반환값으로 추정한 값 대신 사용).
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.rows = int(rows)
+
+
+def count_rows(result, args: tuple = ()) -> Optional[int]:
+    """
+    DataFrame/배열 반환값의 행 수 ((X_train, X_test, ...) 같은 튜플은 첫 원소).
+    반환값이 배열이 아니면(모델, 지표 등) 첫 배열 인자의 행 수.
+    """
+    if isinstance(result, (tuple, list)) and result:
+        result = result[0]
+    for value in (result, *args):
+        shape = getattr(value, "shape", None)
+        if shape:
+            return int(shape[0])
+    return None
+
+
+@contextmanager
+def span(component: str, method: str):
+    """
+    블록의 지연 시간, RSS 증가량(동시에 실행 중인 다른 작업 포함), 처리 행 수를 기록하고 DEBUG 로그를 남긴다.
+    """
+    current = Span(component, method)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    rss = rss_bytes()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        seconds = time.perf_counter() - started
+        memory_growth = max(rss_bytes() - rss, 0)
+        MetricsRegistry.getInstance().observe_span(component, method, seconds, memory_growth, current.rows, error)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("span", extra={
+                "component": component, "method": method, "duration_ms": round(seconds * 1000, 3),
+                "memory_growth_bytes": memory_growth, "rows": current.rows, "error": error,
+            })
+
+
+def _wrap(component: str, name: str, func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(component, name) as current:
+                result = await func(*args, **kwargs)
+                if current.rows is None:
+                    current.rows = count_rows(result, args)
+                return result
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(component, name) as current:
+                result = func(*args, **kwargs)
+                if current.rows is None:
+                    current.rows = count_rows(result, args)
+                return result
+    return wrapper
+
+
+def instrumented(cls):
+    """
+    클래스의 공개 메서드를 모두 span으로 감싸는 클래스 데코레이터 (component 레이블은 클래스 이름).
+    """
+    for name, member in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.isfunction(member):
+            setattr(cls, name, _wrap(cls.__name__, name, member))
+    return cls
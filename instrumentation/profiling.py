@@ -0,0 +1,262 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Optional
+
+import pandas as pd
+
+
+PROFILE_MODES = ("sampling", "cprofile")
+# 보관하는 프로파일 수, 메모리 할당 상위 항목 수
+MAX_PROFILES = 50
+TRACEMALLOC_TOP = 25
+SAMPLE_INTERVAL_SECONDS = 0.005
+# 프로파일링 관리/수집/상태 확인 요청은 무장 횟수를 쓰지 않도록 제외
+EXCLUDED_PATH_PREFIXES = ("/admin/", "/metrics", "/health", "/ready")
+
+
+class StackSampler(threading.Thread):
+    """
+    일정 간격으로 모든 스레드의 스택을 모아 collapsed stack(flamegraph) 형식으로 센다.
+    이벤트 루프 스레드뿐 아니라 BoundedExecutor 풀 스레드에서 실행되는 분석 작업도 잡힌다.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.__stop = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self.__stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self.__stop.set()
+        self.join()
+
+
+class ProfileCapture:
+    """
+    요청 하나를 감싸는 프로파일. start/stop 사이의 CPU 프로파일과 tracemalloc 스냅샷을 저장한다.
+    """
+
+    def __init__(self, mode: str, method: str, path: str):
+        self.profile_id = uuid.uuid4().hex
+        self.mode = mode
+        self.method = method
+        self.path = path
+        self.__profiler = None
+        self.__sampler = None
+        self.__owns_tracemalloc = False
+        self.__started = None
+        self.__started_at = None
+
+    def start(self):
+        self.__started_at = pd.Timestamp.now().isoformat()
+        # 이미 추적 중이면(벤치마크 등) 그 추적을 그대로 쓰고 끄지 않는다
+        self.__owns_tracemalloc = not tracemalloc.is_tracing()
+        if self.__owns_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        if self.mode == "cprofile":
+            self.__profiler = cProfile.Profile()
+            self.__profiler.enable()
+        else:
+            self.__sampler = StackSampler(float(os.getenv("PROFILE_SAMPLE_INTERVAL", SAMPLE_INTERVAL_SECONDS)))
+            self.__sampler.start()
+        self.__started = time.perf_counter()
+
+    def stop(self, status: int, profile_dir: str) -> dict:
+        duration = time.perf_counter() - self.__started
+        if self.__profiler is not None:
+            self.__profiler.disable()
+        if self.__sampler is not None:
+            self.__sampler.stop()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if self.__owns_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(profile_dir, exist_ok=True)
+        record = {
+            "profile_id": self.profile_id,
+            "mode": self.mode,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "started_at": self.__started_at,
+            "duration_ms": round(duration * 1000, 3),
+            "tracemalloc": {
+                "peak_bytes": peak,
+                "top": [
+                    {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]
+                ],
+            },
+        }
+        if self.__profiler is not None:
+            record["file"] = f"{self.profile_id}.pstats"
+            self.__profiler.dump_stats(os.path.join(profile_dir, record["file"]))
+            summary = io.StringIO()
+            pstats.Stats(self.__profiler, stream=summary).sort_stats("cumulative").print_stats(30)
+            record["summary"] = summary.getvalue()
+        else:
+            record["file"] = f"{self.profile_id}.collapsed"
+            record["samples"] = self.__sampler.samples
+            with open(os.path.join(profile_dir, record["file"]), "w") as f:
+                for stack, count in self.__sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        with open(os.path.join(profile_dir, f"{self.profile_id}.json"), "w") as f:
+            json.dump(record, f, ensure_ascii=False)
+        return record
+
+
+class Profiler:
+    """
+    요청 단위 온디맨드 프로파일링.
+    - 워커 단위: arm(mode, requests)으로 이 프로세스의 다음 N개 요청을 프로파일링
+    - 요청 단위: PROFILING_HEADER=1일 때 X-Profile: sampling|cprofile 헤더가 있는 요청을 프로파일링
+    sampling은 모든 스레드의 스택을, cprofile은 요청을 처리하는 이벤트 루프 스레드만 기록한다.
+    둘 다 tracemalloc 스냅샷을 함께 저장한다. 동시에 하나의 요청만 프로파일링하고 나머지는 그대로 처리한다.
+    무장하지 않았고 헤더 모드가 꺼져 있으면 요청마다 속성 두 개만 확인한다.
+
+    결과는 PROFILE_DIR(기본 ./profiles)에 <id>.json(요약)과 <id>.pstats 또는 <id>.collapsed(flamegraph)로 저장한다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__header_enabled = os.getenv("PROFILING_HEADER", "0") == "1"
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__armed_mode = None
+            cls.__instance.__armed_requests = 0
+            cls.__instance.__active = False
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def profile_dir() -> str:
+        return os.getenv("PROFILE_DIR", "./profiles")
+
+    def arm(self, mode: str = "sampling", requests: int = 1):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        with self.__lock:
+            self.__armed_mode = mode
+            self.__armed_requests = requests
+
+    def disarm(self):
+        with self.__lock:
+            self.__armed_mode = None
+            self.__armed_requests = 0
+
+    def begin(self, method: str, path: str, header: Optional[str]) -> Optional[ProfileCapture]:
+        """
+        이 요청을 프로파일링해야 하면 시작한 ProfileCapture를, 아니면 None을 반환.
+        """
+        if self.__armed_requests <= 0 and not (self.__header_enabled and header):
+            return None
+        if path.startswith(EXCLUDED_PATH_PREFIXES):
+            return None
+        with self.__lock:
+            if self.__active:
+                return None
+            if self.__header_enabled and header in PROFILE_MODES:
+                mode = header
+            elif self.__armed_requests > 0:
+                mode = self.__armed_mode
+                self.__armed_requests -= 1
+                if self.__armed_requests == 0:
+                    self.__armed_mode = None
+            else:
+                return None
+            self.__active = True
+        capture = ProfileCapture(mode, method, path)
+        capture.start()
+        return capture
+
+    def end(self, capture: ProfileCapture, status: int) -> dict:
+        try:
+            record = capture.stop(status, self.profile_dir())
+        finally:
+            with self.__lock:
+                self.__active = False
+        self.__trim()
+        return record
+
+    def __trim(self):
+        records = sorted(
+            (name for name in os.listdir(self.profile_dir()) if name.endswith(".json")),
+            key=lambda name: os.path.getmtime(os.path.join(self.profile_dir(), name)),
+        )
+        for name in records[:max(len(records) - MAX_PROFILES, 0)]:
+            profile_id = name[:-len(".json")]
+            for suffix in (".json", ".pstats", ".collapsed"):
+                try:
+                    os.remove(os.path.join(self.profile_dir(), profile_id + suffix))
+                except OSError:
+                    pass
+
+    def list(self) -> list:
+        if not os.path.isdir(self.profile_dir()):
+            return []
+        records = []
+        for name in os.listdir(self.profile_dir()):
+            if name.endswith(".json"):
+                record = self.get(name[:-len(".json")])
+                if record is not None:
+                    records.append({key: record[key] for key in ("profile_id", "mode", "method", "path", "status",
+                                                                 "started_at", "duration_ms")})
+        return sorted(records, key=lambda record: record["started_at"], reverse=True)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        # 경로 조작 방지: 생성한 ID 형식(16진수)만 허용
+        if not all(char in "0123456789abcdef" for char in profile_id):
+            return None
+        try:
+            with open(os.path.join(self.profile_dir(), f"{profile_id}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def file_path(self, profile_id: str) -> Optional[str]:
+        record = self.get(profile_id)
+        return os.path.join(self.profile_dir(), record["file"]) if record is not None else None
+
+    def status(self) -> dict:
+        with self.__lock:
+            return {
+                "header_enabled": self.__header_enabled,
+                "armed_mode": self.__armed_mode,
+                "armed_requests": self.__armed_requests,
+                "active": self.__active,
+                "profile_dir": self.profile_dir(),
+            }
@@ -0,0 +1,164 @@
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+from instrumentation.metrics import MetricsRegistry, rss_bytes, span
+
+
+logger = logging.getLogger(__name__)
+
+# 예열 단계가 import하는 무거운 모듈 (처음 요청이 import 비용을 치르지 않도록)
+WARMUP_MODULES = (
+    "sklearn.linear_model",
+    "sklearn.decomposition",
+    "sklearn.metrics",
+    "sklearn.model_selection",
+    "sklearn.pipeline",
+    "sklearn.preprocessing",
+    "joblib",
+)
+# 상태에 로드 여부를 보고하는 모듈
+REPORTED_MODULES = ("pandas", "numpy", "sklearn", "scipy", "matplotlib", "joblib")
+_IMPORTED_AT = time.perf_counter()
+
+
+def process_age_seconds() -> float:
+    """
+    프로세스 시작 후 경과 시간 (인터프리터 시작과 import 포함). /proc이 없으면 이 모듈을 import한 뒤의 시간.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # comm에 공백이 있을 수 있으므로 마지막 ')' 뒤에서 starttime(22번째 필드)을 읽는다
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - started_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - _IMPORTED_AT
+
+
+class Readiness:
+    """
+    서버 시작 단계를 백그라운드 스레드에서 실행하고 준비 상태(readiness probe)를 보고한다.
+    포트는 바로 열리고, 필수 단계(데이터 로드 등)가 모두 끝나기 전까지 GET /ready는 503을 반환한다.
+    그 전에 들어온 데이터 요청(분석/이탈 모델/적재)은 기다리지 않고 503(Retry-After)으로 거절된다.
+
+    필수 단계 뒤의 예열 단계(서빙 모델 로드, sklearn import)는 STARTUP_WARMUP=1일 때만 실행하며
+    준비 상태에 영향을 주지 않는다. 기본값(0)이면 처음 쓰는 요청이 로드하므로 동향 조회만 하는 워커는
+    sklearn/matplotlib을 메모리에 올리지 않는다.
+
+    단계별 시간과 RSS 증가량은 span("Startup", 단계)으로, 시작/준비 시각과 RSS는 /metrics 게이지로 내보낸다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__lock = threading.Lock()
+            cls.__instance.__thread = None
+            cls.__instance.__phases = []
+            cls.__instance.__ready = threading.Event()
+            cls.__instance.__error = None
+            cls.__instance.__boot = {}
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def warmup_enabled() -> bool:
+        return os.getenv("STARTUP_WARMUP", "0") == "1"
+
+    def start(self, phases: list, warmup: list = ()):
+        """
+        phases: [(이름, 함수)] 준비 전에 순서대로 실행할 필수 단계, warmup: 준비 후 실행할 예열 단계.
+        """
+        with self.__lock:
+            if self.__thread is not None:
+                return
+            self.__boot = {"startup_seconds": round(process_age_seconds(), 3), "startup_rss_bytes": rss_bytes()}
+            self.__set_gauges("startup")
+            self.__thread = threading.Thread(
+                target=self.__run, args=(list(phases), list(warmup) if self.warmup_enabled() else []),
+                name="startup", daemon=True,
+            )
+            self.__thread.start()
+
+    def __run_phase(self, name: str, func, required: bool) -> bool:
+        phase = {"name": name, "required": required, "status": "running"}
+        with self.__lock:
+            self.__phases.append(phase)
+        started = time.perf_counter()
+        rss = rss_bytes()
+        try:
+            with span("Startup", name):
+                func()
+            phase["status"] = "succeeded"
+            return True
+        except Exception as e:
+            phase.update(status="failed", error=f"{type(e).__name__}: {e}")
+            logger.exception("startup phase failed", extra={"phase": name})
+            return False
+        finally:
+            phase["seconds"] = round(time.perf_counter() - started, 3)
+            phase["memory_growth_bytes"] = max(rss_bytes() - rss, 0)
+
+    def __run(self, phases: list, warmup: list):
+        for name, func in phases:
+            if not self.__run_phase(name, func, required=True):
+                self.__error = f"startup phase {name} failed"
+                return
+        self.__boot.update(ready_seconds=round(process_age_seconds(), 3), ready_rss_bytes=rss_bytes())
+        self.__set_gauges("ready")
+        self.__ready.set()
+        logger.info("ready", extra=self.__boot)
+
+        for name, func in warmup:
+            self.__run_phase(name, func, required=False)
+        if warmup:
+            self.__boot.update(warm_seconds=round(process_age_seconds(), 3), warm_rss_bytes=rss_bytes())
+            self.__set_gauges("warm")
+
+    def __set_gauges(self, stage: str):
+        registry = MetricsRegistry.getInstance()
+        registry.set_gauge(f"process_{stage}_seconds", f"Seconds from process start until the server was {stage}.",
+                           self.__boot[f"{stage}_seconds"])
+        registry.set_gauge(f"process_{stage}_resident_memory_bytes", f"Resident memory when the server was {stage}.",
+                           self.__boot[f"{stage}_rss_bytes"])
+
+    def is_ready(self) -> bool:
+        return self.__ready.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        필수 단계가 끝날 때까지 기다려 준비 여부를 반환 (실패하면 바로 False).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.__ready.wait(0.05):
+            if self.__error is not None or (deadline is not None and time.monotonic() >= deadline):
+                return False
+        return True
+
+    def join(self, timeout: Optional[float] = None):
+        # 종료 시 시작 단계가 아직 실행 중이면 끝나기를 기다린다
+        thread = self.__thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def status(self) -> dict:
+        with self.__lock:
+            return {
+                "ready": self.is_ready(),
+                "error": self.__error,
+                "warmup": self.warmup_enabled(),
+                "boot": dict(self.__boot),
+                "phases": [dict(phase) for phase in self.__phases],
+                "modules_loaded": {name: name in sys.modules for name in REPORTED_MODULES},
+                "resident_memory_bytes": rss_bytes(),
+            }
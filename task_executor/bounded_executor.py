@@ -0,0 +1,175 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+# 엔드포인트별 기본 (동시 실행 수, 대기열 길이)
+DEFAULT_LIMITS = {
+    "trends": (8, 32),
+    "churn": (1, 4),
+    "pca": (1, 4),
+    "train": (1, 2),
+    "model_search": (1, 2),
+    "charts": (2, 8),
+    "ingest": (2, 8),
+    "dataset": (2, 8),
+}
+FALLBACK_LIMIT = (4, 16)
+
+
+class ExecutorSaturatedError(Exception):
+    """
+    엔드포인트의 실행 슬롯과 대기열이 모두 찬 경우 (HTTP 429로 응답).
+    """
+
+    def __init__(self, endpoint: str, retry_after: int = 1):
+        super().__init__(f"'{endpoint}' 작업 대기열이 가득 찼습니다.")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class EndpointLimit:
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+
+    def release(self):
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def status(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "running": min(self.in_flight, self.max_concurrency),
+            "queued": max(self.in_flight - self.max_concurrency, 0),
+        }
+
+
+def parse_limits(value: str) -> dict:
+    """
+    "trends:8:32,pca:1:4" 형식의 EXECUTOR_LIMITS 값을 해석.
+    """
+    limits = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        endpoint, max_concurrency, max_queue = entry.split(":")
+        limits[endpoint] = (int(max_concurrency), int(max_queue))
+    return limits
+
+
+class BoundedExecutor:
+    """
+    pandas/sklearn 같은 블로킹 작업을 이벤트 루프 밖의 스레드/프로세스 풀에서 실행.
+    엔드포인트마다 동시 실행 수와 대기열 길이를 제한하고, 넘치면 ExecutorSaturatedError를 던진다.
+
+    호출자가 취소되어도 이미 풀에서 실행 중인 작업은 멈추지 않으므로, 슬롯은 작업이 실제로 끝날 때 반납한다.
+
+    EXECUTOR_KIND=thread|process, EXECUTOR_MAX_WORKERS, EXECUTOR_LIMITS 환경 변수로 설정.
+    process 모드에서는 pickle 가능한 모듈 수준 함수만 제출할 수 있다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__kind = os.getenv("EXECUTOR_KIND", "thread")
+            cls.__instance.__max_workers = int(os.getenv("EXECUTOR_MAX_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+            cls.__instance.__limit_config = {**DEFAULT_LIMITS, **parse_limits(os.getenv("EXECUTOR_LIMITS", ""))}
+            cls.__instance.__limits = {}
+            cls.__instance.__pool = None
+            cls.__instance.__local_pool = None
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    def __get_pool(self):
+        if self.__pool is None:
+            if self.__kind == "process":
+                # 스레드가 있는 서버 프로세스를 fork하면 잠금 상태가 복제되므로 spawn 사용
+                self.__pool = ProcessPoolExecutor(
+                    max_workers=self.__max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self.__pool = ThreadPoolExecutor(max_workers=self.__max_workers, thread_name_prefix="analysis")
+        return self.__pool
+
+    def __get_local_pool(self):
+        if self.__kind != "process":
+            return self.__get_pool()
+        if self.__local_pool is None:
+            self.__local_pool = ThreadPoolExecutor(max_workers=self.__max_workers, thread_name_prefix="local")
+        return self.__local_pool
+
+    def __get_limit(self, endpoint: str) -> EndpointLimit:
+        limit = self.__limits.get(endpoint)
+        if limit is None:
+            limit = EndpointLimit(*self.__limit_config.get(endpoint, FALLBACK_LIMIT))
+            self.__limits[endpoint] = limit
+        return limit
+
+    async def run(self, endpoint: str, func, *args, **kwargs):
+        """
+        func(*args, **kwargs)를 풀에서 실행하고 결과를 기다린다.
+        """
+        return await self.__submit(endpoint, self.__get_pool, func, *args, **kwargs)
+
+    async def run_local(self, endpoint: str, func, *args, **kwargs):
+        """
+        이 프로세스의 상태(집계 큐브 등)를 갱신하는 작업은 풀 종류와 관계없이 스레드에서 실행.
+        """
+        return await self.__submit(endpoint, self.__get_local_pool, func, *args, **kwargs)
+
+    async def __submit(self, endpoint: str, get_pool, func, *args, **kwargs):
+        limit = self.__get_limit(endpoint)
+        if limit.in_flight >= limit.max_concurrency + limit.max_queue:
+            raise ExecutorSaturatedError(endpoint)
+
+        limit.in_flight += 1
+        try:
+            await limit.semaphore.acquire()
+        except BaseException:
+            # 대기열에서 취소된 경우 (아직 제출하지 않았다)
+            limit.in_flight -= 1
+            raise
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = get_pool().submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            limit.release()
+            raise
+
+        def release(_):
+            # 풀 스레드에서 호출되므로 이벤트 루프에 넘긴다 (종료 중에 루프가 닫혔으면 무시)
+            try:
+                loop.call_soon_threadsafe(limit.release)
+            except RuntimeError:
+                pass
+
+        # 호출자가 취소되면 아직 시작하지 않은 작업만 취소되고, 실행 중인 작업은 끝날 때 슬롯을 반납한다
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def status(self) -> dict:
+        return {
+            "kind": self.__kind,
+            "max_workers": self.__max_workers,
+            "endpoints": {endpoint: limit.status() for endpoint, limit in self.__limits.items()},
+        }
+
+    def shutdown(self):
+        if self.__pool is not None:
+            self.__pool.shutdown(wait=False, cancel_futures=True)
+            self.__pool = None
+        if self.__local_pool is not None:
+            self.__local_pool.shutdown(wait=False, cancel_futures=True)
+            self.__local_pool = None
@@ -0,0 +1,86 @@
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from task_executor.job_queue import Job, JobQueue, TERMINAL_STATUSES
+
+jobRouter = APIRouter()
+
+
+def job_view(job: Job) -> dict:
+    # 중복 판별용 키는 내부 값이므로 응답에서 뺀다
+    view = job.to_dict()
+    view.pop("key")
+    return view
+
+
+async def job_response(job: Job, deduplicated: bool, wait: bool = False) -> JSONResponse:
+    """
+    제출한 작업에 대한 응답.
+    wait이면 작업이 끝날 때까지 기다려 결과(실패 시 500, 취소 시 409)를, 아니면 202와 상태 조회 위치를 반환.
+    """
+    if wait:
+        job = await JobQueue.getInstance().wait(job.job_id)
+        if job.status == "succeeded":
+            return JSONResponse(content=job.result)
+        return JSONResponse(status_code=500 if job.status == "failed" else 409, content=job_view(job))
+
+    location = f"/jobs/{job.job_id}"
+    return JSONResponse(
+        status_code=202,
+        content={**job_view(job), "deduplicated": deduplicated, "status_url": location},
+        headers={"Location": location},
+    )
+
+
+@jobRouter.get("/jobs")
+async def list_jobs(kind: Optional[str] = None, status: Optional[str] = None):
+    """
+    List recent jobs (newest first), optionally filtered by kind and status.
+    """
+    queue = JobQueue.getInstance()
+    return {"queue": queue.status(), "jobs": [job_view(job) for job in queue.list(kind, status)]}
+
+
+@jobRouter.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Poll a job's status; the result is included once it has succeeded.
+    """
+    job = JobQueue.getInstance().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job_view(job)
+
+
+@jobRouter.get("/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    """
+    Stream the job's status as newline-delimited JSON until it finishes.
+    """
+    queue = JobQueue.getInstance()
+    if queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    async def events():
+        async for job in queue.watch(job_id):
+            yield json.dumps(job_view(job), ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@jobRouter.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job. A queued job is cancelled at once; a running job is marked cancelling,
+    left to finish in its worker (keeping its executor slot) and then marked cancelled with its result discarded.
+    """
+    queue = JobQueue.getInstance()
+    job = queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job.status in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}.")
+    return job_view(queue.cancel(job_id))
@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+import pandas as pd
+
+from instrumentation.metrics import span
+from task_executor.bounded_executor import BoundedExecutor, ExecutorSaturatedError
+
+logger = logging.getLogger(__name__)
+
+# 대기/실행 중인 작업 수 상한과 메모리에 유지하는 완료 작업 수
+MAX_PENDING_JOBS = 32
+MAX_HISTORY = 200
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+# 상태 스트림이 변화 없이 이 시간(초)이 지나면 현재 상태를 다시 보낸다
+HEARTBEAT_SECONDS = 15
+
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str
+    params: dict
+    data_version: Optional[str]
+    key: str
+    status: str = "queued"
+    submitted_at: str = field(default_factory=lambda: pd.Timestamp.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def job_key(kind: str, data_version: Optional[str], params: dict) -> str:
+    # 같은 데이터 버전과 파라미터의 작업은 같은 키를 가진다
+    payload = json.dumps({"kind": kind, "data_version": data_version, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class JobQueue:
+    """
+    학습처럼 오래 걸리는 작업을 요청과 분리해 실행하는 작업 큐.
+    제출하면 작업 ID를 바로 돌려주고, 작업은 종류별로 JOB_WORKERS개씩 BoundedExecutor 풀에서 실행된다
+    (종류 이름을 BoundedExecutor의 엔드포인트 이름으로 사용).
+
+    - 같은 종류/데이터 버전/파라미터의 작업이 대기 또는 실행 중이면 새로 만들지 않고 그 작업을 반환
+    - 대기 중인 작업은 바로 취소된다. 실행 중인 작업은 스레드/프로세스에서 멈출 수 없으므로
+      cancelling 상태로 두었다가 실행이 끝나면 결과를 버리고 cancelled로 바꾼다
+      (그때까지 중복 판별 키와 실행 슬롯을 유지하므로 취소 후 다시 제출해도 제한을 넘지 않는다)
+    - 상태가 바뀔 때마다 <JOB_DIR>/<job_id>.json에 기록하고, 재시작 시 불러온다
+      (재시작으로 끊긴 대기/실행 중 작업은 실패로 기록)
+
+    JOB_DIR, JOB_WORKERS, JOB_MAX_PENDING 환경 변수로 설정. 이벤트 루프 안에서만 호출한다.
+    """
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__max_pending = int(os.getenv("JOB_MAX_PENDING", MAX_PENDING_JOBS))
+            cls.__instance.__workers = int(os.getenv("JOB_WORKERS", 1))
+            cls.__instance.__slots = {}
+            cls.__instance.__jobs = {}
+            cls.__instance.__in_flight = {}
+            cls.__instance.__tasks = {}
+            cls.__instance.__changed = {}
+        return cls.__instance
+
+    @classmethod
+    def getInstance(cls):
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def job_dir() -> str:
+        return os.getenv("JOB_DIR", "./jobs")
+
+    def __persist(self, job: Job):
+        os.makedirs(self.job_dir(), exist_ok=True)
+        path = os.path.join(self.job_dir(), f"{job.job_id}.json")
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(job.to_dict(), f, ensure_ascii=False, default=str)
+        os.replace(temp_path, path)
+
+    def __update(self, job: Job, **changes):
+        for name, value in changes.items():
+            setattr(job, name, value)
+        if job.status in TERMINAL_STATUSES:
+            job.finished_at = job.finished_at or pd.Timestamp.now().isoformat()
+            if self.__in_flight.get(job.key) == job.job_id:
+                del self.__in_flight[job.key]
+            self.__tasks.pop(job.job_id, None)
+        self.__persist(job)
+        # 상태 스트림을 기다리는 쪽을 깨운다
+        event = self.__changed.pop(job.job_id, None)
+        if event is not None:
+            event.set()
+
+    def load(self):
+        """
+        JOB_DIR의 작업 기록을 최근 MAX_HISTORY개까지 불러온다.
+        """
+        if not os.path.isdir(self.job_dir()):
+            return
+        jobs = []
+        for name in os.listdir(self.job_dir()):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.job_dir(), name)) as f:
+                    jobs.append(Job(**json.load(f)))
+            except (OSError, ValueError, TypeError):
+                continue
+        for job in sorted(jobs, key=lambda job: job.submitted_at)[-MAX_HISTORY:]:
+            self.__jobs[job.job_id] = job
+            if job.status not in TERMINAL_STATUSES:
+                self.__update(job, status="failed", error="서버 재시작으로 중단되었습니다.")
+
+    def submit(self, kind: str, func, *args, params: dict = None, data_version: str = None, on_success=None):
+        """
+        func(*args)를 실행하는 작업을 등록하고 (작업, 중복 여부)를 반환.
+        process 모드에서는 func가 모듈 수준 함수여야 한다.
+        on_success(result)는 작업이 성공하면 이벤트 루프에서 호출된다 (결과 캐시 저장 등).
+        코루틴 함수이면 끝날 때까지 기다린 뒤 작업을 성공으로 표시한다 (블로킹 작업은 run_local로 넘긴다).
+        """
+        params = params or {}
+        key = job_key(kind, data_version, params)
+        existing = self.__in_flight.get(key)
+        if existing is not None:
+            return self.__jobs[existing], True
+        if len(self.__in_flight) >= self.__max_pending:
+            raise ExecutorSaturatedError("jobs")
+
+        job = Job(job_id=uuid.uuid4().hex, kind=kind, params=params, data_version=data_version, key=key)
+        self.__jobs[job.job_id] = job
+        self.__in_flight[key] = job.job_id
+        self.__persist(job)
+        self.__tasks[job.job_id] = asyncio.get_running_loop().create_task(self.__run(job, on_success, func, *args))
+        self.__trim()
+        return job, False
+
+    async def __run(self, job: Job, on_success, func, *args):
+        executor = BoundedExecutor.getInstance()
+        slots = self.__slots.setdefault(job.kind, asyncio.Semaphore(self.__workers))
+        try:
+            async with slots:
+                self.__update(job, status="running", started_at=pd.Timestamp.now().isoformat())
+                with span("JobQueue", job.kind):
+                    while job.status != "cancelling":
+                        try:
+                            result = await executor.run(job.kind, func, *args)
+                            break
+                        except ExecutorSaturatedError:
+                            # 같은 엔드포인트를 쓰는 다른 요청으로 풀 대기열이 찬 경우 자리가 날 때까지 기다린다
+                            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            self.__update(job, status="cancelled")
+            return
+        except Exception as e:
+            if job.status == "cancelling":
+                self.__update(job, status="cancelled")
+            else:
+                self.__update(job, status="failed", error=f"{type(e).__name__}: {e}")
+            return
+        if job.status == "cancelling":
+            # 실행 중에 취소된 작업은 끝난 뒤 결과를 버린다
+            self.__update(job, status="cancelled")
+            return
+        if on_success is not None:
+            try:
+                outcome = on_success(result)
+                if inspect.isawaitable(outcome):
+                    await outcome
+            except Exception:
+                logger.exception("job on_success failed", extra={"job_id": job.job_id, "kind": job.kind})
+        self.__update(job, status="succeeded", result=result)
+
+    def __trim(self):
+        finished = [job_id for job_id, job in self.__jobs.items() if job.status in TERMINAL_STATUSES]
+        for job_id in finished[:max(len(self.__jobs) - MAX_HISTORY, 0)]:
+            del self.__jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.__jobs.get(job_id)
+
+    def list(self, kind: str = None, status: str = None) -> list:
+        jobs = [
+            job for job in self.__jobs.values()
+            if (kind is None or job.kind == kind) and (status is None or job.status == status)
+        ]
+        return sorted(jobs, key=lambda job: job.submitted_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.__jobs.get(job_id)
+        if job is None or job.status in TERMINAL_STATUSES or job.status == "cancelling":
+            return job
+        if job.status == "running":
+            self.__update(job, status="cancelling")
+            return job
+        task = self.__tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        self.__update(job, status="cancelled")
+        return job
+
+    async def wait(self, job_id: str, timeout: float = None) -> Optional[Job]:
+        """
+        작업이 끝날 때까지 (또는 timeout초) 기다린 뒤 작업을 반환.
+        """
+        async def finished():
+            async for _ in self.watch(job_id):
+                pass
+
+        try:
+            await asyncio.wait_for(finished(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.__jobs.get(job_id)
+
+    async def watch(self, job_id: str):
+        """
+        작업 상태를 처음 한 번, 이후 바뀔 때마다(또는 HEARTBEAT_SECONDS마다) 반환하고 끝나면 멈춘다.
+        """
+        job = self.__jobs.get(job_id)
+        while job is not None:
+            yield job
+            if job.status in TERMINAL_STATUSES:
+                return
+            event = self.__changed.setdefault(job_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            job = self.__jobs.get(job_id)
+
+    def status(self) -> dict:
+        counts = {}
+        for job in self.__jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.__workers,
+            "max_pending": self.__max_pending,
+            "pending": len(self.__in_flight),
+            "jobs": counts,
+        }
+
+    def shutdown(self):
+        for task in list(self.__tasks.values()):
+            task.cancel()